@@ -0,0 +1,856 @@
+import os
+import sys
+import json
+import time
+import random
+import socket
+import collections
+import typing
+import resource
+import platform
+import subprocess
+import multiprocessing
+
+import simulator
+
+'''
+    Benchmark de convergencia & custo do roteador (sobre o simulador em memoria):
+    - Topologias geradas: hub-and-spoke, anel, grade, aleatoria esparsa / densa & lei de potencia (tipo internet);
+    - Para cada topologia & tamanho: Tempo de convergencia, msgs & bytes por convergencia, CPU por periodo & pico de memoria;
+    - Apos convergir, remove 01 enlace (comando del nas 02 pontas; com hellos, queda silenciosa detectada pelas pontas) & mede a reconvergencia;
+    - Cada cenario roda num processo proprio (pico de memoria isolado); Resultados saem em JSON (01 linha por cenario);
+    - Modo de comparacao aponta regressoes entre 02 arquivos de resultados (ex.: antes & depois de 01 alteracao);
+    - Modo de encaminhamento mede pacotes de dados encaminhados por segundo ao longo de 01 cadeia de roteadores;
+    - Modo de rastreamento conta datagramas gerados por 01 trace (direcionado & por inundacao);
+    - Modo de rajada mede datagramas recebidos, descartados & tratados por 01 hub real (socket UDP + engine de threads) sob rajadas de updates;
+'''
+
+'''
+=================================================================
+-- Declarar constantes ------------------------------------------
+=================================================================
+'''
+
+TOPOLOGY_HUB = 'hub'
+TOPOLOGY_RING = 'ring'
+TOPOLOGY_GRID = 'grid'
+TOPOLOGY_SPARSE = 'sparse'
+TOPOLOGY_DENSE = 'dense'
+TOPOLOGY_POWER_LAW = 'power-law'
+TOPOLOGY_LIST = [TOPOLOGY_HUB, TOPOLOGY_RING, TOPOLOGY_GRID, TOPOLOGY_SPARSE, TOPOLOGY_DENSE, TOPOLOGY_POWER_LAW]
+
+DEFAULT_SIZES = '10,50,100'
+MAX_WEIGHT = 10
+SPARSE_DEGREE = 3 # Grau medio da topologia aleatoria esparsa
+DENSE_FRACTION = .25 # Fracao de vizinhos de cada no na topologia aleatoria densa
+POWER_LAW_LINKS = 2 # Enlaces criados por no na topologia de lei de potencia (Barabasi-Albert)
+REGRESSION_THRESHOLD = .1 # Variacao relativa a partir da qual 01 metrica eh apontada na comparacao
+
+ARG_NAME_TOPOLOGIES = '--topologies'
+ARG_NAME_SIZES = '--sizes'
+ARG_NAME_OUTPUT = '--output'
+ARG_NAME_SCENARIO = '--scenario'
+ARG_NAME_COMPARE = '--compare'
+ARG_NAME_HANDLE_MSG = '--handle-msg'
+ARG_NAME_UPDATE_ROUND = '--update-round'
+ARG_NAME_FORWARD = '--forward'
+ARG_NAME_PACKETS = '--packets'
+ARG_NAME_TRACE = '--trace'
+ARG_NAME_BURST = '--burst'
+ARG_NAME_ROUNDS = '--rounds'
+ARG_NAME_PAUSE = '--pause'
+
+HANDLE_MSG_ENTRIES_PER_RUN = 200000 # Qtd aproximada de entradas de update tratadas por medicao de custo por msg
+UPDATE_ROUNDS = 21 # Rodadas de updates completos medidas por medicao de custo de rodada (reporta a mediana)
+FORWARD_PACKETS = 20000 # Pacotes de dados enviados de ponta a ponta da cadeia por medicao de encaminhamento
+BURST_HUB_ADDR = '127.0.1.1' # Endereco (loopback) do hub que recebe as rajadas
+BURST_ENTRIES = 60 # Destinos por update de rajada
+BURST_ROUNDS = 50 # Rodadas de updates (01 por spoke em cada rodada)
+BURST_PAUSE = .005 # Pausa (s) entre rodadas
+BURST_DRAIN_TIMEOUT = 5.0 # Tempo maximo (s) aguardando o hub processar o que recebeu apos a rajada
+
+# Metricas comparadas (todas: Menor eh melhor)
+COMPARED_METRICS = [
+    'startup.wrong_tables', 'startup.convergence_time', 'startup.msgs', 'startup.bytes', 'startup.cpu_per_period_ms', 'startup.max_burst',
+    'del.wrong_tables', 'del.convergence_time', 'del.msgs', 'del.bytes', 'del.cpu_per_period_ms', 'del.max_burst',
+    'peak_rss_kb',
+]
+
+USAGE = (
+    'Usage: python3 benchmark.py [--topologies ' + ','.join(TOPOLOGY_LIST) + '] [--sizes ' + DEFAULT_SIZES + ']'
+    + ' [--pi 1] [--delay 0.01] [--seed 0] [--wire-format json|binary] [--multipath ecmp|weighted|off] [--update-schedule fixed|adaptive] [--hello-interval 0]'
+    + ' [--max-time 600] [--output <file>]'
+    + '\n       python3 benchmark.py --compare <baseline.jsonl> <current.jsonl>'
+    + '\n       python3 benchmark.py --handle-msg <entries,...> [--wire-format json|binary] [--seed 0] [--output <file>]'
+    + '\n       python3 benchmark.py --update-round <spokes,...> [--wire-format json|binary] [--mtu ' + str(simulator.router.MTU) + '] [--output <file>]'
+    + '\n       python3 benchmark.py --forward <chain_sizes,...> [--packets ' + str(FORWARD_PACKETS) + '] [--wire-format json|binary] [--multipath ecmp|weighted|off] [--output <file>]'
+    + '\n       python3 benchmark.py --trace <sizes,...> [--topologies ' + ','.join(TOPOLOGY_LIST) + '] [--wire-format json|binary] [--multipath ecmp|weighted|off] [--output <file>]'
+    + '\n       python3 benchmark.py --burst <spokes,...> [--rounds ' + str(BURST_ROUNDS) + '] [--pause ' + str(BURST_PAUSE) + '] [--socket-buffer <bytes>] [--wire-format json|binary] [--output <file>]'
+)
+
+'''
+=================================================================
+-- Gerar topologias ---------------------------------------------
+=================================================================
+'''
+
+'''
+    Retorna endereco do n-esimo roteador gerado (rede 10.0.0.0/8).
+'''
+def get_router_addr(i: int) -> str:
+    return '10.' + str(i // 62500) + '.' + str(i // 250 % 250) + '.' + str(i % 250 + 1)
+
+'''
+    Hub-and-spoke: 01 roteador central ligado a todos os demais.
+'''
+def generate_hub(size: int, rng: random.Random) -> list:
+    return [(0, i, rng.randint(1, MAX_WEIGHT)) for i in range(1, size)]
+
+'''
+    Anel: Cada roteador ligado ao proximo.
+'''
+def generate_ring(size: int, rng: random.Random) -> list:
+    return [(i, (i + 1) % size, rng.randint(1, MAX_WEIGHT)) for i in range(size if size > 2 else 1)]
+
+'''
+    Grade: Roteadores dispostos em linhas de ~sqrt(size) colunas, ligados aos vizinhos horizontais & verticais.
+'''
+def generate_grid(size: int, rng: random.Random) -> list:
+
+    columns = max(1, int(round(size ** .5)))
+    links = []
+
+    for i in range(size):
+        if ((i + 1) % columns != 0 and i + 1 < size):
+            links.append((i, i + 1, rng.randint(1, MAX_WEIGHT)))
+        if (i + columns < size):
+            links.append((i, i + columns, rng.randint(1, MAX_WEIGHT)))
+
+    return links
+
+'''
+    Aleatoria com grau medio aproximado: Arvore geradora aleatoria (garante conectividade) + enlaces extras sorteados.
+'''
+def generate_random(size: int, rng: random.Random, degree: float) -> list:
+
+    pairs = set()
+    for i in range(1, size):
+        pairs.add((rng.randrange(i), i))
+
+    max_links = size * (size - 1) // 2
+    target_links = min(max_links, max(len(pairs), int(size * degree / 2)))
+
+    while (len(pairs) < target_links):
+        a, b = rng.sample(range(size), 2)
+        pairs.add((min(a, b), max(a, b)))
+
+    return [(a, b, rng.randint(1, MAX_WEIGHT)) for a, b in sorted(pairs)]
+
+'''
+    Lei de potencia (tipo internet): Crescimento com ligacao preferencial (Barabasi-Albert).
+'''
+def generate_power_law(size: int, rng: random.Random) -> list:
+
+    pairs = set()
+    endpoints = [] # Cada no aparece 01 vez por enlace: Sorteio proporcional ao grau
+
+    for i in range(1, size):
+        targets = set()
+        while (len(targets) < min(POWER_LAW_LINKS, i)):
+            targets.add(rng.choice(endpoints) if endpoints else 0)
+        for target in targets:
+            pairs.add((target, i))
+            endpoints += [target, i]
+
+    return [(a, b, rng.randint(1, MAX_WEIGHT)) for a, b in sorted(pairs)]
+
+'''
+    Gera enlaces (indices de roteadores + peso) de 01 topologia.
+'''
+def generate_topology(topology: str, size: int, seed: int) -> list:
+
+    rng = random.Random(str(seed) + topology + str(size))
+
+    if (topology == TOPOLOGY_HUB):
+        return generate_hub(size, rng)
+    if (topology == TOPOLOGY_RING):
+        return generate_ring(size, rng)
+    if (topology == TOPOLOGY_GRID):
+        return generate_grid(size, rng)
+    if (topology == TOPOLOGY_SPARSE):
+        return generate_random(size, rng, SPARSE_DEGREE)
+    if (topology == TOPOLOGY_DENSE):
+        return generate_random(size, rng, max(SPARSE_DEGREE, DENSE_FRACTION * (size - 1)))
+    if (topology == TOPOLOGY_POWER_LAW):
+        return generate_power_law(size, rng)
+
+    raise IOError('Invalid topology "' + topology + '" (valid options: ' + ', '.join(TOPOLOGY_LIST) + ')')
+
+'''
+=================================================================
+-- Executar cenarios --------------------------------------------
+=================================================================
+'''
+
+'''
+    Executa 01 fase do cenario ate convergir & acrescenta custo medio de CPU por periodo (de toda a rede) as estatisticas.
+'''
+def run_phase(network: simulator.Network, name: str, max_time: float) -> dict:
+    stats = simulator.run_phase(network, name, max_time)
+    periods = max(1.0, stats['duration'] / network.pi)
+    stats['cpu_per_period_ms'] = round(stats['cpu_time'] / periods * 1000, 6)
+    return stats
+
+'''
+    Escolhe enlace a ser removido: Sorteado de forma deterministica, preferindo enlaces cuja remocao nao particiona a rede.
+'''
+def choose_link_to_remove(links: list, seed: int) -> tuple:
+
+    candidates = list(links)
+    random.Random(seed).shuffle(candidates)
+
+    for link in candidates:
+        adjacency: typing.Dict[int, list] = {}
+        for a, b, weight in links:
+            if ((a, b, weight) != link):
+                adjacency.setdefault(a, []).append(b)
+                adjacency.setdefault(b, []).append(a)
+
+        # Busca em largura a partir de 01 ponta: Enlace nao eh ponte se a outra ponta segue alcancavel
+        reached = {link[0]}
+        queue = [link[0]]
+        while (queue):
+            for node in adjacency.get(queue.pop(), []):
+                if (not node in reached):
+                    reached.add(node)
+                    queue.append(node)
+
+        if (link[1] in reached):
+            return link
+
+    return candidates[0]
+
+'''
+    Executa 01 cenario (topologia + tamanho) no processo atual & retorna seus resultados.
+'''
+def run_scenario(topology: str, size: int, args: object) -> dict:
+
+    links = generate_topology(topology, size, args.seed)
+    network = simulator.Network(args.pi, args.seed, args.wire_format, args.mtu, args.multipath, args.update_schedule, args.hello_interval)
+
+    try:
+        for a, b, weight in links:
+            network.add_link(get_router_addr(a), get_router_addr(b), weight, args.delay)
+
+        startup = run_phase(network, 'startup', args.max_time)
+
+        # Com hellos, o enlace cai silenciosamente: As pontas detectam a queda sozinhas
+        a, b, weight = choose_link_to_remove(links, args.seed)
+        network.fail_link(get_router_addr(a), get_router_addr(b), not args.hello_interval)
+        reconvergence = run_phase(network, 'del ' + get_router_addr(a) + ',' + get_router_addr(b), args.max_time)
+    finally:
+        network.close()
+
+    return {
+        'topology': topology,
+        'size': len(network.routers),
+        'links': len(links),
+        'pi': args.pi,
+        'wire_format': args.wire_format,
+        'hello_interval': args.hello_interval,
+        'seed': args.seed,
+        'startup': startup,
+        'del': reconvergence,
+        'peak_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }
+
+'''
+    Identifica versao do codigo medido (revisao do git, quando disponivel).
+'''
+def get_revision() -> str:
+    try:
+        cwd = os.path.dirname(os.path.abspath(__file__))
+        revision = subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=cwd, stderr=subprocess.DEVNULL).decode().strip()
+        is_dirty = subprocess.check_output(['git', 'status', '--porcelain', '--', '.'], cwd=cwd, stderr=subprocess.DEVNULL).strip()
+        return revision + ('-dirty' if is_dirty else '')
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+'''
+    Executa todos os cenarios (01 processo por cenario) & emite resultados em JSON (01 linha por cenario).
+    Retorna a qtd de cenarios com falha.
+'''
+def run_benchmark(args: object, argv: list) -> int:
+
+    output = open(args.output, 'w') if args.output else sys.stdout
+    metadata = {
+        'revision': get_revision(),
+        'python': platform.python_version(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+
+    failures = 0
+
+    try:
+        for topology in args.topologies:
+            for size in args.sizes:
+
+                command = [sys.executable, os.path.abspath(__file__), ARG_NAME_SCENARIO, topology + ':' + str(size)] + argv[1:]
+                completed = subprocess.run(command, stdout=subprocess.PIPE)
+
+                if (completed.returncode != 0):
+                    result = {'topology': topology, 'size': size, 'error': 'exit code ' + str(completed.returncode)}
+                else:
+                    result = json.loads(completed.stdout.decode())
+
+                result.update(metadata)
+                output.write(json.dumps(result) + '\n')
+                output.flush()
+
+                failures += 1 if get_failure(result) else 0
+                if (output is not sys.stdout):
+                    print_summary(result)
+    finally:
+        if (output is not sys.stdout):
+            output.close()
+
+    return failures
+
+'''
+    Retorna motivo da falha de 01 cenario (vazio quando bem sucedido): Processo do cenario falhou OU restaram tabelas erradas apos alguma fase.
+'''
+def get_failure(result: dict) -> str:
+
+    if (result.get('error')):
+        return result['error']
+
+    wrong_tables = [phase + ' ' + str(result[phase]['wrong_tables']) for phase in ['startup', 'del'] if result[phase].get('wrong_tables')]
+    return 'wrong tables: ' + ', '.join(wrong_tables) if wrong_tables else ''
+
+'''
+    Exibe resumo legivel de 01 cenario (quando resultados vao para arquivo).
+'''
+def print_summary(result: dict) -> None:
+
+    failure = get_failure(result)
+    if (result.get('error')):
+        return print(result['topology'] + ':' + str(result['size']) + ' FAILED (' + failure + ')')
+
+    print(
+        '{topology}:{size} startup {s[convergence_time]:.2f}s {s[msgs]} msgs {s[bytes]} B {s[cpu_per_period_ms]:.1f} ms/period'
+        ' | del {d[convergence_time]:.2f}s {d[msgs]} msgs {d[bytes]} B | rss {rss} kB'.format(
+            topology=result['topology'], size=result['size'], s=result['startup'], d=result['del'], rss=result['peak_rss_kb']
+        )
+        + (' | FAILED (' + failure + ')' if failure else '')
+    )
+
+'''
+=================================================================
+-- Comparar resultados ------------------------------------------
+=================================================================
+'''
+
+'''
+    Le arquivo de resultados & indexa cenarios por (topologia, tamanho).
+'''
+def load_results(path: str) -> dict:
+
+    results = {}
+    with open(path) as results_file:
+        for line in results_file:
+            if (line.strip()):
+                result = json.loads(line)
+                results[(result['topology'], result['size'])] = result
+
+    return results
+
+'''
+    Retorna valor de 01 metrica (nome com '.' para metricas de fase).
+'''
+def get_metric(result: dict, metric: str) -> typing.Union[int, float, None]:
+    value = result
+    for key in metric.split('.'):
+        value = value.get(key) if isinstance(value, dict) else None
+    return value
+
+'''
+    Compara 02 arquivos de resultados & aponta metricas que pioraram alem do limite.
+    Retorna quantidade de regressoes encontradas.
+'''
+def compare_results(path_baseline: str, path_current: str) -> int:
+
+    baseline = load_results(path_baseline)
+    current = load_results(path_current)
+    regressions = 0
+
+    for key in sorted(set(baseline.keys()) & set(current.keys())):
+        for metric in COMPARED_METRICS:
+
+            old = get_metric(baseline[key], metric)
+            new = get_metric(current[key], metric)
+            if (not isinstance(old, (int, float)) or not isinstance(new, (int, float))):
+                continue
+
+            change = (new - old) / old if old else (1.0 if new else 0.0)
+            if (abs(change) < REGRESSION_THRESHOLD):
+                continue
+
+            label = 'REGRESSION' if change > 0 else 'improvement'
+            regressions += 1 if change > 0 else 0
+            print('{0:<11} {1}:{2} {3}: {4} -> {5} ({6:+.1f}%)'.format(label, key[0], key[1], metric, old, new, change * 100))
+
+    return regressions
+
+'''
+=================================================================
+-- Medir custo de tratamento de msgs ----------------------------
+=================================================================
+'''
+
+'''
+    Gera 'count' updates de 01 vizinho com 'entries' destinos cada, serializados no formato indicado:
+    - Com 'is_fresh', cada update anuncia destinos ainda nao vistos; Do contrario, todos anunciam os mesmos destinos;
+    - Pesos variam entre updates (rotas mudam a cada msg);
+'''
+def generate_update_msgs(addr_src: str, addr_dest: str, entries: int, count: int, wire_format: str, rng: random.Random, is_fresh: bool) -> list:
+
+    router = simulator.router
+    raw_msgs = []
+
+    for i in range(count):
+        offset = 1000 + (i * entries if is_fresh else 0)
+        msg = {
+            'type': router.MSG_TYPE_UPDATE,
+            'source': addr_src,
+            'destination': addr_dest,
+            'seq': i,
+            'full': True, # Updates completos: Aceitos independente da sequencia
+            'distances': { get_router_addr(offset + j): rng.randint(1, MAX_WEIGHT) for j in range(entries) },
+        }
+        raw_msgs.append(router.encode_msg_binary(msg) if wire_format == router.WIRE_FORMAT_BINARY else json.dumps(msg).encode())
+
+    return raw_msgs
+
+'''
+    Mede o custo medio (us) de 01 funcao aplicada a cada msg de 01 lista.
+'''
+def measure_per_msg(handler: typing.Callable, raw_msgs: list) -> float:
+    start = time.perf_counter()
+    for raw_msg in raw_msgs:
+        handler(raw_msg)
+    return (time.perf_counter() - start) / len(raw_msgs) * 1e6
+
+'''
+    Mede o custo por msg do tratamento de updates grandes por 01 roteador (sem rede: Msgs entregues direto ao handler):
+    - decode_us / decode_fresh_us: Desserializacao + validacao (destinos repetidos / destinos nunca vistos);
+    - handle_us: Tratamento completo (handle_msg: Desserializacao + validacao + atualizacao das tabelas), com rotas mudando a cada msg;
+    - handle_steady_us: Tratamento completo de updates periodicos sem alteracoes (regime permanente);
+'''
+def run_handle_msg_benchmark(entries: int, args: object) -> dict:
+
+    router = simulator.router
+    saved_log_level, router.LOG_LEVEL = router.LOG_LEVEL, router.LOG_LEVEL_OFF # Silencia logs do roteador (nivel anterior eh restaurado ao final)
+    try:
+        rng = random.Random(args.seed)
+
+        addr_router = get_router_addr(0)
+        addr_neighbor = get_router_addr(1)
+        node = router.Router(addr_router, args.pi, args.wire_format, args.mtu, transport=router.NullTransport(), multipath=args.multipath)
+        node.add_neighbor(addr_neighbor, 1)
+
+        count = max(10, HANDLE_MSG_ENTRIES_PER_RUN // entries)
+        raw_msgs = generate_update_msgs(addr_neighbor, addr_router, entries, count, args.wire_format, rng, False)
+        raw_msgs_fresh = generate_update_msgs(addr_neighbor, addr_router, entries, count, args.wire_format, rng, True)
+
+        node.handle_msg(raw_msgs[0]) # Aquecimento: Rotas dos destinos repetidos ja existem nas medicoes
+        return {
+            'benchmark': 'handle_msg',
+            'wire_format': args.wire_format,
+            'entries': entries,
+            'msgs': count,
+            'bytes_per_msg': sum(len(raw_msg) for raw_msg in raw_msgs) // count,
+            'decode_us': round(measure_per_msg(router.decode_msg, raw_msgs), 1),
+            'decode_fresh_us': round(measure_per_msg(router.decode_msg, raw_msgs_fresh), 1),
+            'handle_us': round(measure_per_msg(node.handle_msg, raw_msgs), 1),
+            'handle_steady_us': round(measure_per_msg(node.handle_msg, raw_msgs[-1:] * count), 1),
+        }
+    finally:
+        router.LOG_LEVEL = saved_log_level
+
+'''
+    Transporte que apenas contabiliza datagramas enviados (sem rede).
+'''
+class CountingTransport(simulator.router.Transport):
+
+    def __init__(self) -> None:
+        self.msgs = 0
+        self.bytes = 0
+
+    def sendto(self, raw_msg: bytes, sock_addr: tuple) -> None:
+        self.msgs += 1
+        self.bytes += len(raw_msg)
+
+'''
+    Mede o custo de 01 rodada de updates completos de 01 hub com 'spokes' vizinhos (sem rede: Datagramas apenas contabilizados):
+    - Cada spoke anuncia 01 destino proprio: Tabela do hub tem 2 * spokes destinos;
+    - O vetor compartilhado eh descartado antes de cada rodada (custo inclui montar o vetor do snapshot);
+    - round_ms: Mediana do tempo de 01 rodada; msgs / bytes: Datagramas enviados por rodada;
+'''
+def run_update_round_benchmark(spokes: int, args: object) -> dict:
+
+    router = simulator.router
+    saved_log_level, router.LOG_LEVEL = router.LOG_LEVEL, router.LOG_LEVEL_OFF # Silencia logs do roteador (nivel anterior eh restaurado ao final)
+    try:
+        transport = CountingTransport()
+        node = router.Router(get_router_addr(0), args.pi, args.wire_format, args.mtu, transport=transport, multipath=args.multipath)
+        addrs = [get_router_addr(i) for i in range(1, spokes + 1)]
+        node.add_neighbors([(addr, 1) for addr in addrs])
+        for addr in addrs:
+            node.get_neighbor_state(addr).binary = True # Spokes anunciam suporte ao formato binario
+        node.apply_updates({addr: {get_router_addr(spokes + i + 1): 1} for i, addr in enumerate(addrs)}, node.clock())
+
+        times = []
+        for _ in range(UPDATE_ROUNDS):
+            transport.msgs = transport.bytes = 0
+            node.update_vector = None
+            start = time.perf_counter()
+            node.send_updates(True)
+            times.append(time.perf_counter() - start)
+
+        return {
+            'benchmark': 'update_round',
+            'wire_format': args.wire_format,
+            'mtu': args.mtu,
+            'spokes': spokes,
+            'round_ms': round(sorted(times)[len(times) // 2] * 1e3, 2),
+            'msgs': transport.msgs,
+            'bytes': transport.bytes,
+        }
+    finally:
+        router.LOG_LEVEL = saved_log_level
+
+'''
+=================================================================
+-- Medir encaminhamento -----------------------------------------
+=================================================================
+'''
+
+'''
+    Mede taxa de encaminhamento de pacotes de dados numa cadeia de 'size' roteadores (no simulador, apos convergir):
+    - 'packets' pacotes saem da 1a ponta para a outra (cada 01 cruza size - 1 enlaces);
+    - packets_per_s: Pacotes entregues de ponta a ponta por segundo (tempo real); hops_per_s: Datagramas tratados por segundo;
+    - Updates periodicos que vencem durante a medicao tambem sao processados (& contados no tempo);
+'''
+def run_forward_benchmark(size: int, args: object) -> dict:
+
+    network = simulator.Network(args.pi, args.seed, args.wire_format, args.mtu, args.multipath)
+    try:
+        addrs = [get_router_addr(i) for i in range(size)]
+        for addr_a, addr_b in zip(addrs, addrs[1:]):
+            network.add_link(addr_a, addr_b, 1, args.delay)
+
+        is_converged = network.run_until_converged(args.max_time)
+
+        # Conta pacotes entregues na ultima ponta
+        delivered = [0]
+        node_last = network.routers[addrs[-1]]
+        handle_msg_data = node_last.handle_msg_data
+        def on_data(msg: dict) -> None:
+            if (msg.get('destination') == addrs[-1]):
+                delivered[0] += 1
+            handle_msg_data(msg)
+        node_last.handle_msg_data = on_data
+
+        node_first = network.routers[addrs[0]]
+        msgs_start = network.msgs
+        start = time.perf_counter()
+
+        for i in range(args.packets):
+            node_first.send_data(addrs[-1], 'packet ' + str(i))
+        network.clock.run_until(network.clock.now + size * args.delay + network.pi / 10)
+
+        elapsed = time.perf_counter() - start
+        return {
+            'benchmark': 'forward',
+            'wire_format': args.wire_format,
+            'multipath': args.multipath,
+            'size': size,
+            'converged': is_converged,
+            'packets': args.packets,
+            'delivered': delivered[0],
+            'datagrams': network.msgs - msgs_start,
+            'wall_time': round(elapsed, 6),
+            'packets_per_s': round(delivered[0] / elapsed),
+            'hops_per_s': round(delivered[0] * (size - 1) / elapsed),
+        }
+    finally:
+        network.close()
+
+'''
+=================================================================
+-- Medir rastreamentos ------------------------------------------
+=================================================================
+'''
+
+'''
+    Conta datagramas gerados por 01 rastreamento (no simulador, apos convergir), por tipo de msg (trace / resposta).
+'''
+def count_trace_msgs(network: simulator.Network, addr_src: str, addr_target: str, is_flood: bool, args: object) -> dict:
+
+    router = simulator.router
+    counts = collections.Counter()
+
+    send = network.send
+    def on_send(addr_from: str, addr_to: str, raw_msg: bytes) -> None:
+        counts[router.decode_msg(raw_msg).get('type')] += 1
+        send(addr_from, addr_to, raw_msg)
+    network.send = on_send
+
+    try:
+        network.routers[addr_src].trace(addr_target, is_flood)
+        network.clock.run_until(network.clock.now + 2 * router.TRACE_TTL * args.delay + network.pi / 10)
+    finally:
+        network.send = send
+
+    return {'trace_msgs': counts[router.MSG_TYPE_TRACE], 'reply_msgs': counts[router.MSG_TYPE_DATA]}
+
+'''
+    Mede datagramas gerados por 01 rastreamento do 1o roteador ate o roteador do meio da topologia, nos modos direcionado & inundacao.
+'''
+def run_trace_benchmark(topology: str, size: int, args: object) -> dict:
+
+    links = generate_topology(topology, size, args.seed)
+    network = simulator.Network(args.pi, args.seed, args.wire_format, args.mtu, args.multipath)
+    try:
+        for a, b, weight in links:
+            network.add_link(get_router_addr(a), get_router_addr(b), weight, args.delay)
+
+        is_converged = network.run_until_converged(args.max_time)
+        addr_src, addr_target = get_router_addr(0), get_router_addr(size // 2)
+
+        return {
+            'benchmark': 'trace',
+            'topology': topology,
+            'size': len(network.routers),
+            'links': len(links),
+            'wire_format': args.wire_format,
+            'converged': is_converged,
+            'directed': count_trace_msgs(network, addr_src, addr_target, False, args),
+            'flood': count_trace_msgs(network, addr_src, addr_target, True, args),
+        }
+    finally:
+        network.close()
+
+'''
+=================================================================
+-- Medir rajadas de updates -------------------------------------
+=================================================================
+'''
+
+'''
+    Envia as rajadas ao hub (executado em processo proprio: Envio nao disputa o GIL com as threads do hub):
+    - Em cada rodada, cada spoke envia 01 update; Rodadas separadas por 'pause' segundos;
+'''
+def send_burst(rounds: list, sock_addr: tuple, pause: float) -> None:
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        for raw_msgs in rounds:
+            for raw_msg in raw_msgs:
+                sock.sendto(raw_msg, sock_addr)
+            time.sleep(pause)
+    finally:
+        sock.close()
+
+'''
+    Mede perdas de 01 hub real (socket UDP no loopback + engine de threads) sob rajadas de updates completos de 'spokes' vizinhos:
+    - sent: Datagramas enviados; received: Lidos do socket; lost_in_socket: Descartados pelo kernel (buffer do socket cheio);
+    - dropped: Descartados pela fila de recebimento do hub; handled: Processados;
+    - drop_rate: Fracao dos datagramas enviados que nao foi processada;
+'''
+def run_burst_benchmark(spokes: int, args: object) -> dict:
+
+    router = simulator.router
+    saved_log_level, router.LOG_LEVEL = router.LOG_LEVEL, router.LOG_LEVEL_OFF # Silencia logs do roteador (nivel anterior eh restaurado ao final)
+    try:
+        rng = random.Random(args.seed)
+
+        addrs = [get_router_addr(i) for i in range(1, spokes + 1)]
+        node = router.Router(BURST_HUB_ADDR, args.pi, args.wire_format, args.mtu, socket_buffer=args.socket_buffer, multipath=args.multipath)
+        for addr in addrs:
+            node.add_neighbor(addr, 1)
+
+        msgs_by_spoke = [generate_update_msgs(addr, BURST_HUB_ADDR, BURST_ENTRIES, args.rounds, args.wire_format, rng, False) for addr in addrs]
+        rounds = [list(raw_msgs) for raw_msgs in zip(*msgs_by_spoke)]
+        sent = spokes * args.rounds
+
+        node.start()
+        try:
+            start = time.perf_counter()
+            sender = multiprocessing.Process(target=send_burst, args=(rounds, (BURST_HUB_ADDR, router.PORT), args.pause))
+            sender.start()
+            sender.join()
+
+            # Aguarda o hub processar tudo o que leu (& o socket parar de entregar datagramas)
+            deadline = time.perf_counter() + BURST_DRAIN_TIMEOUT
+            received = -1
+            while (time.perf_counter() < deadline and (received != node.recv_queued + node.recv_dropped or node.recv_handled < node.recv_queued)):
+                received = node.recv_queued + node.recv_dropped
+                time.sleep(.05)
+            elapsed = time.perf_counter() - start
+        finally:
+            node.stop()
+
+        received = node.recv_queued + node.recv_dropped
+        return {
+            'benchmark': 'burst',
+            'wire_format': args.wire_format,
+            'spokes': spokes,
+            'rounds': args.rounds,
+            'pause': args.pause,
+            'socket_buffer': args.socket_buffer,
+            'bytes_per_msg': sum(len(raw_msg) for raw_msg in rounds[0]) // spokes,
+            'sent': sent,
+            'received': received,
+            'lost_in_socket': sent - received,
+            'dropped': node.recv_dropped,
+            'handled': node.recv_handled,
+            'drop_rate': round(1 - node.recv_handled / sent, 4),
+            'wall_time': round(elapsed, 6),
+        }
+    finally:
+        router.LOG_LEVEL = saved_log_level
+
+'''
+=================================================================
+-- Loop principal -----------------------------------------------
+=================================================================
+'''
+
+'''
+    Extrai argumentos de linha de comando do benchmark.
+'''
+def get_cli_params(argv: list) -> object:
+
+    class parsed_args: pass
+    argv = list(argv)
+    router = simulator.router
+
+    parsed_args.scenario = router.pop_cli_option(argv, ARG_NAME_SCENARIO, '')
+    parsed_args.output = router.pop_cli_option(argv, ARG_NAME_OUTPUT, '')
+    parsed_args.topologies = router.pop_cli_option(argv, ARG_NAME_TOPOLOGIES, ','.join(TOPOLOGY_LIST)).split(',')
+    parsed_args.wire_format = router.pop_cli_option(argv, router.ARG_NAME_WIRE_FORMAT, router.WIRE_FORMAT_JSON)
+    parsed_args.handle_msg = router.pop_cli_option(argv, ARG_NAME_HANDLE_MSG, '')
+    parsed_args.update_round = router.pop_cli_option(argv, ARG_NAME_UPDATE_ROUND, '')
+    parsed_args.forward = router.pop_cli_option(argv, ARG_NAME_FORWARD, '')
+    parsed_args.trace = router.pop_cli_option(argv, ARG_NAME_TRACE, '')
+    parsed_args.burst = router.pop_cli_option(argv, ARG_NAME_BURST, '')
+    parsed_args.multipath = router.pop_cli_option(argv, router.ARG_NAME_MULTIPATH, router.MULTIPATH_ECMP)
+    parsed_args.update_schedule = router.pop_cli_option(argv, router.ARG_NAME_UPDATE_SCHEDULE, router.UPDATE_SCHEDULE_FIXED)
+
+    try:
+        parsed_args.sizes = [int(size) for size in router.pop_cli_option(argv, ARG_NAME_SIZES, DEFAULT_SIZES).split(',')]
+        parsed_args.pi = float(router.pop_cli_option(argv, simulator.ARG_NAME_PI, str(simulator.DEFAULT_PI)))
+        parsed_args.delay = float(router.pop_cli_option(argv, simulator.ARG_NAME_DELAY, str(simulator.DEFAULT_DELAY)))
+        parsed_args.seed = int(router.pop_cli_option(argv, simulator.ARG_NAME_SEED, '0'))
+        parsed_args.max_time = float(router.pop_cli_option(argv, simulator.ARG_NAME_MAX_TIME, str(simulator.DEFAULT_MAX_TIME)))
+        parsed_args.mtu = int(router.pop_cli_option(argv, router.ARG_NAME_MTU, str(router.MTU)))
+        parsed_args.hello_interval = float(router.pop_cli_option(argv, router.ARG_NAME_HELLO_INTERVAL, '0')) or None
+        parsed_args.handle_msg = [int(entries) for entries in parsed_args.handle_msg.split(',')] if parsed_args.handle_msg else []
+        parsed_args.update_round = [int(spokes) for spokes in parsed_args.update_round.split(',')] if parsed_args.update_round else []
+        parsed_args.forward = [int(size) for size in parsed_args.forward.split(',')] if parsed_args.forward else []
+        parsed_args.packets = int(router.pop_cli_option(argv, ARG_NAME_PACKETS, str(FORWARD_PACKETS)))
+        parsed_args.trace = [int(size) for size in parsed_args.trace.split(',')] if parsed_args.trace else []
+        parsed_args.burst = [int(spokes) for spokes in parsed_args.burst.split(',')] if parsed_args.burst else []
+        parsed_args.rounds = int(router.pop_cli_option(argv, ARG_NAME_ROUNDS, str(BURST_ROUNDS)))
+        parsed_args.pause = float(router.pop_cli_option(argv, ARG_NAME_PAUSE, str(BURST_PAUSE)))
+        parsed_args.socket_buffer = int(router.pop_cli_option(argv, router.ARG_NAME_SOCKET_BUFFER, '0')) or None
+    except ValueError:
+        raise IOError('Invalid numeric argument')
+
+    if (len(argv) > 1):
+        raise IOError('Invalid argument: ' + argv[1])
+
+    for topology in parsed_args.topologies:
+        if (not topology in TOPOLOGY_LIST):
+            raise IOError('Invalid topology "' + topology + '" (valid options: ' + ', '.join(TOPOLOGY_LIST) + ')')
+    if (not parsed_args.wire_format in router.WIRE_FORMAT_LIST):
+        raise IOError('Invalid wire format "' + parsed_args.wire_format + '"')
+    if (not parsed_args.multipath in router.MULTIPATH_LIST):
+        raise IOError('Invalid multipath mode "' + parsed_args.multipath + '"')
+    if (not parsed_args.update_schedule in router.UPDATE_SCHEDULE_LIST):
+        raise IOError('Invalid update schedule "' + parsed_args.update_schedule + '"')
+    if (min(parsed_args.sizes) < 2 or parsed_args.pi <= 0 or parsed_args.delay < 0):
+        raise IOError('Arguments must satisfy: sizes >= 2, pi > 0, delay >= 0')
+    if (parsed_args.handle_msg and min(parsed_args.handle_msg) < 1):
+        raise IOError('Argument ' + ARG_NAME_HANDLE_MSG + ' must list positive entry counts')
+    if (parsed_args.update_round and min(parsed_args.update_round) < 1):
+        raise IOError('Argument ' + ARG_NAME_UPDATE_ROUND + ' must list positive spoke counts')
+    if (parsed_args.forward and min(parsed_args.forward) < 2):
+        raise IOError('Argument ' + ARG_NAME_FORWARD + ' must list chain sizes >= 2')
+    if (parsed_args.packets < 1):
+        raise IOError('Argument ' + ARG_NAME_PACKETS + ' must be positive')
+    if (parsed_args.trace and min(parsed_args.trace) < 2):
+        raise IOError('Argument ' + ARG_NAME_TRACE + ' must list sizes >= 2')
+    if (parsed_args.burst and min(parsed_args.burst) < 1):
+        raise IOError('Argument ' + ARG_NAME_BURST + ' must list positive spoke counts')
+    if (parsed_args.rounds < 1 or parsed_args.pause < 0 or (parsed_args.socket_buffer or 0) < 0):
+        raise IOError('Arguments must satisfy: rounds >= 1, pause >= 0, socket buffer >= 0')
+
+    return parsed_args
+
+'''
+    Executa benchmark a partir da linha de comando.
+'''
+def main() -> None:
+
+    argv = list(sys.argv)
+
+    if (len(argv) == 4 and argv[1] == ARG_NAME_COMPARE):
+        sys.exit(1 if compare_results(argv[2], argv[3]) else 0)
+
+    # Argumentos repassados aos processos de cenario (sem --output)
+    forwarded_argv = list(argv)
+    if (ARG_NAME_OUTPUT in forwarded_argv):
+        i = forwarded_argv.index(ARG_NAME_OUTPUT)
+        del forwarded_argv[i:i + 2]
+
+    try:
+        args = get_cli_params(argv)
+    except IOError as error:
+        print(error, file=sys.stderr)
+        print(USAGE, file=sys.stderr)
+        sys.exit(1)
+
+    if (args.scenario):
+        topology, size = args.scenario.split(':')
+        print(json.dumps(run_scenario(topology, int(size), args)))
+        return
+
+    if (args.handle_msg or args.update_round or args.forward or args.trace or args.burst):
+        output = open(args.output, 'w') if args.output else sys.stdout
+        for entries in args.handle_msg:
+            output.write(json.dumps(run_handle_msg_benchmark(entries, args)) + '\n')
+            output.flush()
+        for spokes in args.update_round:
+            output.write(json.dumps(run_update_round_benchmark(spokes, args)) + '\n')
+            output.flush()
+        for size in args.forward:
+            output.write(json.dumps(run_forward_benchmark(size, args)) + '\n')
+            output.flush()
+        for topology in (args.topologies if args.trace else []):
+            for size in args.trace:
+                output.write(json.dumps(run_trace_benchmark(topology, size, args)) + '\n')
+                output.flush()
+        for spokes in args.burst:
+            output.write(json.dumps(run_burst_benchmark(spokes, args)) + '\n')
+            output.flush()
+        if (output is not sys.stdout):
+            output.close()
+        return
+
+    # Cenarios com falha (processo OU tabelas erradas) tornam o benchmark mal sucedido
+    sys.exit(1 if run_benchmark(args, forwarded_argv) else 0)
+
+if (__name__ == "__main__"):
+    main()
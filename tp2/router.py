@@ -1,14 +1,25 @@
+import os
 import sys
+import stat
 import json
 import time
+import zlib
+import bisect
+import random
+import heapq
 import socket
+import struct
 import typing
+import itertools
+import collections
 import math
+import atexit
+import asyncio
+import http.server
+import socketserver
+import signal
 
-from threading import Thread
-
-if __name__ != "__main__":
-    sys.exit()
+from threading import Thread, Event, Lock, RLock, current_thread, main_thread, enumerate as enumerate_threads
 
 '''
 =================================================================
@@ -17,8 +28,33 @@ if __name__ != "__main__":
 '''
 
 PORT = 55151
-BUF_SIZE = 1024
+BUF_SIZE = 65536 # Tamanho padrao do buffer de recebimento
+MAX_BUF_SIZE = 65536
+RECV_BATCH_SIZE = 256 # Qtd maxima de datagramas lidos do socket de uma vez
+RECV_QUEUE_SIZE = 8192 # Qtd maxima de datagramas recebidos aguardando processamento (engine de threads)
+RECV_DONTWAIT = getattr(socket, 'MSG_DONTWAIT', 0) # Leitura nao bloqueante pontual (indisponivel em algumas plataformas)
+MTU = 1024 # Tamanho maximo padrao de datagramas de update (cabe no buffer de roteadores que leem apenas 1024 bytes)
+MIN_MTU = 256
+MAX_MTU = 65507 # Maior payload UDP possivel
+UPDATE_HEADER_RESERVED_JSON = 192 # Bytes reservados para campos de cabecalho de updates JSON
+UPDATE_HEADER_RESERVED_BIN = 64 # Bytes reservados para campos de cabecalho de updates binarios
 MAX_PERIODS = 4
+FULL_UPDATE_PERIODS = MAX_PERIODS - 1 # Updates completos a cada N periodos (entre eles, apenas deltas)
+TRIGGERED_UPDATE_MIN_INTERVAL = .5 # Intervalo minimo (segundos) entre updates disparados por mudancas (retiradas de rotas sao imediatas)
+ROUTE_INFINITY = 0xFFFF # Peso 'infinito': Destino inalcancavel (pesos a partir dele equivalem a retirada da rota)
+HOLD_DOWN_PERIODS = 2 # Prazo maximo (em periodos) de quarentena de 01 destino cuja melhor rota caiu / piorou sem alternativa livre de loops
+MULTIPATH_VARIANCE = 1.5 # Modo ponderado: Rotas com peso ate N x o da melhor tambem sao usadas (se livres de loops)
+MAX_PATHS = 8 # Qtd maxima de proximos saltos por destino (multicaminho)
+FLOW_HASH_SPACE = 1 << 32 # Faixa de valores do hash de fluxo (crc32)
+TRACE_TTL = 32 # Qtd maxima de saltos de 01 msg de rastreamento
+TRACE_SEEN_CACHE_SIZE = 1024 # Qtd maxima de rastreamentos (por inundacao) lembrados para descarte de copias duplicadas
+UPDATE_JITTER = .2 # Intervalo entre updates periodicos a 01 vizinho sorteado entre (1 - J) x pi & pi: Roteadores nao ficam sincronizados
+ADAPTIVE_FULL_PERIODS_MIN = 1 # Modo adaptativo: Updates completos a cada N updates periodicos enquanto a tabela muda...
+ADAPTIVE_FULL_PERIODS_MAX = 12 # ...& a cada ate N enquanto esta estavel (keepalives seguem a cada pi: Vizinhos mantem as rotas)
+ADAPTIVE_FULL_PERIODS_STEP = 1.5 # Modo adaptativo: Fator de alongamento por periodo estavel (mudancas reduzem o intervalo pela metade)
+HELLO_DETECT_MULTIPLIER = 3 # Vizinho eh dado como inativo apos N intervalos de hello (dele) sem receber nenhum hello
+HELLO_JITTER = .25 # Intervalo entre hellos sorteado entre (1 - J) x intervalo & intervalo
+STATE_SAVE_PERIODS = 2 # Arquivo de estado (reinicio a quente) sem alteracoes na tabela eh regravado a cada N periodos (< MAX_PERIODS: idades gravadas nao expiram rotas vivas)
 INPUT_CLI_MSG = '\nEnter command: '
 
 LOG_LEVEL_DEBUG = 1
@@ -26,20 +62,90 @@ LOG_LEVEL_INFO = 2
 LOG_LEVEL_HINT = 3
 LOG_LEVEL_WARN = 4
 LOG_LEVEL_ERROR = 5
-LOG_LEVEL = LOG_LEVEL_DEBUG # Para desbilitar: Setar como 0
+LOG_LEVEL_OFF = 6
+LOG_LEVEL = LOG_LEVEL_DEBUG # Para desbilitar: Setar como LOG_LEVEL_OFF
+LOG_LEVEL_NAMES = { LOG_LEVEL_DEBUG: 'debug', LOG_LEVEL_INFO: 'info', LOG_LEVEL_HINT: 'hint', LOG_LEVEL_WARN: 'warn', LOG_LEVEL_ERROR: 'error', LOG_LEVEL_OFF: 'off' }
+STATS_LATENCY_BUCKETS = (.00001, .00005, .0001, .0005, .001, .005, .01, .05, .1, .5, 1.0) # Limites (segundos) dos histogramas de latencia
+STATS_HTTP_HOST = '127.0.0.1' # Endpoint HTTP de estatisticas atende apenas conexoes locais
+LOG_QUEUE_SIZE = 8192 # Qtd maxima de registros de log aguardando a thread de escrita (excedentes sao descartados & contados)
+PROFILE_SAMPLE_INTERVAL = .01 # Intervalo (segundos) entre amostras das pilhas de todas as threads (profiler por amostragem)
+PROFILE_TOP_FUNCTIONS = 25 # Qtd de funcoes listadas por thread no relatorio do profiler
 
 MSG_TYPE_DATA = 'data'
 MSG_TYPE_UPDATE = 'update'
 MSG_TYPE_TRACE = 'trace'
+MSG_TYPE_RESYNC = 'resync'
+MSG_TYPE_HELLO = 'hello'
+
+HOT_PATH_HANDLE_MSGS = 'handle_msgs'
+HOT_PATH_SEND_UPDATE = 'send_msg_update'
+HOT_PATH_SET_ROUTE = 'set_route'
+HOT_PATH_EXPIRY_SWEEP = 'expiry_sweep'
 
 ARG_NAME_ADDR = '--addr'
 ARG_NAME_PI = '--update-period'
 ARG_NAME_STARTUP = '--startup-commands'
+ARG_NAME_ENGINE = '--engine'
+ARG_NAME_WIRE_FORMAT = '--wire-format'
+ARG_NAME_MTU = '--mtu'
+ARG_NAME_RECV_BUFFER = '--recv-buffer'
+ARG_NAME_SOCKET_BUFFER = '--socket-buffer'
+ARG_NAME_MULTIPATH = '--multipath'
+ARG_NAME_VARIANCE = '--multipath-variance'
+ARG_NAME_TRACE_MODE = '--trace-mode'
+ARG_NAME_STATE_FILE = '--state-file'
+ARG_NAME_UPDATE_SCHEDULE = '--update-schedule'
+ARG_NAME_HELLO_INTERVAL = '--hello-interval'
+ARG_NAME_HELLO_MULTIPLIER = '--hello-multiplier'
+ARG_NAME_LOG_LEVEL = '--log-level'
+ARG_NAME_LOG_FILE = '--log-file'
+ARG_NAME_STATS_PORT = '--stats-port'
+ARG_NAME_STATS_SOCKET = '--stats-socket'
+ARG_NAME_PROFILE = '--profile'
+
+ENGINE_THREADS = 'threads'
+ENGINE_ASYNCIO = 'asyncio'
+ENGINE_LIST = [ENGINE_THREADS, ENGINE_ASYNCIO]
+
+WIRE_FORMAT_JSON = 'json'
+WIRE_FORMAT_BINARY = 'binary'
+WIRE_FORMAT_LIST = [WIRE_FORMAT_JSON, WIRE_FORMAT_BINARY]
+
+MULTIPATH_OFF = 'off'
+MULTIPATH_ECMP = 'ecmp' # Trafego dividido igualmente entre rotas empatadas com a melhor
+MULTIPATH_WEIGHTED = 'weighted' # Trafego dividido entre rotas quase tao boas quanto a melhor (parcela inversa ao peso)
+MULTIPATH_LIST = [MULTIPATH_OFF, MULTIPATH_ECMP, MULTIPATH_WEIGHTED]
+
+TRACE_MODE_DIRECTED = 'directed' # 01 unica msg segue a melhor rota ate o alvo (como msgs de dados)
+TRACE_MODE_FLOOD = 'flood' # Msg (com ID) enviada por todos os enlaces: Cada roteador a repassa 01 unica vez
+TRACE_MODE_LIST = [TRACE_MODE_DIRECTED, TRACE_MODE_FLOOD]
+
+UPDATE_SCHEDULE_FIXED = 'fixed' # Updates completos a cada FULL_UPDATE_PERIODS updates periodicos (keepalives entre eles)
+UPDATE_SCHEDULE_ADAPTIVE = 'adaptive' # Intervalo entre updates completos alonga enquanto a tabela esta estavel & encurta enquanto muda
+UPDATE_SCHEDULE_LIST = [UPDATE_SCHEDULE_FIXED, UPDATE_SCHEDULE_ADAPTIVE]
+
+BIN_MAGIC = 0xD5 # Primeiro byte de msgs binarias (msgs JSON sempre comecam com '{')
+BIN_HEADER = struct.Struct('!BBB') # magic + tipo + flags
+BIN_FLAG_IPV6 = 0x01
+BIN_FLAG_FULL = 0x02
+BIN_FLAG_SMALL_WEIGHTS = 0x04 # Todos os pesos cabem em 01 byte (varints de 01 byte)
+BIN_FLAG_TRACE_TTL = 0x08 # Trace com TTL (varint apos os saltos)
+BIN_FLAG_TRACE_ID = 0x10 # Trace com ID de inundacao (varint apos o TTL)
+BIN_TYPE_CODES = { MSG_TYPE_UPDATE: 1, MSG_TYPE_DATA: 2, MSG_TYPE_TRACE: 3, MSG_TYPE_HELLO: 4 }
+BIN_TYPE_NAMES = { code: name for name, code in BIN_TYPE_CODES.items() }
+BIN_MAGIC_BYTE = bytes((BIN_MAGIC,))
+STATE_MAGIC = b'DVRS' # Arquivo de estado: Assinatura + versao do formato
+STATE_VERSION = 1
+STATE_HEADER = struct.Struct('!4sBBHdII') # magic + versao + flags + reservado + instante da gravacao (epoch) + qtd vizinhos + qtd rotas
+STATE_CHECKSUM = struct.Struct('!I') # crc32 de todo o conteudo anterior
+BIN_ADDR_CACHE_SIZE = 65536 # Qtd maxima de enderecos empacotados <-> texto mantidos em cache
+VALID_ADDR_CACHE_SIZE = 65536 # Qtd maxima de enderecos IPv4 (texto) sabidamente validos mantidos em cache
 
 COMMAND_INIT = 'init'
 COMMAND_QUIT = 'quit'
 COMMAND_HELP = 'help'
 COMMAND_DEBUG_TABLE = 'table'
+COMMAND_STATS = 'stats'
 
 COMMAND_ADD = 'add'
 COMMAND_DEL = 'del'
@@ -49,884 +155,3908 @@ COMMAND_ROUTER_LIST = [COMMAND_ADD, COMMAND_DEL, COMMAND_TRACE]
 
 '''
 =================================================================
--- Variaveis globais --------------------------------------------
+-- Declarar estruturas de dados ---------------------------------
 =================================================================
 '''
 
-routing_table: dict = {}
-address: str = ''
-have_main_loop_started = False
-should_stop_threads = False
-
-
 '''
-=================================================================
--- Declarar funcoes genericas / auxiliares / utilitarias --------
-=================================================================
+    Registro de 01 rota para 01 destino: Vizinho que a informou + peso + instante em que foi ouvida pela ultima vez.
+    - Instante segue o relogio do roteador dono da tabela (atribuido por ele ao incluir / renovar a rota);
+    - 'tick' indica a posicao da rota na roda de expiracao (None quando a rota nao expira);
+    - 'due' indica a posicao em que a rota realmente vence (pode estar adiante de 'tick': ver 'RouteTimers');
 '''
+class Route:
 
-'''
-    Avalia & infomra se 01 nivel de emissao de log esta habilitado.
-'''
-def is_log_level_valid(level: int) -> bool:
-    return (
-        level in [LOG_LEVEL_DEBUG, LOG_LEVEL_INFO, LOG_LEVEL_HINT, LOG_LEVEL_WARN, LOG_LEVEL_ERROR]
-        and level>= LOG_LEVEL
-    )
+    __slots__ = ('addr_src', 'weight', 'last_heard', 'tick', 'due')
+
+    def __init__(self, addr_src: str, weight: int) -> None:
+        self.addr_src = addr_src
+        self.weight = weight
+        self.last_heard = 0.0
+        self.tick: typing.Union[int, None] = None
+        self.due: typing.Union[int, None] = None
+
+    def __repr__(self) -> str:
+        return '{addr_src: ' + self.addr_src + ', weight: ' + str(self.weight) + ', last_heard: ' + '{:.1f}'.format(self.last_heard) + '}'
 
 '''
-    Centraliza exibicao de mensagens de log.
+    Registro de 01 destino na tabela de roteamento:
+    - Rotas candidatas ficam indexadas pelo vizinho que as informou;
+    - Rotas candidatas tambem ficam num min-heap (por peso) com remocao preguicosa de entradas obsoletas;
+    - A melhor rota fica em cache & eh atualizada incrementalmente a cada inclusao / alteracao / remocao;
 '''
-def log(level: str, msg) -> None:
+class Destination:
 
-    if (not is_log_level_valid(level)):
-        return
+    __slots__ = ('is_neighbor', 'routes', 'heap', 'best')
 
-    if (level == LOG_LEVEL_DEBUG):
-        level_txt = 'debug'
-    elif (level == LOG_LEVEL_INFO):
-        level_txt = 'info'
-    elif (level == LOG_LEVEL_HINT):
-        level_txt = 'hint'
-    elif (level == LOG_LEVEL_WARN):
-        level_txt = 'warn'
-    elif (level == LOG_LEVEL_ERROR):
-        level_txt = 'error'
-
-    if (level == LOG_LEVEL_DEBUG):
-        print('')
-    
-    print('[' + level_txt  + ']', msg)
-
-    if (have_main_loop_started and not level in [LOG_LEVEL_HINT, LOG_LEVEL_ERROR]):
-        print(INPUT_CLI_MSG)
+    heap_counter = itertools.count()
 
+    def __init__(self, is_neighbor: bool) -> None:
+        self.is_neighbor = is_neighbor
+        self.routes: typing.Dict[str, Route] = {}
+        self.heap: list = []
+        self.best: typing.Union[Route, None] = None
 
-'''
-    TODO: 2021-08-08 - ADD Descricao
-'''
-def log_debug(msg) -> None:
-    log(LOG_LEVEL_DEBUG, msg)
+    def __repr__(self) -> str:
+        return '{is_neighbor: ' + str(self.is_neighbor) + ', best: ' + str(self.best) + ', routes: ' + str(list(self.routes.values())) + '}'
 
-'''
-    TODO: 2021-08-08 - ADD Descricao
-'''
-def log_hint(msg) -> None:
-    log(LOG_LEVEL_HINT, msg)
-    pass
+    '''
+        Informa se 01 entrada do heap ainda corresponde ao estado atual de sua rota.
+    '''
+    def is_heap_entry_valid(self, entry: tuple) -> bool:
+        route: Route = entry[2]
+        return self.routes.get(route.addr_src) is route and route.weight == entry[0]
 
-'''
-    TODO: 2021-08-08 - ADD Descricao
-'''
-def log_info(msg) -> None:
-    log(LOG_LEVEL_INFO, msg)
+    '''
+        Reconstroi o heap quando entradas obsoletas passam a dominar: Tamanho do heap fica limitado pela qtd de rotas.
+    '''
+    def compact_heap(self) -> None:
+        if (len(self.heap) > 2 * len(self.routes) + 8):
+            self.heap = [(route.weight, next(Destination.heap_counter), route) for route in self.routes.values()]
+            heapq.heapify(self.heap)
 
-'''
-    TODO: 2021-08-08 - ADD Descricao
-'''
-def log_warn(msg) -> None:
-    log(LOG_LEVEL_WARN, msg)
+    '''
+        Descarta entradas obsoletas do topo do heap & elege a melhor rota restante.
+    '''
+    def refresh_best(self) -> None:
 
-'''
-    TODO: 2021-08-08 - ADD Descricao
-'''
-def log_error(msg) -> None:
-    log(LOG_LEVEL_ERROR, msg)
+        self.compact_heap()
+        while (self.heap and not self.is_heap_entry_valid(self.heap[0])):
+            heapq.heappop(self.heap)
 
-'''
-    Avalia 01 string generica & retorna sua versao de IP caso represente 01 IP valido.
-'''
-def get_ip_version(addr: str) -> typing.Union[int, bool]:
-    try:
+        self.best = self.heap[0][2] if self.heap else None
 
-        # V4
-        try:
-            socket.inet_pton(socket.AF_INET, addr)
-            return 4
+    '''
+        Inclui OU atualiza 01 rota candidata.
+        Retorna se a melhor rota (ou seu peso) mudou.
+    '''
+    def set_route(self, addr_src: str, weight: int) -> bool:
 
-        # V6
-        except socket.error:
-            socket.inet_pton(socket.AF_INET6, addr)
-            return 6
+        route = self.routes.get(addr_src)
+
+        if (route):
+            if (route.weight == weight):
+                return False
+            route.weight = weight
+        else:
+            route = Route(addr_src, weight)
+            self.routes[addr_src] = route
+
+        heapq.heappush(self.heap, (weight, next(Destination.heap_counter), route))
+        self.compact_heap()
+
+        # Melhoria: Basta comparar com a melhor atual
+        if (not self.best or weight < self.best.weight):
+            self.best = route
+            return True
+
+        # Piora da melhor rota atual: Precisa reeleger
+        if (route is self.best):
+            self.refresh_best()
+            return True
 
-    except socket.error:
         return False
 
-'''
-    Valida string quanto a representar um endereco IP valido.
-'''
-def validate_ip(addr: str, version: int = 4) -> bool:
-    if (not version in [4, 6]):
-        raise ValueError('Invalid IP version for validation')
-    return version == get_ip_version(addr)
+    '''
+        Remove 01 rota candidata.
+        Retorna se a melhor rota mudou.
+    '''
+    def remove_route(self, addr_src: str) -> bool:
 
+        route = self.routes.pop(addr_src, None)
+        if (not route or route is not self.best):
+            self.compact_heap()
+            return False
 
-'''
-=================================================================
--- Declarar funcoes do dominio do problema ----------------------
-=================================================================
-'''
+        self.refresh_best()
+        return True
 
 '''
-    Exibe instrucoes de uso de comando: Inicializacao do programa
+    Roda de expiracao de rotas (timing wheel):
+    - Cada posicao agrupa rotas cujo prazo vence num mesmo intervalo de 'resolution' segundos;
+    - Renovar 01 rota apenas adia seu prazo (O(1)): A cada periodo, so as rotas da posicao atual sao visitadas (vencidas expiram, adiadas sao realocadas);
+    - Prazos nunca distam mais que 'size' posicoes do cursor: Posicoes nao colidem entre voltas da roda;
 '''
-def print_instructions_init() -> None:
-    print('Initialization command formats:')
-    print('\t- 01: "router.py <IP: string> <pi: float>"')
-    print('\t- 02: "router.py <IP: string> <pi: float> <startup_file: string>')
-    print('\t- 03: "router.py --addr <IP: string> --update-period <pi: float>')
-    print('\t- 04: "router.py --addr <IP: string> --update-period <pi: float> --startup-commands <startup_file: string>')
+class RouteTimers:
+
+    __slots__ = ('resolution', 'slots', 'cursor')
+
+    def __init__(self, resolution: float, size: int) -> None:
+        self.resolution = resolution
+        self.slots: typing.List[typing.Dict[Route, str]] = [{} for _ in range(size)]
+        self.cursor: typing.Union[int, None] = None
+
+    '''
+        Agenda (OU reagenda) a expiracao de 01 rota para 01 destino.
+    '''
+    def schedule(self, route: Route, addr_dest: str, deadline: float) -> None:
+
+        # Prazo adiado (renovacao da rota): Rota fica na posicao atual & eh realocada apenas quando ela for visitada
+        tick = math.ceil(deadline / self.resolution)
+        route.due = tick
+        if (route.tick != None and route.tick <= tick):
+            return
+
+        self.cancel(route)
+        self.slots[tick % len(self.slots)][route] = addr_dest
+        route.tick = tick
+
+    '''
+        Cancela expiracao agendada de 01 rota (se houver).
+    '''
+    def cancel(self, route: Route) -> None:
+        if (route.tick != None):
+            self.slots[route.tick % len(self.slots)].pop(route, None)
+            route.tick = None
+
+    '''
+        Retira da roda & retorna (destino, rota) de todas as rotas com prazo vencido ate 'now'.
+    '''
+    def pop_expired(self, now: float) -> list:
+
+        last_tick = math.floor(now / self.resolution)
+        first_tick = last_tick if self.cursor == None else self.cursor + 1
+        first_tick = max(first_tick, last_tick - len(self.slots) + 1)
+        self.cursor = last_tick
+
+        expired = []
+        for tick in range(first_tick, last_tick + 1):
+            slot = self.slots[tick % len(self.slots)]
+            if (not slot):
+                continue
+            for route, addr_dest in list(slot.items()):
+                if (route.tick > last_tick):
+                    continue
+                slot.pop(route)
+                if (route.due > last_tick):
+                    self.slots[route.due % len(self.slots)][route] = addr_dest
+                    route.tick = route.due
+                else:
+                    route.tick = None
+                    expired.append((addr_dest, route))
+
+        return expired
 
 '''
-    Exibe instrucoes de uso de comando: Adicao de roteaodr.
+    Estado da troca de updates com 01 vizinho:
+    - Numeros de sequencia enviados / recebidos (deteccao de deltas perdidos);
+    - Sinalizacao de que o proximo update deve ser completo (ressincronizacao);
+    - Instante do ultimo update recebido (vizinho ativo mantem validas as rotas informadas por ele);
+    - Inicio do ultimo update completo recebido (rotas ausentes dele deixam de ser mantidas);
+    - Qtd de updates periodicos enviados desde o ultimo completo & instante do ultimo update enviado (qualquer tipo);
 '''
-def print_instructions_add() -> None:
-    print(COMMAND_ADD + ' command format:')
-    print('\t' + COMMAND_ADD + ' <IP: string> <weight: int>"')
+class NeighborState:
+
+    __slots__ = ('seq_out', 'seq_in', 'needs_full', 'binary', 'last_heard', 'last_full_seq', 'full_round_start', 'periodic_count', 'last_sent')
+
+    def __init__(self) -> None:
+        self.seq_out = 0
+        self.seq_in: typing.Union[int, None] = None
+        self.needs_full = True
+        self.binary = False
+        self.last_heard: typing.Union[float, None] = None
+        self.last_full_seq: typing.Union[int, None] = None
+        self.full_round_start = 0.0
+        self.periodic_count = 0
+        self.last_sent: typing.Union[float, None] = None
 
 '''
-    Exibe instrucoes de uso de comando: Remocao de roteaodr.
+    Quarentena (hold-down) de 01 destino cuja melhor rota caiu OU piorou sem alternativa livre de loops:
+    - Destino passa a ser anunciado como inalcancavel & sai da tabela de encaminhamento;
+    - 'distance' eh o ultimo peso anunciado: Rota cuja distancia do vizinho seja menor que ele eh livre de loops & encerra a quarentena;
+    - 'waiting' guarda vizinhos que ainda nao responderam (updates que citam o destino): Quando todos respondem, a melhor rota restante eh confiavel;
+    - Destino que volta a quarentena logo apos sair dela ('is_damped') so sai por rota livre de loops OU pelo prazo (amortecimento de oscilacoes);
 '''
-def print_instructions_del() -> None:
-    print(COMMAND_DEL + ' command format:')
-    print('\t' + COMMAND_DEL + ' <IP: string>')
+class HoldDown:
+
+    __slots__ = ('deadline', 'distance', 'waiting', 'is_damped')
+
+    def __init__(self, deadline: float, distance: int, waiting: set, is_damped: bool) -> None:
+        self.deadline = deadline
+        self.distance = distance
+        self.waiting = waiting
+        self.is_damped = is_damped
 
 '''
-    Exibe instrucoes de uso de comando: Rastreamento de roteaodr.
+    Sessao de deteccao de atividade (hellos) com 01 vizinho:
+    - Comeca no primeiro hello recebido: Vizinhos que nao enviam hellos seguem dependendo apenas da expiracao das rotas;
+    - 'detect_time' eh o intervalo de hellos anunciado pelo vizinho x seu multiplicador (prazo sem hellos para da-lo como inativo);
+    - Vizinho inativo ('is_down') sai da tabela, mas segue recebendo hellos: Volta (com o peso guardado em 'weight') assim que responder;
 '''
-def print_instructions_trace() -> None:
-    print(COMMAND_TRACE + ' command format:')
-    print('\t' + COMMAND_TRACE + ' <IP: string>')
+class HelloSession:
+
+    __slots__ = ('last_heard', 'detect_time', 'is_down', 'weight')
+
+    def __init__(self, now: float, detect_time: float) -> None:
+        self.last_heard = now
+        self.detect_time = detect_time
+        self.is_down = False
+        self.weight: typing.Union[int, None] = None
 
 '''
-    Centraliza chamadas para exibicao de instrucoes de uso.
+    Versao imutavel da tabela de roteamento publicada para leitores (update, trace, exibicao da tabela):
+    - Mapeia destino -> (vizinho que informou a melhor rota, peso da melhor rota) + tupla de vizinhos;
+    - Nunca eh alterada apos publicada: Cada nova versao copia a anterior & aplica apenas os destinos alterados;
 '''
-def print_instructions(help_command: str) -> None:
+class TableSnapshot:
 
-    print('\nInstructions:')
+    __slots__ = ('version', 'entries', 'neighbors', 'links')
 
-    if (not help_command or help_command == COMMAND_INIT):
-        print_instructions_init()
-    if (not help_command or help_command == COMMAND_ADD):
-        print_instructions_add()
-    if (not help_command or help_command == COMMAND_DEL):
-        print_instructions_del()
-    if (not help_command or help_command == COMMAND_TRACE):
-        print_instructions_trace()
+    def __init__(self, version: int, entries: typing.Dict[str, tuple], neighbors: tuple, links: typing.Dict[str, int]) -> None:
+        self.version = version
+        self.entries = entries
+        self.neighbors = neighbors
+        self.links = links # Peso do enlace direto ate cada vizinho (independente da melhor rota ate ele)
 
-'''
-Valida & retorna parametros de linha de comando.
+    def __repr__(self) -> str:
+        return '{version: ' + str(self.version) + ', neighbors: ' + str(list(self.neighbors)) + ', entries: ' + str(self.entries) + '}'
 
 '''
-def get_cli_params() -> object:
+    Vetor de distancias de 01 rodada de updates (calculado 01 unica vez & compartilhado entre vizinhos):
+    - Melhor peso de cada destino + vizinho de quem a melhor rota foi aprendida (split horizon), lidos do snapshot da tabela;
+    - Updates incrementais consultam apenas os destinos alterados: Agrupamento so eh feito quando ha update completo;
+    - Destinos sao agrupados pelo conjunto de vizinhos de cuja visao devem ser excluidos (01 grupo comum + 01 grupo por exclusao);
+    - Cada grupo eh serializado 01 unica vez por peso de enlace: A visao de 01 vizinho eh a juncao dos grupos que nao o excluem;
+'''
+class UpdateVector:
 
-    # Detecta formato do comando de incializacao de acordo com a quantidade de argumentos recebidos
-    argsc = len(sys.argv)
-    command_format = 0
-    
-    if (argsc <= 5):
-        command_format = argsc - 2
-    elif (argsc == 7):
-        command_format = 4
+    __slots__ = ('snapshot', 'address', 'entries', 'neighbors', 'groups', 'groups_serialized', 'poisoned')
 
-    if (not command_format in [1, 2, 3, 4]):
-        raise IOError('Invalid number of arguments')
+    def __init__(self, snapshot: TableSnapshot, address: str) -> None:
+        self.snapshot = snapshot
+        self.address = address
+        self.entries = snapshot.entries
+        self.neighbors = snapshot.neighbors
+        self.groups: typing.Union[list, None] = None
+        self.groups_serialized: typing.Dict[tuple, list] = {}
+        self.poisoned: typing.Union[typing.Dict[str, list], None] = None
 
-    addr = ''
-    pi = 0
-    startup_path = ''
+    '''
+        Agrupa destinos pelo conjunto de vizinhos de cuja visao devem ser excluidos (calculado apenas quando algum update completo eh enviado).
+        - Destino eh excluido da visao dele proprio (quando vizinho) & da visao do vizinho de quem a melhor rota foi aprendida;
+    '''
+    def get_groups(self) -> list:
 
-    # Trata caso de parametros nominais
-    
-    if (command_format in [3, 4]):
+        if (self.groups != None):
+            return self.groups
 
-        if (sys.argv[1] != ARG_NAME_ADDR):
-            raise IOError('Invalid argument at position 1. (Was it supposed to be "' + ARG_NAME_ADDR + '" ?)')
-        if (sys.argv[3] != ARG_NAME_PI):
-            raise IOError('Invalid argument at position 3. (Was it supposed to be "' + ARG_NAME_PI + '" ?)')
-        if (command_format == 4 and sys.argv[5] != ARG_NAME_STARTUP):
-            raise IOError('Invalid argument at position 5. (Was it supposed to be "' + ARG_NAME_STARTUP + '" ?)')
+        neighbors = set(self.neighbors)
+        groups: typing.Dict[tuple, list] = {}
 
-        addr = sys.argv[2]
-        pi = sys.argv[4]
+        for addr, (addr_src, weight) in self.entries.items():
+            key = (addr if addr in neighbors else None, addr_src if addr_src in neighbors else None)
+            group = groups.get(key)
+            if (group == None):
+                group = groups[key] = []
+            group.append((addr, weight))
 
-        if (command_format == 4):
-            startup_path = sys.argv[6]
-            if (not startup_path):
-                raise IOError('Argument ' + ARG_NAME_STARTUP + ' requires a file path')
+        merged_groups: typing.Dict[frozenset, list] = {}
+        for key, entries in groups.items():
+            merged_groups.setdefault(frozenset([addr for addr in key if addr != None]), []).extend(entries)
 
-    # Trata caso de parametros implicitos
-    else:
-        pi = sys.argv[2]
-        addr = sys.argv[1]
-        if (argsc > 3):
-            startup_path = sys.argv[3]
+        self.groups = list(merged_groups.items())
+        return self.groups
 
-    # Validar endereco
-    if (not addr):
-        raise IOError('Address is required')
-    if (not validate_ip(addr)):
-        raise IOError('Invalid address')
-    
-    # Validar PI
-    if (not pi):
-        raise IOError('Update period (pi) is required')
+    '''
+        Retorna peso anunciado a 01 vizinho para 01 destino (None quando destino nao deve ser anunciado a ele).
+    '''
+    def get_weight(self, addr_neighbor: str, link_weight: int, addr: str) -> typing.Union[int, None]:
 
-    try:
-        pi = float(pi)
-    except ValueError:
-        raise IOError('Invalid update period (must be a number)')
+        entry = self.entries.get(addr)
+        if (entry == None or addr == addr_neighbor or entry[0] == addr_neighbor):
+            return None
+
+        weight = link_weight + entry[1]
+        return weight if weight < ROUTE_INFINITY else None
 
     '''
-        TODO: 2021-08-04 - Validar path do arquivo
+        Retorna destinos cuja melhor rota foi aprendida de 01 vizinho (poison reverse: anunciados a ele como inalcancaveis).
+        - Indice por vizinho eh montado 01 unica vez por vetor (apenas quando algum update completo eh enviado);
     '''
+    def get_poisoned(self, addr_neighbor: str) -> list:
 
-    class return_data: pass
-    return_data.addr = addr
-    return_data.pi = pi
-    return_data.startup_path = startup_path
-    return return_data
+        if (self.poisoned == None):
+            self.poisoned = {}
+            for addr, (addr_src, weight) in self.entries.items():
+                if (addr != addr_src):
+                    self.poisoned.setdefault(addr_src, []).append(addr)
 
-'''
-    Inclui OU atualiza registro de 01 rota na tabela de roteamento.
-'''
-def set_route(addr_src: str, addr_dest: str, weight: int, is_neighbor: bool) -> None:
-    
-    destination: dict = routing_table.get(addr_dest)
-    if (not destination):
-        destination = { 'is_neighbor': is_neighbor }
-        routing_table[addr_dest] = destination
+        return self.poisoned.get(addr_neighbor, [])
 
-    routes: list = destination.get('routes')
-    if (not routes):
-        routes = []
+    '''
+        Retorna vetor completo anunciado a 01 vizinho, ja serializado & dividido em fragmentos de ate 'budget' bytes.
+        - Grupos sao serializados 01 unica vez por peso de enlace & formato (JSON OU binario);
+        - Peso para chegar a mim eh o do enlace direto: Melhor rota ate o vizinho pode ter sido aprendida dele mesmo (confirmaria pesos antigos);
+    '''
+    def get_fragments(self, addr_neighbor: str, link_weight: int, budget: int, is_binary: bool) -> list:
 
-    exists = False
+        serialize_entry = serialize_entry_bin if is_binary else serialize_entry_json
+        cache_key = (is_binary, link_weight)
 
-    for route in routes:
-        if (route.get('addr_src') == addr_src):
-            exists = True
-            route['periods'] = 0
-            route['weight'] = weight
-            break
+        chunks = self.groups_serialized.get(cache_key)
+        if (chunks == None):
+            chunks = []
+            for key, entries in self.get_groups():
+                serialized = [serialize_entry(addr, link_weight + weight) for addr, weight in entries]
+                chunk_size, chunk = serialize_chunk(serialized, is_binary)
+                chunks.append((key, chunk_size, chunk, serialized))
+            self.groups_serialized[cache_key] = chunks
 
-    if (not exists):
-        routes.append({ 'addr_src': addr_src, 'weight': weight, 'periods': 0 })
+        own_entry = [(self.address, link_weight)]
+        own_size, own_chunk = serialize_chunk([serialize_entry(self.address, link_weight)], is_binary)
 
-    if (is_neighbor):
-        routing_table[addr_dest]['is_neighbor'] = True
-    routing_table[addr_dest]['routes'] = routes
+        selected = [(own_size, own_chunk, own_entry, 0)]
+        selected.extend([(chunk_size, chunk, serialized, None) for key, chunk_size, chunk, serialized in chunks if not addr_neighbor in key])
+        return split_in_fragments(selected, budget, serialize_entry)
 
-'''
-    Exibe instrucoes de uso de comando: Inicializacao do programa
-'''
-def print_instructions_init() -> None:
-    print('Initialization command formats:')
-    print('\t- 01: "router.py <IP: string> <pi: float>"')
-    print('\t- 02: "router.py <IP: string> <pi: float> <startup_file: string>')
-    print('\t- 03: "router.py --addr <IP: string> --update-period <pi: float>')
-    print('\t- 04: "router.py --addr <IP: string> --update-period <pi: float> --startup-commands <startup_file: string>')
+    '''
+        Retorna delta (destinos alterados + destinos retirados) anunciado a 01 vizinho.
+    '''
+    def get_delta(self, addr_neighbor: str, link_weight: int, changes: list) -> tuple:
+
+        distances: dict = {}
+        withdrawn: list = []
+
+        for addr in changes:
+            weight = self.get_weight(addr_neighbor, link_weight, addr)
+            if (weight == None):
+                withdrawn.append(addr)
+            else:
+                distances[addr] = weight
+
+        return distances, withdrawn
+
+'''
+    Histograma de latencias com limites fixos (cumulativo apenas na exibicao): Registrar 01 valor custa 01 busca binaria.
+'''
+class Histogram:
+
+    __slots__ = ('bounds', 'counts', 'total', 'count')
+
+    def __init__(self, bounds: tuple = STATS_LATENCY_BUCKETS) -> None:
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1) # Ultima faixa: Acima do maior limite
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.total += value
+        self.count += 1
+
+'''
+    Contadores & histogramas de execucao do roteador (exibidos pelo comando 'stats' & pelo endpoint de estatisticas):
+    - Msgs & bytes recebidos / enviados por (tipo, vizinho): Em msgs de dados & rastreamento recebidas, 'vizinho' eh a origem da msg;
+    - Contagem por msg & histogramas apenas com 'detailed' (ativado por endpoint OU pelo 1o comando 'stats'): Sem eles, custo = 01 teste por msg;
+    - Demais contadores (falhas, descartes, mudancas de rota) ocorrem fora do caminho comum & estao sempre ativos;
+    - Sem locks: Cada incremento eh barato & eventuais perdas de incremento entre threads sao toleradas;
+    - Tamanho da tabela eh calculado apenas na exibicao;
+'''
+class RouterStats:
+
+    def __init__(self) -> None:
+        self.detailed = False
+        self.traffic_in: typing.Dict[tuple, list] = {} # (tipo, vizinho) -> [msgs, bytes]
+        self.traffic_out: typing.Dict[tuple, list] = {}
+        self.invalid_msgs = 0 # Msgs recebidas que falharam na decodificacao / validacao
+        self.handle_errors = 0 # Falhas inesperadas ao tratar msgs recebidas
+        self.no_route_drops = 0 # Msgs (dados & rastreamento) descartadas por falta de rota
+        self.best_route_changes = 0
+        self.expired_routes = 0
+        self.handle_latency = Histogram() # Tratamento de 01 lote de msgs recebidas ('handle_msgs')
+        self.update_build_time = Histogram() # Montagem & envio de 01 update (todos os fragmentos) para 01 vizinho
+        self.timed = False # Temporizadores de caminhos criticos (ativados com o profiler)
+        self.hot_paths: typing.Dict[str, list] = {} # Caminho -> [chamadas, segundos] desde o inicio
+        self.period_costs: typing.Dict[str, list] = {} # Caminho -> [chamadas, segundos] no periodo de atualizacao corrente
+        self.last_period_costs: typing.Dict[str, list] = {}
+
+    def count_in(self, msg_type: str, addr: str, size: int) -> None:
+        counter = self.traffic_in.get((msg_type, addr))
+        if (counter is None):
+            counter = self.traffic_in[(msg_type, addr)] = [0, 0]
+        counter[0] += 1
+        counter[1] += size
+
+    def count_out(self, msg_type: str, addr: str, size: int) -> None:
+        counter = self.traffic_out.get((msg_type, addr))
+        if (counter is None):
+            counter = self.traffic_out[(msg_type, addr)] = [0, 0]
+        counter[0] += 1
+        counter[1] += size
+
+    def add_time(self, hot_path: str, elapsed: float) -> None:
+        for costs in [self.hot_paths, self.period_costs]:
+            cost = costs.get(hot_path)
+            if (cost is None):
+                cost = costs[hot_path] = [0, 0.0]
+            cost[0] += 1
+            cost[1] += elapsed
 
-'''
-    Exibe instrucoes de uso de comando: Adicao de roteaodr.
-'''
-def print_instructions_add() -> None:
-    print(COMMAND_ADD + ' command format:')
-    print('\t' + COMMAND_ADD + ' <IP: string> <weight: int>"')
+    '''
+        Encerra 01 periodo de atualizacao: Retorna o custo de cada caminho critico no periodo & zera a contagem do proximo.
+    '''
+    def close_period(self) -> typing.Dict[str, list]:
+        self.last_period_costs, self.period_costs = self.period_costs, {}
+        return self.last_period_costs
 
-'''
-    Exibe instrucoes de uso de comando: Remocao de roteaodr.
-'''
-def print_instructions_del() -> None:
-    print(COMMAND_DEL + ' command format:')
-    print('\t' + COMMAND_DEL + ' <IP: string>')
 
 '''
-    Exibe instrucoes de uso de comando: Rastreamento de roteaodr.
+    Interface de transporte de datagramas do roteador:
+    - Envio de 01 datagrama para 01 endereco de socket + recebimento bloqueante (engine de threads) + encerramento;
+    - Mesma interface do asyncio.DatagramTransport para envio: Transportes podem ser usados por qualquer engine;
+    - Transportes alternativos (ex.: em memoria, para simulacao) substituem o socket UDP sem alterar a logica de roteamento;
+    - Classe base: Transportes concretos implementam 'sendto' & 'recv' (roteador sem rede usa 'NullTransport');
 '''
-def print_instructions_trace() -> None:
-    print(COMMAND_TRACE + ' command format:')
-    print('\t' + COMMAND_TRACE + ' <IP: string>')
+class Transport:
 
-'''
-    Centraliza chamadas para exibicao de instrucoes de uso.
-'''
-def print_instructions(help_command: str) -> None:
+    def sendto(self, raw_msg: bytes, sock_addr: tuple) -> None:
+        raise NotImplementedError()
 
-    print('\nInstructions:')
+    def recv(self, size: int) -> bytes:
+        raise NotImplementedError()
 
-    if (not help_command or help_command == COMMAND_INIT):
-        print_instructions_init()
-    if (not help_command or help_command == COMMAND_ADD):
-        print_instructions_add()
-    if (not help_command or help_command == COMMAND_DEL):
-        print_instructions_del()
-    if (not help_command or help_command == COMMAND_TRACE):
-        print_instructions_trace()
+    '''
+        Recebe 01 lote de datagramas (ao menos 01, bloqueante): Por padrao, 01 unico datagrama por lote.
+    '''
+    def recv_batch(self, size: int, count: int) -> list:
+        return [self.recv(size)]
+
+    def close(self) -> None:
+        pass
 
 '''
-    Identifica & rota para 01 determinado destino atraves do vizinho que informou o melhor caminho.
+    Transporte nulo: Descarta todo datagrama enviado & nunca recebe (roteador sem rede, ex.: medicoes de tratamento de msgs).
 '''
-def get_best_route(addr_dest: str) -> typing.Union[dict, None]:
+class NullTransport(Transport):
 
-    destination = routing_table.get(addr_dest)
-    if (not destination):
-        return
+    __slots__ = ()
 
-    routes = destination.get('routes')
-    if (not routes):
-        return
-    
-    best_route: dict = None
-    for route in routes:
-        if (not best_route or route.get('weight') < best_route.get('weight')):
-            best_route = route
+    def sendto(self, raw_msg: bytes, sock_addr: tuple) -> None:
+        pass
 
-    if (best_route):
-        return route
+    def recv(self, size: int) -> bytes:
+        raise IOError('Null transport never receives datagrams')
 
 '''
-    Remove rotas desatualizadas para 01 determinado destino:
-    - Atualiza contagem de tempo sem atualizacao das rotas de 01 destino;
-    - Remove rotas informadas por algum vizinho que nao tenham sido atualizadas por mais tempo que o limite;
+    Transporte padrao: Socket UDP do roteador.
 '''
-def clear_outdated_routes(addr_dest: str) -> None:
-    
-    destination = routing_table.get(addr_dest)
-    if (not destination):
-        return
+class SocketTransport(Transport):
 
-    routes = destination.get('routes')
-    if (not routes or not len(routes)):
-        return
+    __slots__ = ('sock', 'buffer')
 
-    routes_to_pop = []
+    def __init__(self, sock: socket.socket) -> None:
+        self.sock = sock
+        self.buffer: memoryview = None
 
-    for i in range(len(routes)):
+    def sendto(self, raw_msg: bytes, sock_addr: tuple) -> None:
+        self.sock.sendto(raw_msg, sock_addr)
 
-        route = routes[i]
-        is_self_mapped_neighbor = destination.get('is_neighbor') and route.get('addr_src') == address
-        if (is_self_mapped_neighbor):
-            continue
+    def recv(self, size: int) -> bytes:
+        return self.sock.recv(size)
 
-        route['periods'] = route.get('periods') + 1
-        if (route.get('periods') > MAX_PERIODS):
-            routes_to_pop.append(i)
-    
-    for i in routes_to_pop:
-        routes.pop(i)
+    def recv_batch(self, size: int, count: int) -> list:
+        if (self.buffer == None or len(self.buffer) < size):
+            self.buffer = memoryview(bytearray(size))
+        return recv_batch(self.sock, self.buffer[:size], count)
+
+    def close(self) -> None:
+        self.sock.close()
 
 '''
-    Remove da tabela de roteamento destinos para os quais nao restam nenhuma rota.
+    Endpoint HTTP de estatisticas (apenas localhost): GET em '/' OU '/metrics' retorna as estatisticas em formato texto (Prometheus).
 '''
-def clear_outdated_destinations() -> None:
-    
-    addr_to_pop_list = []
-    
-    for addr_dest in routing_table.keys():
-        routes = routing_table.get(addr_dest).get('routes')
-        if (not len(routes)):
-            addr_to_pop_list.append(addr_dest)
-    
-    for addr_dest in addr_to_pop_list:
-        log_debug('Forgeting route ' + addr_dest + '. We haven''t heard of it for too long :(')
-        routing_table.pop(addr_dest)
+class StatsHTTPHandler(http.server.BaseHTTPRequestHandler):
+
+    def do_GET(self) -> None:
+        if (not self.path.split('?')[0] in ['/', '/metrics']):
+            return self.send_error(404)
+
+        body = self.server.router.get_stats_text().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        log_debug('[stats] ' + format, *args)
 
 '''
-    Valida linha para comando de exibir instrucoes.
+    Endpoint de estatisticas em socket UNIX: Cada conexao recebe as estatisticas em formato texto & eh encerrada (ex.: 'nc -U <caminho>').
 '''
-def validate_command_help(command_args: list) -> None:
-
-    argsc = len(command_args)
-    if (argsc > 2):
-        raise IOError(COMMAND_HELP + ' command takes exactly 01 or 02 arguments')
+class StatsUnixHandler(socketserver.StreamRequestHandler):
 
-    if (argsc == 2 and not command_args[1] in COMMAND_ROUTER_LIST):
-        raise IOError('Argument 1 is not a valid router command')
+    def handle(self) -> None:
+        self.wfile.write(self.server.router.get_stats_text().encode())
 
 '''
-    Avalia & retorna parametros de linha do comando: Add roteador.
+    Profiler por amostragem de todas as threads do processo (sem instrumentar funcoes: Custo independe da carga do roteador):
+    - 01 thread propria le a pilha de cada thread a cada 'interval' segundos ('sys._current_frames');
+    - Por thread: Amostras em que cada funcao estava no topo da pilha (propria) OU em qualquer ponto dela (total);
+    - Threads bloqueadas (ex.: aguardando msgs) tambem sao amostradas: Tempo ocioso aparece na funcao de espera;
 '''
-def get_command_data_add(command_args: list) -> object:
-    
-    argsc = len(command_args)
+class SamplingProfiler:
 
-    if (argsc != 3):
-        raise IOError(COMMAND_ADD + ' command takes exactly 03 arguments')
+    def __init__(self, interval: float = PROFILE_SAMPLE_INTERVAL) -> None:
+        self.interval = interval
+        self.lock = RLock()
+        self.started = time.time()
+        self.samples: typing.Dict[str, int] = {} # Thread -> amostras
+        self.own_counts: typing.Dict[str, collections.Counter] = {}
+        self.total_counts: typing.Dict[str, collections.Counter] = {}
+        self.stacks: typing.Dict[str, collections.Counter] = {} # Thread -> pilha ('raiz;...;topo') -> amostras
+        self.labels: typing.Dict[object, str] = {} # Codigo -> 'funcao (arquivo:linha)'
+        self.stopping = Event()
+        self.sampler: Thread = None
 
-    class return_data: pass
+    def start(self) -> None:
+        self.sampler = Thread(target=self.run, name='profiler', daemon=True)
+        self.sampler.start()
 
-    return_data.addr = command_args[1]
-    if (not validate_ip(return_data.addr)):
-        raise IOError('Invalid IP address')
-    
-    return_data.weight = int(command_args[2])
-    return return_data
+    def stop(self) -> None:
+        self.stopping.set()
+        if (self.sampler and self.sampler is not current_thread()):
+            self.sampler.join()
 
-'''
-    Avalia & retorna parametros de linha do comando: Remover roteador.
-'''
-def get_command_data_del(command_args: list) -> object:
-    
-    if (len(command_args) != 2):
-        raise IOError(COMMAND_DEL + ' command takes exactly 02 arguments')
+    def run(self) -> None:
+        while (not self.stopping.wait(self.interval)):
+            self.take_sample()
 
-    class return_data: pass
-    return_data.addr = command_args[1]
-    return return_data
+    def take_sample(self) -> None:
 
-'''
-    Avalia & retorna parametros de linha do comando: Rastrear roteador.
-'''
-def get_command_data_trace(command_args: list) -> object:
-    
-    if (len(command_args) != 2):
-        raise IOError(COMMAND_TRACE + ' command takes exactly 02 arguments')
+        names = { thread.ident: thread.name for thread in enumerate_threads() }
+        own_ident = current_thread().ident
+        labels = self.labels
+
+        with self.lock:
+            for ident, frame in sys._current_frames().items():
+                if (ident == own_ident):
+                    continue
+
+                functions = []
+                while (frame):
+                    code = frame.f_code
+                    label = labels.get(code)
+                    if (label is None):
+                        label = labels[code] = code.co_name + ' (' + os.path.basename(code.co_filename) + ':' + str(code.co_firstlineno) + ')'
+                    functions.append(label)
+                    frame = frame.f_back
+
+                name = names.get(ident, str(ident))
+                if (not name in self.samples):
+                    self.samples[name] = 0
+                    self.own_counts[name] = collections.Counter()
+                    self.total_counts[name] = collections.Counter()
+                    self.stacks[name] = collections.Counter()
+
+                self.samples[name] += 1
+                self.own_counts[name][functions[0]] += 1
+                self.total_counts[name].update(set(functions)) # Recursao conta 01 unica vez por amostra
+                self.stacks[name][';'.join(reversed(functions))] += 1
+
+    '''
+        Retorna relatorio por thread: Funcoes com mais amostras proprias & com mais amostras totais (% das amostras da thread).
+    '''
+    def get_report(self, top: int = PROFILE_TOP_FUNCTIONS) -> str:
+        with self.lock:
+
+            lines = ['Sampling profile: %.1f s, 1 sample every %g ms' % (time.time() - self.started, self.interval * 1000)]
+            for name in sorted(self.samples):
+
+                count = self.samples[name]
+                lines.append('')
+                lines.append('Thread ' + name + ': ' + str(count) + ' samples')
+                for title, counts in [('own', self.own_counts[name]), ('total', self.total_counts[name])]:
+                    lines.append('  Top by ' + title + ' samples:')
+                    for function, samples in counts.most_common(top):
+                        lines.append('  %6.1f%%  %s' % (100 * samples / count, function))
+
+            return '\n'.join(lines) + '\n'
+
+    '''
+        Retorna pilhas amostradas no formato 'folded' (1 linha por pilha: 'thread;raiz;...;topo amostras'), entrada de flame graphs.
+    '''
+    def get_folded_stacks(self) -> str:
+        with self.lock:
+            return ''.join([name + ';' + stack + ' ' + str(samples) + '\n' for name in sorted(self.stacks) for stack, samples in self.stacks[name].items()])
 
-    class return_data: pass
-    return_data.target = command_args[1]
-    return return_data
 
 '''
-    Avalia & retorna parametros de linha de 01 comando generico.
+=================================================================
+-- Variaveis globais --------------------------------------------
+=================================================================
 '''
-def get_command_data(command_line: str) -> object:
 
-    command_args = command_line.split()
-    command_type = command_args[0]
+packed_addr_cache: typing.Dict[str, bytes] = {}
+unpacked_addr_cache: typing.Dict[bytes, str] = {}
+valid_addr_cache: collections.OrderedDict = collections.OrderedDict() # LRU: Endereco -> None (mais recentes ao final)
+have_main_loop_started = False
 
-    try:
-        if (command_type == COMMAND_ADD):
-            parsed_args = get_command_data_add(command_args)
-        elif (command_type == COMMAND_DEL):
-            parsed_args = get_command_data_del(command_args)
-        elif (command_type == COMMAND_TRACE):
-            parsed_args = get_command_data_trace(command_args)
+log_queue: collections.deque = collections.deque() # Registros (instante, nivel, msg, argumentos, thread) aguardando a thread de escrita
+log_ready = Event()
+log_writer: Thread = None
+log_writer_lock = Lock() # Serializa inicio & encerramento da thread de escrita (01 unica thread ativa)
+log_stopping = False
+log_file = None # Destino estruturado (JSON lines): Com ele, o terminal exibe apenas dicas, alertas & erros
+log_dropped: typing.Dict[int, int] = {} # Registros descartados (fila cheia) por nivel
+log_dropped_reported = 0
 
-        else:
-            class parsed_args: pass
-            if (command_type == COMMAND_HELP):
-                validate_command_help(command_args)
-                parsed_args.help_command = command_args[1] if len(command_args) == 2 else None
-            elif (not command_type in [COMMAND_DEBUG_TABLE, COMMAND_INIT, COMMAND_QUIT]):
-                raise IOError('Invalid command')
+profiler: SamplingProfiler = None
+profile_path: str = None # Relatorio do profiler (pilhas 'folded' em '<caminho>.folded')
 
-        parsed_args.command = command_type
-        return parsed_args
-        
-    except IOError as error:
-        print('\n-- Invalid input! >.<\" --')
-        print(error)
-        print_instructions(COMMAND_ADD)
-        print(INPUT_CLI_MSG)
 
 '''
-    Executa comando: Exibir instrucoes.
+=================================================================
+-- Declarar funcoes genericas / auxiliares / utilitarias --------
+=================================================================
 '''
-def execute_command_help(command_type: str) -> None:
-    return print_instructions(command_type)
-
-def execute_command_debug_table() -> None:
-    print('Routing Table:\n\t', routing_table)
-    print(INPUT_CLI_MSG)
 
 '''
-    Executa comando: Add roteador na rede.
+    Avalia & infomra se 01 nivel de emissao de log esta habilitado.
 '''
-def execute_command_add(addr_src: str, addr_dst: str, weight: int) -> None:
-    set_route(addr_src, addr_dst, weight, True)
-    log_info('Address ' + addr_dst + ' successfully added to routing table...')
+def is_log_level_valid(level: int) -> bool:
+    return LOG_LEVEL_DEBUG <= level <= LOG_LEVEL_ERROR and level >= LOG_LEVEL
 
 '''
-    Executa comando: Remover roteador na rede.
+    Centraliza emissao de mensagens de log:
+    - Nivel eh avaliado antes de qualquer formatacao: Argumentos ('%s' em 'msg') so sao formatados pela thread de escrita;
+    - Registro segue por fila limitada para a thread de escrita (iniciada no primeiro registro, sob lock): Quem registra nunca espera por E/S;
+    - Com a fila cheia, o registro eh descartado & contado ('log_dropped');
 '''
-def execute_command_del(addr: str) -> None:
+def log(level: int, msg, *args) -> None:
+    global log_writer
 
-    destination = routing_table.get(addr)
-    if (not destination):
-        return log_warn('Address ' + addr + ' does not exist in routing table...')
+    if (level < LOG_LEVEL or not LOG_LEVEL_DEBUG <= level <= LOG_LEVEL_ERROR):
+        return
 
-    if (not destination.get('is_neighbor')):
-        return log_warn('Address ' + addr + ' is not a neighbor one...')
+    if (len(log_queue) >= LOG_QUEUE_SIZE):
+        log_dropped[level] = log_dropped.get(level, 0) + 1
+        return
 
-    routing_table.pop(addr)
-    log_info('Address ' + addr + ' successfully removed from routing table...')
+    log_queue.append((time.time(), level, msg, args, current_thread().name))
+    if (not log_writer):
+        with log_writer_lock:
+            if (not log_writer):
+                writer = Thread(target=thread_write_logs, name='log-writer', daemon=True)
+                writer.start()
+                log_writer = writer
+    if (not log_ready.is_set()):
+        log_ready.set()
 
-'''
-    Executa comando: Rastrear 01 roteador na rede.
-'''
-def execute_command_trace(addr_src: str, addr_target: str, hops: list = None) -> None:
-    
-    has_neighbors = False
-    sent = False
+def log_debug(msg, *args) -> None:
+    log(LOG_LEVEL_DEBUG, msg, *args)
 
-    for addr_dest in routing_table.keys():
+def log_hint(msg, *args) -> None:
+    log(LOG_LEVEL_HINT, msg, *args)
 
-        if (not routing_table.get(addr_dest).get('is_neighbor')):
-            continue
-        has_neighbors = True
+def log_info(msg, *args) -> None:
+    log(LOG_LEVEL_INFO, msg, *args)
 
-        if (addr_dest != addr_src):
-            send_msg_trace(addr_src, addr_target, hops if hops != None else [address])
-            sent = True
+def log_warn(msg, *args) -> None:
+    log(LOG_LEVEL_WARN, msg, *args)
 
-    # Notifica em caso de envio nao ocorrer por alguma razao
-    if (not has_neighbors):
-        return log_warn('No neighbors to send trace request')
-    if (not sent):
-        return log_warn('Somehing wrong isn''t right! No messages sent for this trace request :(')
-    
-    # Notifica envio quando estamos iniciando rastreamento agora
-    if (addr_src == address):
-        log_info('Trace request successfully sent')
+def log_error(msg, *args) -> None:
+    log(LOG_LEVEL_ERROR, msg, *args)
 
 '''
-    Validador de mensagens: Dados.
+    Formata texto de 01 registro de log (msg com argumentos '%s'; msg que nao eh texto, ex.: excecoes, vira texto).
 '''
-def validate_msg_data(msg: dict) -> None:
-    if (msg.get('payload') == None):
-        raise IOError('Data Message: property "payload" is missing')
+def format_log_msg(msg, args: tuple) -> str:
+    if (not args):
+        return str(msg)
+    try:
+        return str(msg) % args
+    except (TypeError, ValueError):
+        return str(msg) + ' ' + ' '.join([str(arg) for arg in args])
 
 '''
-    Validador de mensagens: Trace.
+    Configura logs a partir da linha de comando: Nivel minimo & destino estruturado (arquivo JSON lines, aberto para acrescimo).
 '''
-def validate_msg_trace(msg: dict) -> None:
+def configure_logging(level: int, path: str = None) -> None:
+    global LOG_LEVEL, log_file
 
-    hops: list = msg.get('hops')
+    LOG_LEVEL = level
+    if (path):
+        try:
+            log_file = open(path, 'a')
+        except OSError as error:
+            raise IOError('Failure as opening log file "' + path + '": ' + str(error))
 
-    if (hops == None):
-        raise IOError('Trace Message: property "hops" is missing')
-    if (type(hops) != list or not len(msg.get('hops'))):
-        raise IOError('Trace Message: Property "hops" must be a non empty list')
+'''
+    Escreve os registros de log enfileirados ate o momento (chamada apenas pela thread de escrita OU apos encerra-la):
+    - Terminal: '[nivel] msg' (prompt da CLI reexibido 01 unica vez por lote);
+    - Arquivo: 01 objeto JSON por linha (instante, nivel, thread & msg);
+    - Registros descartados desde o ultimo lote sao informados em 01 alerta;
+'''
+def write_log_records() -> None:
+    global log_dropped_reported
 
-    for i in range(len(hops)):
-        if (not validate_ip(hops[i])):
-            raise IOError('Trace Message: Invalid IP address in hops list at ' + i + ' position')
+    # Fila pode ser esvaziada por outra escrita ao mesmo tempo (encerramento com a thread de escrita ainda ativa)
+    records = []
+    while (log_queue):
+        try:
+            records.append(log_queue.popleft())
+        except IndexError:
+            break
+
+    dropped = sum(log_dropped.values())
+    if (dropped > log_dropped_reported):
+        records.append((time.time(), LOG_LEVEL_WARN, '%s log record(s) dropped: Log queue is full', (dropped - log_dropped_reported,), current_thread().name))
+        log_dropped_reported = dropped
+
+    if (not records):
+        return
+
+    console_level = LOG_LEVEL_HINT if log_file else LOG_LEVEL_DEBUG
+    console_lines = []
+    file_lines = []
+    needs_prompt = False
+
+    for created, level, msg, args, thread_name in records:
+        text = format_log_msg(msg, args)
+        if (log_file):
+            file_lines.append(json.dumps({ 'time': round(created, 6), 'level': LOG_LEVEL_NAMES[level], 'thread': thread_name, 'msg': text }) + '\n')
+        if (level >= console_level):
+            console_lines.append('[' + LOG_LEVEL_NAMES[level] + '] ' + text + '\n')
+            needs_prompt = needs_prompt or not level in [LOG_LEVEL_HINT, LOG_LEVEL_ERROR]
+
+    try:
+        if (file_lines):
+            log_file.write(''.join(file_lines))
+            log_file.flush()
+        if (console_lines):
+            if (have_main_loop_started and needs_prompt):
+                console_lines.append(INPUT_CLI_MSG + '\n')
+            sys.stdout.write(''.join(console_lines))
+            sys.stdout.flush()
+    except (OSError, ValueError):
+        pass
 
 '''
-    Validador de mensagens: Update.
+    Thread de escrita dos logs: Escreve em lote tudo o que foi enfileirado desde a ultima rodada.
 '''
-def validate_msg_update(msg: dict) -> None:
+def thread_write_logs() -> None:
+    while (True):
+        log_ready.wait()
+        log_ready.clear()
+        write_log_records()
+        if (log_stopping):
+            return
 
-    distances: dict = msg.get('distances')
-    if (type(distances) != dict):
-        raise IOError('Update Message: Invalid value for distances list (should be of type dict, ' + str(type(distances)) + ' received)')
+'''
+    Encerra a thread de escrita (se ativa) & escreve registros ainda pendentes: Chamada no encerramento do programa.
+    - Registros posteriores iniciam nova thread de escrita;
+'''
+def flush_logs() -> None:
+    global log_writer, log_stopping
 
-    for addr_dest in distances.keys():
-        
-        if (not validate_ip(addr_dest)):
-            raise IOError('Update Message: Invalid IP address in distances dict: "' + addr_dest + '"')
+    with log_writer_lock:
+        writer = log_writer
+        if (writer and writer.is_alive() and writer is not current_thread()):
+            log_stopping = True
+            log_ready.set()
+            writer.join(1.0)
 
-        weight = distances.get(addr_dest)
-        if (type(weight) != int or weight <= 0): 
-            raise IOError('Update Message: Weight for address ' + addr_dest + ' should be a positive int ("' + weight + '" provided)')
+        write_log_records()
+        log_writer = None
+        log_stopping = False
+
+atexit.register(flush_logs)
 
 '''
-    Encapsula procedimento generico de validacao de mensagens.
+    Inicia o profiler por amostragem de todas as threads: Relatorio gravado em 'path' ao encerrar (OU ao receber SIGUSR1, via 'main').
 '''
-def validate_msg(msg: dict) -> None:
+def start_profiling(path: str, interval: float = PROFILE_SAMPLE_INTERVAL) -> None:
+    global profiler, profile_path
 
-    # Valida presenca de campos obrigatorios
-    msg_type: str = msg.get('type')
-    
-    if (msg_type == None):
-        raise IOError('All Messages must have the "type" property')
-    if (msg.get('source') == None):
-        raise IOError('All Messages must have the "source" property')
-    if (msg.get('destination') == None):
-        raise IOError('All Messages must have the "destination" property')
+    profile_path = path
+    profiler = SamplingProfiler(interval)
+    profiler.start()
+    log_info('Profiling every thread, report at: %s', path)
 
-    # Valida valores dos campos obrigatorios    
-    if (not msg_type in [MSG_TYPE_DATA, MSG_TYPE_TRACE, MSG_TYPE_UPDATE]):
-        raise IOError('Invalid message type "' + msg_type + '"')
-    if (not validate_ip(msg.get('source'))):
-        raise IOError('Invalid IP address received as "source"')
-    if (not validate_ip(msg.get('destination'))):
-        raise IOError('Invalid IP address received as "destination"')
+'''
+    Grava relatorio do profiler (+ temporizadores de caminhos criticos dos roteadores informados) & pilhas 'folded'.
+    - Pode ser chamada a qualquer momento: Amostragem segue ativa (relatorios sucessivos sao cumulativos);
+'''
+def write_profile(routers: typing.Optional[list] = None) -> None:
 
-    # Valida campos especificos de cada tipo de msg
-    if (msg_type == MSG_TYPE_DATA):
-        validate_msg_data(msg)
-    elif (msg_type == MSG_TYPE_TRACE):
-        validate_msg_trace(msg)
-    elif (msg_type == MSG_TYPE_UPDATE):
-        validate_msg_update(msg)
+    routers = routers or []
+    if (not profiler):
+        return
+
+    report = profiler.get_report()
+    for router in routers:
+        report += '\n' + router.get_hot_path_report()
+
+    try:
+        with open(profile_path, 'w') as file:
+            file.write(report)
+        with open(profile_path + '.folded', 'w') as file:
+            file.write(profiler.get_folded_stacks())
+        log_info('Profile written to: %s', profile_path)
+    except OSError as error:
+        log_error('Failure as writing profile: %s', error)
 
 '''
-    Encapsula procedimento de envio de quaisquer mensagens.
+    Encerra o profiler (se ativo) gravando o relatorio final.
 '''
-def send_msg(msg: dict) -> None:
-    try:
-        
-        senderFD: socket.socket = None
+def stop_profiling(routers: typing.Optional[list] = None) -> None:
+    global profiler
 
-        # Define vizinho para o qual essa msg sera enviada
-        addr_target = msg.get('destination')
-        best_route = get_best_route(addr_target)
-        if (not best_route):
-            raise RuntimeError('No route known for destination ' + addr_target)
+    routers = routers or []
+    if (not profiler):
+        return
 
-        addr_dest = best_route.get('addr_src')
-        if (addr_dest == address):
-            addr_dest = addr_target
+    write_profile(routers)
+    profiler.stop()
+    profiler = None
 
-        # Verifica se destino do envio eh nosso vizinho
-        if (not routing_table.get(addr_dest).get('is_neighbor')):
-            return log_warn('Message to ' + addr_dest + ' won\'t be sent as it is not a neighbor... :(')
+'''
+    Avalia 01 string generica & retorna sua versao de IP caso represente 01 IP valido.
+'''
+def get_ip_version(addr: str) -> typing.Union[int, bool]:
+    try:
 
-        # Envia msg para vizinho que possui a melhor rota para o destino solicitado
-        addr_family = socket.AF_INET if get_ip_version(address) == 4 else socket.AF_INET6
-        senderFD = socket.socket(addr_family, socket.SOCK_DGRAM)
-        senderFD.sendto(json.dumps(msg).encode(), (addr_dest, PORT))
+        # V4
+        try:
+            socket.inet_pton(socket.AF_INET, addr)
+            return 4
 
-    except socket.error as error:
-        log_error('Failure as sending ' + msg.get('type') + ' message')
-        if (is_log_level_valid(LOG_LEVEL_DEBUG)):
-            raise error
+        # V6
+        except socket.error:
+            socket.inet_pton(socket.AF_INET6, addr)
+            return 6
 
-    except Exception as error:
-        log_error(error)
+    except socket.error:
+        return False
 
-    finally:
-        if (senderFD):
-            senderFD.close()
+'''
+    Valida string quanto a representar um endereco IP valido.
+    - Enderecos IPv4 validos sao mantidos em cache LRU (limitado a VALID_ADDR_CACHE_SIZE entradas): Enderecos recorrentes sao avaliados 01 unica vez;
+'''
+def validate_ip(addr: str, version: int = 4) -> bool:
+    if (not version in [4, 6]):
+        raise ValueError('Invalid IP version for validation')
+    if (version == 4 and type(addr) == str and addr in valid_addr_cache):
+        valid_addr_cache.move_to_end(addr)
+        return True
+
+    is_valid = version == get_ip_version(addr)
+    if (is_valid and version == 4):
+        cache_valid_addrs([addr])
+    return is_valid
 
 '''
-    Encapsula procedimento de envio de mensagens: Dados.
+    Inclui enderecos (validos) no cache: Enderecos menos usados recentemente saem quando o limite eh atingido.
+    - Varredura com muitos enderecos novos descarta apenas os antigos (& nao o cache inteiro): Enderecos recorrentes seguem em cache;
 '''
-def send_msg_data(addr_src: str, add_dest: str, payload) -> None:
-    send_msg({
-        'type': MSG_TYPE_DATA,
-        'source': addr_src,
-        'destination': add_dest,
-        'payload': payload,
-    })
+def cache_valid_addrs(addrs: typing.Iterable[str]) -> None:
+    valid_addr_cache.update(dict.fromkeys(addrs))
+    while (len(valid_addr_cache) > VALID_ADDR_CACHE_SIZE):
+        valid_addr_cache.popitem(last=False)
 
 '''
-    Encapsula procedimento de envio de mensagens: Trace.
+    Valida todos os enderecos de 01 colecao (IPv4) numa unica passada:
+    - Caminho rapido: Todos ja conhecidos (cada 01 eh marcado como usado no cache, sem laco em Python: 'move_to_end' falha no 1o desconhecido);
+    - Do contrario, apenas os desconhecidos sao avaliados (& incluidos em bloco no cache, se todos forem validos);
 '''
-def send_msg_trace(addr_src: str, addr_dest: str, hops: list) -> None:
-    send_msg({
-        'type': MSG_TYPE_TRACE,
-        'source': addr_src,
-        'destination': addr_dest,
-        'hops': hops,
-    })
+def validate_ips(addrs: typing.Iterable[str]) -> bool:
+    try:
+        collections.deque(map(valid_addr_cache.move_to_end, addrs), 0)
+        return True
+    except KeyError:
+        pass
+    except TypeError:
+        return False # Elemento nao eh texto
+
+    try:
+        unknown = set(itertools.filterfalse(valid_addr_cache.__contains__, addrs))
+    except TypeError:
+        return False
+
+    for addr in unknown:
+        if (type(addr) != str or get_ip_version(addr) != 4):
+            return False
+
+    cache_valid_addrs(unknown)
+    return True
+
 
 '''
-    Encapsula procedimento de envio de mensagens: Update:
-    - Inclui peso para chegar a mim;
-    - Nao falo pro destino como chegar nele mesmo;
-    - O menor peso para 01 dos meus vizinhos eh o peso para chegar a mim + o menor peso para eu chegar nesse vizinho;
+=================================================================
+-- Declarar funcoes do formato binario de mensagens -------------
+=================================================================
+
+    Layout: [magic: 1B][tipo: 1B][flags: 1B][source][destination][corpo]
+    - Enderecos: 4 bytes (IPv4) OU 16 bytes (IPv6, com BIN_FLAG_IPV6);
+    - Inteiros: varint (LEB128 sem sinal);
+    - Corpo update: seq + qtd + (endereco)* + (peso)* + qtd + (endereco retirado)*;
+    - Corpo trace: qtd + (endereco)* [+ ttl] [+ id];
+    - Corpo data: payload serializado em JSON;
 '''
-def send_msg_update(addr_dest: str) -> None:
 
-    distances: dict = {}
-    warn_msg_no_best_route = '[update: send] Something wrong isn''t right! No best route found for neighbor ' + addr_dest
+'''
+    Codifica 01 inteiro nao negativo como varint.
+'''
+def encode_varint(value: int) -> bytes:
 
-    # Inclui peso para chegar a mim
-    best_route_dest = get_best_route(addr_dest)
-    if (not best_route_dest):
-        return log_warn(warn_msg_no_best_route)
-    
-    distances[address] = best_route_dest.get('weight')
+    if (value < 0x80):
+        return bytes((value,))
 
-    # Inclui menor peso chegar em cada 01 dos meus vizinhos
-    for addr in routing_table.keys():
+    encoded = bytearray()
+    while (value >= 0x80):
+        encoded.append((value & 0x7F) | 0x80)
+        value >>= 7
+    encoded.append(value)
+    return bytes(encoded)
 
-        if (addr == addr_dest):
-            continue
+'''
+    Decodifica 01 varint a partir de 01 posicao. Retorna valor + posicao seguinte.
+'''
+def decode_varint(raw: bytes, pos: int) -> tuple:
 
-        best_route = get_best_route(addr)
-        if (not best_route):
-            log_warn(warn_msg_no_best_route)
-            continue
+    value = 0
+    shift = 0
 
-        if (best_route.get('addr_src') != addr_dest):
-            distances[addr] = best_route_dest.get('weight') + best_route.get('weight')
+    while (True):
+        byte = raw[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if (byte < 0x80):
+            return value, pos
+        shift += 7
 
-    send_msg({
-        'type': MSG_TYPE_UPDATE,
-        'source': address,
-        'destination': addr_dest,
-        'distances': distances,
-    })
+'''
+    Empacota 01 endereco IP (4 OU 16 bytes, conforme familia do endereco).
+'''
+def pack_addr(addr: str) -> bytes:
+    packed = packed_addr_cache.get(addr)
+    if (packed == None):
+        packed = socket.inet_pton(socket.AF_INET6 if ':' in addr else socket.AF_INET, addr)
+        cache_addr(addr, packed)
+    return packed
 
 '''
-    Handler para avaliacao de mensgens: Dados.
+    Desempacota 01 endereco IP (4 OU 16 bytes).
 '''
-def handle_msg_data(msg: dict) -> None:
-    if (msg.get('destination') != address):
-        send_msg_data(msg.get('source'), msg.get('destination'), msg.get('payload'))
-    else:
-        if (is_log_level_valid(LOG_LEVEL_INFO)):
-            print('\t' + msg.get('source') + ' says: ', msg.get('payload'))
+def unpack_addr(packed: bytes) -> str:
+    addr = unpacked_addr_cache.get(packed)
+    if (addr == None):
+        addr = socket.inet_ntop(socket.AF_INET if len(packed) == 4 else socket.AF_INET6, packed)
+        cache_addr(addr, packed)
+    return addr
 
 '''
-    Handler para avaliacao de mensgens: Trace.
+    Registra 01 par endereco (texto <-> empacotado) no cache (limitado a BIN_ADDR_CACHE_SIZE entradas).
 '''
-def handle_msg_trace(msg: dict) -> None:
-    
-    # Propaga msg de rastreamento (quando alvo for outro roteador)
-    hops = msg.get('hops') + [address]
-    if (msg.get('destination') != address):
-        return execute_command_trace(msg.get('source'), msg.get('destination'), hops)
-    
-    # Responde msg de rastreamento (quando alvo for este roteador)
-    msg['hops'] = hops
-    send_msg_data(address, msg.get('source'), msg)
+def cache_addr(addr: str, packed: bytes) -> None:
+    if (len(unpacked_addr_cache) >= BIN_ADDR_CACHE_SIZE):
+        unpacked_addr_cache.clear()
+        packed_addr_cache.clear()
+    unpacked_addr_cache[packed] = addr
+    packed_addr_cache[addr] = packed
 
 '''
-    Handler para avaliacao de mensgens: Update.
+    Serializa 01 msg no formato binario.
 '''
-def handle_msg_update(msg: dict) -> None:
-    for addr_dest, weight in msg.get('distances').items():
-        set_route(msg.get('source'), addr_dest, weight, False)
+def encode_msg_binary(msg: dict, distances_bin: tuple = None) -> bytes:
+
+    msg_type = msg['type']
+    flags = BIN_FLAG_IPV6 if ':' in msg['source'] else 0
+    if (msg.get('full')):
+        flags |= BIN_FLAG_FULL
+
+    parts = [None, pack_addr(msg['source']), pack_addr(msg['destination'])]
+
+    if (msg_type == MSG_TYPE_UPDATE):
+
+        # Distancias podem vir ja serializadas (enderecos empacotados, pesos em varint)
+        if (distances_bin == None):
+            distances: dict = msg['distances']
+            distances_bin = (
+                b''.join([pack_addr(addr) for addr in distances.keys()]),
+                b''.join([encode_varint(weight) for weight in distances.values()]),
+            )
+
+        addrs_bin, weights_bin = distances_bin
+        count = len(addrs_bin) // (16 if flags & BIN_FLAG_IPV6 else 4)
+        if (len(weights_bin) == count):
+            flags |= BIN_FLAG_SMALL_WEIGHTS
+
+        withdrawn: list = msg.get('withdrawn', [])
+        parts.extend([encode_varint(msg.get('seq', 0)), encode_varint(count), addrs_bin, weights_bin, encode_varint(len(withdrawn))])
+        parts.extend([pack_addr(addr) for addr in withdrawn])
+
+    elif (msg_type == MSG_TYPE_TRACE):
+        parts.append(encode_varint(len(msg['hops'])))
+        parts.extend([pack_addr(addr) for addr in msg['hops']])
+        for flag, key in [(BIN_FLAG_TRACE_TTL, 'ttl'), (BIN_FLAG_TRACE_ID, 'id')]:
+            if (msg.get(key) != None):
+                flags |= flag
+                parts.append(encode_varint(msg[key]))
+
+    elif (msg_type == MSG_TYPE_DATA):
+        parts.append(json.dumps(msg['payload']).encode())
+
+    elif (msg_type == MSG_TYPE_HELLO):
+        parts.extend([encode_varint(msg['interval']), encode_varint(msg['multiplier'])])
+
+    parts[0] = BIN_HEADER.pack(BIN_MAGIC, BIN_TYPE_CODES[msg_type], flags)
+    return b''.join(parts)
 
 '''
-    Handler generico para avaliacao de mensgens recebidas.
+    Desserializa 01 msg no formato binario.
+    - Enderecos empacotados sao validos por construcao: Dispensa validacao de IPs;
 '''
-def handle_msg(raw_msg: bytes) -> None:
+def decode_msg_binary(raw: bytes) -> dict:
     try:
 
-        msg: dict = json.loads(raw_msg)
-        validate_msg(msg)
-        
-        msg_type = msg.get('type')
+        magic, type_code, flags = BIN_HEADER.unpack_from(raw, 0)
+        msg_type = BIN_TYPE_NAMES.get(type_code)
+        if (magic != BIN_MAGIC or not msg_type):
+            raise IOError('Binary Message: Invalid header')
+
+        addr_len = 16 if flags & BIN_FLAG_IPV6 else 4
+
+        pos = BIN_HEADER.size
+        msg = {
+            'type': msg_type,
+            'source': unpack_addr(raw[pos:pos + addr_len]),
+            'destination': unpack_addr(raw[pos + addr_len:pos + 2 * addr_len]),
+        }
+        pos += 2 * addr_len
 
         if (msg_type == MSG_TYPE_UPDATE):
-            handle_msg_update(msg)
+
+            msg['binary'] = True
+            msg['full'] = bool(flags & BIN_FLAG_FULL)
+            msg['seq'], pos = decode_varint(raw, pos)
+
+            count, pos = decode_varint(raw, pos)
+            addrs_end = pos + count * addr_len
+            if (addrs_end > len(raw)):
+                raise IOError('Binary Message: Truncated distances list')
+            get_cached = unpacked_addr_cache.get
+            addrs = [get_cached(raw[i:i + addr_len]) or unpack_addr(raw[i:i + addr_len]) for i in range(pos, addrs_end, addr_len)]
+            pos = addrs_end
+
+            # Pesos: Sequencia de varints (caso comum: todos com 01 byte)
+            if (flags & BIN_FLAG_SMALL_WEIGHTS):
+                weights = raw[pos:pos + count]
+                if (len(weights) != count or max(weights, default=1) >= 0x80):
+                    raise IOError('Binary Message: Invalid weights list')
+                pos += count
+            else:
+                weights = []
+                for i in range(count):
+                    weight = raw[pos]
+                    if (weight < 0x80):
+                        pos += 1
+                    else:
+                        weight, pos = decode_varint(raw, pos)
+                    weights.append(weight)
+
+            if (count and min(weights) <= 0):
+                raise IOError('Binary Message: Weights should be positive ints')
+            msg['distances'] = dict(zip(addrs, weights))
+
+            count, pos = decode_varint(raw, pos)
+            msg['withdrawn'] = [unpack_addr(raw[pos + i * addr_len:pos + (i + 1) * addr_len]) for i in range(count)]
+            pos += count * addr_len
+
         elif (msg_type == MSG_TYPE_TRACE):
-            handle_msg_trace(msg)
+            count, pos = decode_varint(raw, pos)
+            if (not count):
+                raise IOError('Trace Message: Property "hops" must be a non empty list')
+            msg['hops'] = [unpack_addr(raw[pos + i * addr_len:pos + (i + 1) * addr_len]) for i in range(count)]
+            pos += count * addr_len
+            for flag, key in [(BIN_FLAG_TRACE_TTL, 'ttl'), (BIN_FLAG_TRACE_ID, 'id')]:
+                if (flags & flag):
+                    msg[key], pos = decode_varint(raw, pos)
+
         elif (msg_type == MSG_TYPE_DATA):
-            handle_msg_data(msg)
+            msg['payload'] = json.loads(raw[pos:])
+            pos = len(raw)
 
-    except IOError as error:
-        log_warn('Falha ao receber mensagem de: ' + msg.get('source') if msg.get('source') else '?')
-        log_warn(error)
-        log_debug(msg)
+        elif (msg_type == MSG_TYPE_HELLO):
+            msg['interval'], pos = decode_varint(raw, pos)
+            msg['multiplier'], pos = decode_varint(raw, pos)
+            if (not msg['interval'] or not msg['multiplier']):
+                raise IOError('Hello Message: Interval and multiplier should be positive ints')
 
-    except Exception as error:
-        log_error(error)
-        log_debug(raw_msg)
+        if (pos != len(raw)):
+            raise IOError('Binary Message: Unexpected message length')
+        return msg
+
+    except (IndexError, struct.error, OSError, ValueError) as error:
+        if (type(error) == IOError):
+            raise error
+        raise IOError('Binary Message: Malformed message (' + str(error) + ')')
+
+
+'''
+=================================================================
+-- Declarar funcoes do arquivo de estado (reinicio a quente) ----
+=================================================================
+
+    Layout: [cabecalho][endereco proprio][vizinho]*[rota]*[crc32]
+    - Registros de tamanho fixo (leitura direta / via mmap): Enderecos com 4 bytes (IPv4) OU 16 bytes (IPv6, com BIN_FLAG_IPV6);
+    - Vizinho: endereco + peso do enlace (uint32);
+    - Rota: destino + vizinho que a informou + peso (uint32) + idade em ms (uint32) no instante da gravacao;
+'''
+
+'''
+    Retorna estruturas dos registros de vizinhos & rotas para 01 tamanho de endereco.
+'''
+def get_state_records(addr_len: int) -> tuple:
+    return struct.Struct('!' + str(addr_len) + 'sI'), struct.Struct('!' + str(addr_len) + 's' + str(addr_len) + 'sII')
 
 '''
-    Thread para atualizacao periodica da tabela de roteamento:
-    - Atualiza a idade de cada rota conhecida;
-    - Remove da tabela rotas desatualizadas;
-    - Envia mensagens de update para atualizacao de rotas dos vizinhos;
+    Serializa estado de 01 roteador: Vizinhos (endereco, peso) + rotas aprendidas (destino, vizinho, peso, idade em segundos).
+    - Entradas de familia de endereco diferente da do roteador sao ignoradas;
 '''
-def thread_update_table(pi: float) -> None:
+def encode_state(address: str, neighbors: list, routes: list, saved_at: float) -> bytes:
 
-    log_info('Ready to send update messages from: ' + address + ':' + str(PORT) + '...')
-    
-    while not should_stop_threads:
-        time.sleep(pi)
-        
-        for addr_dest in routing_table.keys():
-            clear_outdated_routes(addr_dest)
-            if (routing_table.get(addr_dest).get('is_neighbor')):
-                send_msg_update(addr_dest)
+    is_ipv6 = ':' in address
+    neighbor_record, route_record = get_state_records(16 if is_ipv6 else 4)
 
-        clear_outdated_destinations()
+    neighbors_bin = [neighbor_record.pack(pack_addr(addr), weight) for addr, weight in neighbors if (':' in addr) == is_ipv6]
+    routes_bin = [
+        route_record.pack(pack_addr(addr_dest), pack_addr(addr_src), weight, min(0xFFFFFFFF, int(age * 1000)))
+        for addr_dest, addr_src, weight, age in routes if (':' in addr_dest) == is_ipv6 and (':' in addr_src) == is_ipv6
+    ]
+
+    header = STATE_HEADER.pack(STATE_MAGIC, STATE_VERSION, BIN_FLAG_IPV6 if is_ipv6 else 0, 0, saved_at, len(neighbors_bin), len(routes_bin))
+    raw = b''.join([header, pack_addr(address)] + neighbors_bin + routes_bin)
+    return raw + STATE_CHECKSUM.pack(zlib.crc32(raw))
 
 '''
-    Thread para recebimento de mensagens de roteadores vizinhos.
+    Desserializa estado de 01 roteador. Retorna (endereco, instante da gravacao, vizinhos, rotas) nos mesmos formatos de 'encode_state'.
 '''
-def thread_listen_msgs() -> None:
+def decode_state(raw: bytes) -> tuple:
     try:
-        addr_family = socket.AF_INET if get_ip_version(address) == 4 else socket.AF_INET6
-        listenerFD = socket.socket(addr_family, socket.SOCK_DGRAM)
-        listenerFD.bind((address, PORT))
 
-        log_info('Listening for update messages at: ' + address + ':' + str(PORT) + '...')
+        if (len(raw) < STATE_HEADER.size + STATE_CHECKSUM.size or STATE_CHECKSUM.unpack_from(raw, len(raw) - STATE_CHECKSUM.size)[0] != zlib.crc32(raw[:-STATE_CHECKSUM.size])):
+            raise IOError('State file: Corrupted OR truncated file')
 
-        while not should_stop_threads:
-            raw_msg = listenerFD.recv(BUF_SIZE)
-            handle_msg(raw_msg)
+        magic, version, flags, _, saved_at, neighbors_count, routes_count = STATE_HEADER.unpack_from(raw, 0)
+        if (magic != STATE_MAGIC or version != STATE_VERSION):
+            raise IOError('State file: Unknown format OR version')
 
-    except socket.error as error:
-        log_error('Update message listener failed to start')
-        if (is_log_level_valid(LOG_LEVEL_DEBUG)):
-            raise error
+        addr_len = 16 if flags & BIN_FLAG_IPV6 else 4
+        neighbor_record, route_record = get_state_records(addr_len)
+        pos = STATE_HEADER.size + addr_len
+        if (pos + neighbors_count * neighbor_record.size + routes_count * route_record.size + STATE_CHECKSUM.size != len(raw)):
+            raise IOError('State file: Unexpected file length')
 
-    finally:
-        listenerFD.close()
+        neighbors = []
+        for addr, weight in neighbor_record.iter_unpack(raw[pos:pos + neighbors_count * neighbor_record.size]):
+            neighbors.append((unpack_addr(addr), weight))
+        pos += neighbors_count * neighbor_record.size
+
+        routes = []
+        for addr_dest, addr_src, weight, age in route_record.iter_unpack(raw[pos:pos + routes_count * route_record.size]):
+            routes.append((unpack_addr(addr_dest), unpack_addr(addr_src), weight, age / 1000))
+
+        return unpack_addr(raw[STATE_HEADER.size:STATE_HEADER.size + addr_len]), saved_at, neighbors, routes
+
+    except (struct.error, OSError, ValueError) as error:
+        if (type(error) == IOError):
+            raise error
+        raise IOError('State file: Malformed file (' + str(error) + ')')
 
 '''
-    Executa encerramento das threads abertas
+    Grava 01 arquivo de forma atomica: Conteudo vai para arquivo temporario (sincronizado em disco) que entao substitui o original.
+    - Leitores (OU 01 reinicio apos queda) veem sempre a versao anterior completa OU a nova completa;
 '''
-def threads_finish_em_all() -> bool:
-    should_stop_threads = True
-    while update_sender.is_alive() or update_listener.is_alive():
-        time.sleep(.001)
-    return True
+def write_file_atomic(path: str, raw: bytes) -> None:
+
+    path_tmp = path + '.tmp'
+    with open(path_tmp, 'wb') as file:
+        file.write(raw)
+        file.flush()
+        os.fsync(file.fileno())
+
+    os.replace(path_tmp, path)
+
 
 '''
 =================================================================
--- Loop principal -----------------------------------------------
+-- Declarar funcoes do dominio do problema ----------------------
 =================================================================
 '''
 
-print('\nRunning...\n')
-log_hint('Type "' + COMMAND_HELP + ' (' + '|'.join([COMMAND_ADD, COMMAND_DEL, COMMAND_TRACE]) + ')?" for instructions;')
-log_hint('Type "' + COMMAND_QUIT + '" to quit;')
+'''
+    Exibe instrucoes de uso de comando: Inicializacao do programa
+'''
+def print_instructions_init() -> None:
+    print('Initialization command formats:')
+    print('\t- 01: "router.py <IP: string> <pi: float>"')
+    print('\t- 02: "router.py <IP: string> <pi: float> <startup_file: string>')
+    print('\t- 03: "router.py --addr <IP: string> --update-period <pi: float>')
+    print('\t- 04: "router.py --addr <IP: string> --update-period <pi: float> --startup-commands <startup_file: string>')
+    print('Optional arguments (any format):')
+    print('\t' + ARG_NAME_ENGINE + ' <' + '|'.join(ENGINE_LIST) + '> (default: ' + ENGINE_THREADS + ')')
+    print('\t' + ARG_NAME_WIRE_FORMAT + ' <' + '|'.join(WIRE_FORMAT_LIST) + '> (default: ' + WIRE_FORMAT_JSON + ')')
+    print('\t' + ARG_NAME_MTU + ' <bytes: int> (max update datagram size, ' + str(MIN_MTU) + ' to ' + str(MAX_MTU) + ', default: ' + str(MTU) + ')')
+    print('\t' + ARG_NAME_RECV_BUFFER + ' <bytes: int> (receive buffer size, up to ' + str(MAX_BUF_SIZE) + ', default: ' + str(BUF_SIZE) + ')')
+    print('\t' + ARG_NAME_SOCKET_BUFFER + ' <bytes: int> (kernel socket receive buffer, SO_RCVBUF, capped by the system, default: system)')
+    print('\t' + ARG_NAME_MULTIPATH + ' <' + '|'.join(MULTIPATH_LIST) + '> (data & trace forwarding over several next hops, default: ' + MULTIPATH_ECMP + ')')
+    print('\t' + ARG_NAME_VARIANCE + ' <factor: float> (weighted multipath: use routes up to factor x the best weight, default: ' + str(MULTIPATH_VARIANCE) + ')')
+    print('\t' + ARG_NAME_TRACE_MODE + ' <' + '|'.join(TRACE_MODE_LIST) + '> (traces follow the best route OR flood every link, default: ' + TRACE_MODE_DIRECTED + ')')
+    print('\t' + ARG_NAME_UPDATE_SCHEDULE + ' <' + '|'.join(UPDATE_SCHEDULE_LIST) + '> (full updates every 3 periods OR stretched up to 12 while the table is stable, default: ' + UPDATE_SCHEDULE_FIXED + ')')
+    print('\t' + ARG_NAME_STATE_FILE + ' <state_file: string> (warm restart: table is saved to & restored from this file, default: none)')
+    print('\t' + ARG_NAME_HELLO_INTERVAL + ' <seconds: float> (hello probes to every neighbor: dead neighbors are detected within interval x multiplier, default: 0, disabled)')
+    print('\t' + ARG_NAME_HELLO_MULTIPLIER + ' <int> (hello intervals without hellos before a neighbor is considered dead, default: ' + str(HELLO_DETECT_MULTIPLIER) + ')')
+    print('\t' + ARG_NAME_STATS_PORT + ' <port: int> (stats in a scrapeable text format at http://' + STATS_HTTP_HOST + ':<port>/metrics, default: none)')
+    print('\t' + ARG_NAME_STATS_SOCKET + ' <socket_path: string> (same stats on a UNIX socket, one dump per connection, default: none)')
+    print('\t' + ARG_NAME_PROFILE + ' <report_file: string> (samples every thread; report & hot path timers written on quit OR on SIGUSR1, default: none)')
+    print('\t' + ARG_NAME_LOG_LEVEL + ' <' + '|'.join(LOG_LEVEL_NAMES.values()) + '> (minimum level of log records, default: ' + LOG_LEVEL_NAMES[LOG_LEVEL] + ')')
+    print('\t' + ARG_NAME_LOG_FILE + ' <log_file: string> (log records are appended as JSON lines; the terminal keeps only hints, warnings & errors, default: none)')
 
-cli_arguments = None
+'''
+    Exibe instrucoes de uso de comando: Adicao de roteaodr.
+'''
+def print_instructions_add() -> None:
+    print(COMMAND_ADD + ' command format:')
+    print('\t' + COMMAND_ADD + ' <IP: string> <weight: int>"')
 
-try:
+'''
+    Exibe instrucoes de uso de comando: Remocao de roteaodr.
+'''
+def print_instructions_del() -> None:
+    print(COMMAND_DEL + ' command format:')
+    print('\t' + COMMAND_DEL + ' <IP: string>')
 
-    cli_arguments = get_cli_params()
-    address = cli_arguments.addr
+'''
+    Exibe instrucoes de uso de comando: Rastreamento de roteaodr.
+'''
+def print_instructions_trace() -> None:
+    print(COMMAND_TRACE + ' command format:')
+    print('\t' + COMMAND_TRACE + ' <IP: string>')
 
-    # Thread: Acoes de atualizacao da tabela de roteamento
-    update_sender = Thread(target=thread_update_table, args=(cli_arguments.pi,))
-    update_sender.start()
+'''
+    Centraliza chamadas para exibicao de instrucoes de uso.
+'''
+def print_instructions(help_command: str) -> None:
 
-    # Thread: ESCUTAR msgs de update
-    update_listener = Thread(target=thread_listen_msgs)
-    update_listener.start()
+    print('\nInstructions:')
+
+    if (not help_command or help_command == COMMAND_INIT):
+        print_instructions_init()
+    if (not help_command or help_command == COMMAND_ADD):
+        print_instructions_add()
+    if (not help_command or help_command == COMMAND_DEL):
+        print_instructions_del()
+    if (not help_command or help_command == COMMAND_TRACE):
+        print_instructions_trace()
+
+'''
+    Extrai (removendo da lista) 01 argumento opcional nominal da linha de comando.
+'''
+def pop_cli_option(argv: list, arg_name: str, default: str = None) -> str:
+
+    if (not arg_name in argv):
+        return default
+
+    i = argv.index(arg_name)
+    if (i + 1 >= len(argv)):
+        raise IOError('Argument ' + arg_name + ' requires a value')
+
+    value = argv[i + 1]
+    del argv[i:i + 2]
+    return value
+
+'''
+Valida & retorna parametros de linha de comando ('argv' no formato de sys.argv, padrao: sys.argv).
+
+'''
+def get_cli_params(argv: list = None) -> object:
+
+    # Argumentos opcionais podem aparecer em qualquer posicao
+    argv = list(sys.argv if argv == None else argv)
+
+    engine = pop_cli_option(argv, ARG_NAME_ENGINE, ENGINE_THREADS)
+    if (not engine in ENGINE_LIST):
+        raise IOError('Invalid engine "' + engine + '" (valid options: ' + ', '.join(ENGINE_LIST) + ')')
+
+    wire = pop_cli_option(argv, ARG_NAME_WIRE_FORMAT, WIRE_FORMAT_JSON)
+    if (not wire in WIRE_FORMAT_LIST):
+        raise IOError('Invalid wire format "' + wire + '" (valid options: ' + ', '.join(WIRE_FORMAT_LIST) + ')')
+
+    multipath = pop_cli_option(argv, ARG_NAME_MULTIPATH, MULTIPATH_ECMP)
+    if (not multipath in MULTIPATH_LIST):
+        raise IOError('Invalid multipath mode "' + multipath + '" (valid options: ' + ', '.join(MULTIPATH_LIST) + ')')
+
+    trace_mode = pop_cli_option(argv, ARG_NAME_TRACE_MODE, TRACE_MODE_DIRECTED)
+    if (not trace_mode in TRACE_MODE_LIST):
+        raise IOError('Invalid trace mode "' + trace_mode + '" (valid options: ' + ', '.join(TRACE_MODE_LIST) + ')')
+
+    update_schedule = pop_cli_option(argv, ARG_NAME_UPDATE_SCHEDULE, UPDATE_SCHEDULE_FIXED)
+    if (not update_schedule in UPDATE_SCHEDULE_LIST):
+        raise IOError('Invalid update schedule "' + update_schedule + '" (valid options: ' + ', '.join(UPDATE_SCHEDULE_LIST) + ')')
+
+    log_level_name = pop_cli_option(argv, ARG_NAME_LOG_LEVEL, LOG_LEVEL_NAMES[LOG_LEVEL])
+    log_levels = { name: level for level, name in LOG_LEVEL_NAMES.items() }
+    if (not log_level_name in log_levels):
+        raise IOError('Invalid log level "' + log_level_name + '" (valid options: ' + ', '.join(log_levels) + ')')
+
+    stats_path = pop_cli_option(argv, ARG_NAME_STATS_SOCKET, '')
+    try:
+        stats_port = int(pop_cli_option(argv, ARG_NAME_STATS_PORT, '0'))
+    except ValueError:
+        raise IOError('Argument ' + ARG_NAME_STATS_PORT + ' must be an integer')
+    if (not 0 <= stats_port <= 65535):
+        raise IOError('Argument ' + ARG_NAME_STATS_PORT + ' must be between 1 and 65535')
+
+    log_path = pop_cli_option(argv, ARG_NAME_LOG_FILE, '')
+    if (log_path and os.path.isdir(log_path)):
+        raise IOError('Argument ' + ARG_NAME_LOG_FILE + ' must be a file path')
+
+    profile_path = pop_cli_option(argv, ARG_NAME_PROFILE, '')
+    if (profile_path and os.path.isdir(profile_path)):
+        raise IOError('Argument ' + ARG_NAME_PROFILE + ' must be a file path')
+
+    state_path = pop_cli_option(argv, ARG_NAME_STATE_FILE, '')
+    if (state_path and os.path.isdir(state_path)):
+        raise IOError('Argument ' + ARG_NAME_STATE_FILE + ' must be a file path')
+
+    try:
+        variance = float(pop_cli_option(argv, ARG_NAME_VARIANCE, str(MULTIPATH_VARIANCE)))
+    except ValueError:
+        raise IOError('Argument ' + ARG_NAME_VARIANCE + ' must be a number')
+    if (variance < 1):
+        raise IOError('Argument ' + ARG_NAME_VARIANCE + ' must be at least 1')
+
+    try:
+        hello_interval = float(pop_cli_option(argv, ARG_NAME_HELLO_INTERVAL, '0'))
+        hello_multiplier = int(pop_cli_option(argv, ARG_NAME_HELLO_MULTIPLIER, str(HELLO_DETECT_MULTIPLIER)))
+    except ValueError:
+        raise IOError('Argument ' + ARG_NAME_HELLO_INTERVAL + ' must be a number and ' + ARG_NAME_HELLO_MULTIPLIER + ' an integer')
+    if (hello_interval and hello_interval < .001):
+        raise IOError('Argument ' + ARG_NAME_HELLO_INTERVAL + ' must be 0 (disabled) or at least 0.001')
+    if (hello_multiplier < 1):
+        raise IOError('Argument ' + ARG_NAME_HELLO_MULTIPLIER + ' must be at least 1')
+
+    try:
+        mtu_arg = int(pop_cli_option(argv, ARG_NAME_MTU, str(MTU)))
+        recv_buffer = int(pop_cli_option(argv, ARG_NAME_RECV_BUFFER, str(BUF_SIZE)))
+        socket_buffer = int(pop_cli_option(argv, ARG_NAME_SOCKET_BUFFER, '0'))
+    except ValueError:
+        raise IOError('Arguments ' + ARG_NAME_MTU + ', ' + ARG_NAME_RECV_BUFFER + ' and ' + ARG_NAME_SOCKET_BUFFER + ' must be integers')
+
+    if (mtu_arg < MIN_MTU or mtu_arg > MAX_MTU):
+        raise IOError('Argument ' + ARG_NAME_MTU + ' must be between ' + str(MIN_MTU) + ' and ' + str(MAX_MTU))
+    if (recv_buffer < MIN_MTU or recv_buffer > MAX_BUF_SIZE):
+        raise IOError('Argument ' + ARG_NAME_RECV_BUFFER + ' must be between ' + str(MIN_MTU) + ' and ' + str(MAX_BUF_SIZE))
+    if (socket_buffer < 0):
+        raise IOError('Argument ' + ARG_NAME_SOCKET_BUFFER + ' must be a positive int')
+
+    # Detecta formato do comando de incializacao de acordo com a quantidade de argumentos recebidos
+    argsc = len(argv)
+    command_format = 0
+
+    if (argsc <= 5):
+        command_format = argsc - 2
+    elif (argsc == 7):
+        command_format = 4
+
+    if (not command_format in [1, 2, 3, 4]):
+        raise IOError('Invalid number of arguments')
+
+    addr = ''
+    pi = 0
+    startup_path = ''
+
+    # Trata caso de parametros nominais
+
+    if (command_format in [3, 4]):
+
+        if (argv[1] != ARG_NAME_ADDR):
+            raise IOError('Invalid argument at position 1. (Was it supposed to be "' + ARG_NAME_ADDR + '" ?)')
+        if (argv[3] != ARG_NAME_PI):
+            raise IOError('Invalid argument at position 3. (Was it supposed to be "' + ARG_NAME_PI + '" ?)')
+        if (command_format == 4 and argv[5] != ARG_NAME_STARTUP):
+            raise IOError('Invalid argument at position 5. (Was it supposed to be "' + ARG_NAME_STARTUP + '" ?)')
+
+        addr = argv[2]
+        pi = argv[4]
+
+        if (command_format == 4):
+            startup_path = argv[6]
+            if (not startup_path):
+                raise IOError('Argument ' + ARG_NAME_STARTUP + ' requires a file path')
+
+    # Trata caso de parametros implicitos
+    else:
+        pi = argv[2]
+        addr = argv[1]
+        if (argsc > 3):
+            startup_path = argv[3]
+
+    # Validar endereco
+    if (not addr):
+        raise IOError('Address is required')
+    if (not validate_ip(addr)):
+        raise IOError('Invalid address')
+
+    # Validar PI
+    if (not pi):
+        raise IOError('Update period (pi) is required')
+
+    try:
+        pi = float(pi)
+    except ValueError:
+        raise IOError('Invalid update period (must be a number)')
+
+    # Validar arquivo de comandos de inicializacao
+    if (startup_path and not os.path.isfile(startup_path)):
+        raise IOError('Startup commands file not found: ' + startup_path)
+
+    class return_data: pass
+    return_data.addr = addr
+    return_data.pi = pi
+    return_data.startup_path = startup_path
+    return_data.engine = engine
+    return_data.wire_format = wire
+    return_data.mtu = mtu_arg
+    return_data.recv_buffer = recv_buffer
+    return_data.socket_buffer = socket_buffer or None
+    return_data.multipath = multipath
+    return_data.variance = variance
+    return_data.trace_mode = trace_mode
+    return_data.state_path = state_path or None
+    return_data.update_schedule = update_schedule
+    return_data.hello_interval = hello_interval or None
+    return_data.hello_multiplier = hello_multiplier
+    return_data.log_level = log_levels[log_level_name]
+    return_data.log_path = log_path or None
+    return_data.stats_port = stats_port or None
+    return_data.stats_path = stats_path or None
+    return_data.profile_path = profile_path or None
+    return return_data
+
+'''
+    Valida linha para comando de exibir instrucoes.
+'''
+def validate_command_help(command_args: list) -> None:
+
+    argsc = len(command_args)
+    if (argsc > 2):
+        raise IOError(COMMAND_HELP + ' command takes exactly 01 or 02 arguments')
+
+    if (argsc == 2 and not command_args[1] in COMMAND_ROUTER_LIST):
+        raise IOError('Argument 1 is not a valid router command')
+
+'''
+    Avalia & retorna parametros de linha do comando: Add roteador.
+'''
+def get_command_data_add(command_args: list) -> object:
+
+    argsc = len(command_args)
+
+    if (argsc != 3):
+        raise IOError(COMMAND_ADD + ' command takes exactly 03 arguments')
+
+    class return_data: pass
+
+    return_data.addr = command_args[1]
+    if (not validate_ip(return_data.addr)):
+        raise IOError('Invalid IP address')
+
+    try:
+        return_data.weight = int(command_args[2])
+    except ValueError:
+        return_data.weight = 0 # Peso nao numerico: Rejeitado abaixo (como falha de entrada, & nao excecao)
+    if (not 0 < return_data.weight < ROUTE_INFINITY):
+        raise IOError('Weight should be a positive int lower than ' + str(ROUTE_INFINITY))
+
+    return return_data
+
+'''
+    Avalia & retorna parametros de linha do comando: Remover roteador.
+'''
+def get_command_data_del(command_args: list) -> object:
+
+    if (len(command_args) != 2):
+        raise IOError(COMMAND_DEL + ' command takes exactly 02 arguments')
+
+    class return_data: pass
+    return_data.addr = command_args[1]
+    return return_data
+
+'''
+    Avalia & retorna parametros de linha do comando: Rastrear roteador.
+'''
+def get_command_data_trace(command_args: list) -> object:
+
+    if (len(command_args) != 2):
+        raise IOError(COMMAND_TRACE + ' command takes exactly 02 arguments')
+
+    class return_data: pass
+    return_data.target = command_args[1]
+    return return_data
+
+'''
+    Avalia & retorna parametros de linha de 01 comando generico.
+'''
+def get_command_data(command_line: str) -> object:
+
+    command_args = command_line.split()
+    command_type = command_args[0]
+
+    try:
+        if (command_type == COMMAND_ADD):
+            parsed_args = get_command_data_add(command_args)
+        elif (command_type == COMMAND_DEL):
+            parsed_args = get_command_data_del(command_args)
+        elif (command_type == COMMAND_TRACE):
+            parsed_args = get_command_data_trace(command_args)
+
+        else:
+            class parsed_args: pass
+            if (command_type == COMMAND_HELP):
+                validate_command_help(command_args)
+                parsed_args.help_command = command_args[1] if len(command_args) == 2 else None
+            elif (not command_type in [COMMAND_DEBUG_TABLE, COMMAND_STATS, COMMAND_INIT, COMMAND_QUIT]):
+                raise IOError('Invalid command')
+
+        parsed_args.command = command_type
+        return parsed_args
+
+    except IOError as error:
+        print('\n-- Invalid input! >.<\" --')
+        print(error)
+        print_instructions(COMMAND_ADD)
+        print(INPUT_CLI_MSG)
+
+
+'''
+    Validador de mensagens: Dados.
+'''
+def validate_msg_data(msg: dict) -> None:
+    if (msg.get('payload') == None):
+        raise IOError('Data Message: property "payload" is missing')
+
+'''
+    Validador de mensagens: Trace.
+'''
+def validate_msg_trace(msg: dict) -> None:
+
+    hops: list = msg.get('hops')
+
+    if (hops == None):
+        raise IOError('Trace Message: property "hops" is missing')
+    if (type(hops) != list or not len(msg.get('hops'))):
+        raise IOError('Trace Message: Property "hops" must be a non empty list')
+
+    # Campos opcionais: TTL & ID de inundacao
+    for key in ['ttl', 'id']:
+        value = msg.get(key)
+        if (value != None and (type(value) != int or value < 0)):
+            raise IOError('Trace Message: Property "' + key + '" should be a non negative int')
+
+    if (validate_ips(hops)):
+        return
+
+    for i in range(len(hops)):
+        if (type(hops[i]) != str or not validate_ip(hops[i])):
+            raise IOError('Trace Message: Invalid IP address in hops list at ' + str(i) + ' position')
+
+'''
+    Validador de mensagens: Update.
+'''
+def validate_msg_update(msg: dict) -> None:
+
+    distances: dict = msg.get('distances')
+    if (type(distances) != dict):
+        raise IOError('Update Message: Invalid value for distances list (should be of type dict, ' + str(type(distances)) + ' received)')
+
+    # Caminho rapido: Enderecos consultados no cache & pesos verificados em bloco (laco por entrada apenas para detalhar erros)
+    weights = distances.values()
+    is_valid = validate_ips(distances.keys()) and set(map(type, weights)) <= {int} and (not weights or min(weights) > 0)
+
+    for addr_dest in ([] if is_valid else distances.keys()):
+
+        if (not validate_ip(addr_dest)):
+            raise IOError('Update Message: Invalid IP address in distances dict: "' + addr_dest + '"')
+
+        weight = distances.get(addr_dest)
+        if (type(weight) != int or weight <= 0):
+            raise IOError('Update Message: Weight for address ' + addr_dest + ' should be a positive int ("' + str(weight) + '" provided)')
+
+    # Campos opcionais: Updates incrementais
+    seq = msg.get('seq')
+    if (seq != None and (type(seq) != int or seq < 0)):
+        raise IOError('Update Message: Property "seq" should be a non negative int')
+
+    withdrawn = msg.get('withdrawn')
+    if (withdrawn == None):
+        return
+    if (type(withdrawn) != list):
+        raise IOError('Update Message: Property "withdrawn" should be a list')
+    for addr_dest in ([] if validate_ips(withdrawn) else withdrawn):
+        if (type(addr_dest) != str or not validate_ip(addr_dest)):
+            raise IOError('Update Message: Invalid IP address in withdrawn list: "' + str(addr_dest) + '"')
+
+'''
+    Validador de mensagens: Hello (intervalo em ms & multiplicador de deteccao).
+'''
+def validate_msg_hello(msg: dict) -> None:
+    for key in ['interval', 'multiplier']:
+        value = msg.get(key)
+        if (type(value) != int or value <= 0):
+            raise IOError('Hello Message: Property "' + key + '" should be a positive int')
+
+'''
+    Encapsula procedimento generico de validacao de mensagens.
+'''
+def validate_msg(msg: dict) -> None:
+
+    # Valida presenca de campos obrigatorios
+    msg_type: str = msg.get('type')
+
+    if (msg_type == None):
+        raise IOError('All Messages must have the "type" property')
+    if (msg.get('source') == None):
+        raise IOError('All Messages must have the "source" property')
+    if (msg.get('destination') == None):
+        raise IOError('All Messages must have the "destination" property')
+
+    # Valida valores dos campos obrigatorios
+    if (not msg_type in [MSG_TYPE_DATA, MSG_TYPE_TRACE, MSG_TYPE_UPDATE, MSG_TYPE_RESYNC, MSG_TYPE_HELLO]):
+        raise IOError('Invalid message type "' + msg_type + '"')
+    if (not validate_ip(msg.get('source'))):
+        raise IOError('Invalid IP address received as "source"')
+    if (not validate_ip(msg.get('destination'))):
+        raise IOError('Invalid IP address received as "destination"')
+
+    # Valida campos especificos de cada tipo de msg
+    if (msg_type == MSG_TYPE_DATA):
+        validate_msg_data(msg)
+    elif (msg_type == MSG_TYPE_TRACE):
+        validate_msg_trace(msg)
+    elif (msg_type == MSG_TYPE_UPDATE):
+        validate_msg_update(msg)
+    elif (msg_type == MSG_TYPE_HELLO):
+        validate_msg_hello(msg)
+
+'''
+    Desserializa & valida 01 msg recebida (binaria OU JSON).
+'''
+def decode_msg(raw_msg: bytes) -> dict:
+
+    # Msgs binarias sao validadas estruturalmente ao serem decodificadas
+    if (raw_msg[:1] == BIN_MAGIC_BYTE):
+        return decode_msg_binary(raw_msg)
+
+    msg = json.loads(raw_msg)
+    validate_msg(msg)
+    return msg
+
+'''
+    Acumula alteracoes de 01 update as ja recebidas do mesmo vizinho no lote (prevalece o valor mais recente de cada destino).
+    - Alteracoes mapeiam destino -> peso (None para destino retirado);
+'''
+def coalesce_update(changes: dict, msg: dict) -> dict:
+    changes.update(msg.get('distances'))
+    for addr_dest in msg.get('withdrawn', []):
+        changes[addr_dest] = None
+    return changes
+
+'''
+    Escolhe o proximo salto de 01 fluxo numa entrada multicaminho da tabela de encaminhamento:
+    - Hash do fluxo (crc32 com semente propria do roteador) cai na faixa de 01 dos proximos saltos (faixas proporcionais as parcelas);
+    - Retorna (vizinho de proximo salto, endereco de socket);
+'''
+def select_next_hop(entry: tuple, flow_key: str, seed: int) -> tuple:
+    return entry[3][bisect.bisect_right(entry[2], zlib.crc32(flow_key.encode(), seed))]
+
+'''
+    Le datagramas de 01 socket para 01 buffer pre-alocado (recv_into), ate 'count' datagramas:
+    - Com 'is_blocking', aguarda o primeiro datagrama; os seguintes sao lidos apenas se ja estiverem na fila do socket;
+    - Cada datagrama eh copiado do buffer com seu tamanho exato (nenhum buffer do tamanho maximo eh alocado por recebimento);
+'''
+def recv_batch(sock: socket.socket, buffer: memoryview, count: int, is_blocking: bool = True) -> list:
+
+    raw_msgs: list = []
+    flags = 0 if is_blocking else RECV_DONTWAIT
+    if (not RECV_DONTWAIT):
+        count = 1
+
+    try:
+        while (len(raw_msgs) < count):
+            size = sock.recv_into(buffer, 0, flags)
+            raw_msgs.append(bytes(buffer[:size]))
+            flags = RECV_DONTWAIT
+    except BlockingIOError:
+        pass
+
+    return raw_msgs
+
+'''
+    Serializa 01 entrada (destino + peso) de vetor de distancias em JSON. Retorna tamanho + entrada serializada.
+'''
+def serialize_entry_json(addr: str, weight: int) -> tuple:
+    entry = '"' + addr + '": ' + str(weight)
+    return len(entry) + 2, entry
+
+'''
+    Serializa 01 entrada (destino + peso) de vetor de distancias no formato binario. Retorna tamanho + entrada serializada.
+'''
+def serialize_entry_bin(addr: str, weight: int) -> tuple:
+    entry = (pack_addr(addr), encode_varint(weight))
+    return len(entry[0]) + len(entry[1]), entry
+
+'''
+    Agrupa entradas serializadas (do mesmo formato) num unico trecho. Retorna tamanho + trecho.
+'''
+def serialize_chunk(entries: list, is_binary: bool) -> tuple:
+    if (is_binary):
+        chunk = (b''.join([entry[0] for size, entry in entries]), b''.join([entry[1] for size, entry in entries]))
+    else:
+        chunk = ', '.join([entry for size, entry in entries])
+    return sum([size for size, entry in entries]), chunk
+
+'''
+    Distribui trechos serializados em fragmentos de ate 'budget' bytes:
+    - Trechos sao (tamanho, trecho serializado, entradas (destino, peso), peso somado as entradas);
+    - Com peso somado None, entradas ja estao serializadas (tamanho, entrada): Vetores grandes nao sao reserializados a cada vizinho;
+    - Trecho que cabe no fragmento atual entra inteiro (sem reserializacao);
+    - Trecho que nao cabe tem suas entradas serializadas & distribuidas individualmente;
+'''
+def split_in_fragments(chunks: list, budget: int, serialize_entry: typing.Callable) -> list:
+
+    fragments: list = []
+    current: list = []
+    size = 0
+
+    for chunk_size, chunk, entries, weight_offset in chunks:
+
+        if (size + chunk_size <= budget):
+            current.append(chunk)
+            size += chunk_size
+            continue
+
+        serialized = entries if weight_offset == None else [serialize_entry(addr, weight_offset + weight) for addr, weight in entries]
+        for entry_size, entry in serialized:
+            if (current and size + entry_size > budget):
+                fragments.append(current)
+                current = []
+                size = 0
+            current.append(entry)
+            size += entry_size
+
+    if (current or not fragments):
+        fragments.append(current)
+    return fragments
+
+'''
+    Retorna tamanho (em bytes) de 01 fragmento de distancias ja serializado.
+'''
+def get_fragment_size(fragment: list, is_binary: bool) -> int:
+    if (is_binary):
+        return sum([len(chunk[0]) + len(chunk[1]) for chunk in fragment])
+    return sum([len(chunk) + 2 for chunk in fragment])
+
+'''
+    Divide 01 lista de destinos retirados em fragmentos de ate 'budget' bytes.
+    - Primeiro fragmento divide o datagrama com 'used' bytes ja ocupados (ex.: ultimo fragmento de distancias); Fica vazio se nada couber;
+'''
+def split_withdrawn_in_fragments(withdrawn: list, budget: int, is_binary: bool, used: int = 0) -> list:
+
+    fragments: list = []
+    current: list = []
+    size = used
+
+    for addr in withdrawn:
+        entry_size = len(pack_addr(addr)) if is_binary else len(addr) + 4
+        if ((current or size) and size + entry_size > budget):
+            fragments.append(current)
+            current = []
+            size = 0
+        current.append(addr)
+        size += entry_size
+
+    if (current):
+        fragments.append(current)
+    return fragments
+
+'''
+    Acrescenta 01 metrica (cabecalhos + amostras) em formato texto (Prometheus) as linhas de estatisticas.
+    - Amostras: Lista de (rotulos, valor); Rotulos mapeiam nome -> valor;
+'''
+def append_stats_metric(lines: list, name: str, metric_type: str, help_text: str, samples: list) -> None:
+
+    lines.append('# HELP ' + name + ' ' + help_text)
+    lines.append('# TYPE ' + name + ' ' + metric_type)
+
+    for labels, value in samples:
+        labels_txt = ','.join([key + '="' + str(label) + '"' for key, label in labels.items()])
+        lines.append(name + ('{' + labels_txt + '}' if labels_txt else '') + ' ' + str(value))
+
+'''
+    Acrescenta 01 histograma em formato texto (Prometheus): Faixas cumulativas + soma + contagem.
+'''
+def append_stats_histogram(lines: list, name: str, help_text: str, labels: dict, histogram: Histogram) -> None:
+
+    lines.append('# HELP ' + name + ' ' + help_text)
+    lines.append('# TYPE ' + name + ' histogram')
+
+    labels_txt = ''.join([key + '="' + str(label) + '",' for key, label in labels.items()])
+    cumulative = 0
+    for bound, count in zip(list(histogram.bounds) + ['+Inf'], histogram.counts):
+        cumulative += count
+        lines.append(name + '_bucket{' + labels_txt + 'le="' + str(bound) + '"} ' + str(cumulative))
+
+    labels_txt = '{' + labels_txt[:-1] + '}' if labels_txt else ''
+    lines.append(name + '_sum' + labels_txt + ' ' + str(round(histogram.total, 6)))
+    lines.append(name + '_count' + labels_txt + ' ' + str(histogram.count))
+
+'''
+    Formata custos de caminhos criticos (caminho -> [chamadas, segundos]) em 01 linha.
+'''
+def format_hot_path_costs(costs: typing.Dict[str, list]) -> str:
+    return ', '.join(['%s %.3f ms (%d calls)' % (hot_path, cost[1] * 1000, cost[0]) for hot_path, cost in sorted(costs.items())]) or 'idle'
+
+
+'''
+=================================================================
+-- Roteador -----------------------------------------------------
+=================================================================
+'''
+
+'''
+    Roteador de vetor de distancias embutivel (todo o estado de 01 roteador pertence a 01 instancia):
+    - Tabelas de roteamento / encaminhamento, estado dos vizinhos & controle de updates sao atributos da instancia;
+    - Ciclo de vida: 'start' (threads) OU 'start_asyncio' / 'attach_loop' (loop de eventos) + 'stop';
+    - API: 'add_neighbor', 'del_neighbor', 'trace' & 'send_data' (mesmas acoes dos comandos da CLI);
+    - Transporte & relogio sao substituiveis (ex.: transporte em memoria & relogio virtual, para simulacao);
+    - Multicaminho: Msgs de dados & trace de 01 mesmo fluxo (origem, destino) seguem sempre pelo mesmo proximo salto, escolhido por hash;
+    - Varias instancias podem coexistir no mesmo processo;
+'''
+class Router:
+
+    def __init__(
+        self, addr: str, pi: float, wire_format: str = WIRE_FORMAT_JSON, mtu: int = MTU, buf_size: int = BUF_SIZE, transport: Transport = None,
+        socket_buffer: int = None, multipath: str = MULTIPATH_ECMP, variance: float = MULTIPATH_VARIANCE, trace_mode: str = TRACE_MODE_DIRECTED,
+        state_path: str = None, update_schedule: str = UPDATE_SCHEDULE_FIXED, hello_interval: float = None, hello_multiplier: int = HELLO_DETECT_MULTIPLIER
+    ) -> None:
+
+        ip_version = get_ip_version(addr)
+        if (not ip_version):
+            raise IOError('Invalid address')
+
+        self.address = addr
+        self.address_family = socket.AF_INET if ip_version == 4 else socket.AF_INET6
+        self.update_period = pi
+        self.wire_format = wire_format
+        self.mtu = mtu
+        self.buf_size = buf_size
+        self.socket_buffer = socket_buffer
+        self.multipath = multipath
+        self.multipath_variance = variance
+        self.flow_hash_seed = zlib.crc32(addr.encode()) # Semente propria: Roteadores vizinhos nao repetem a mesma escolha de caminho
+        self.trace_mode = trace_mode
+        self.traces_seen: collections.OrderedDict = collections.OrderedDict() # (origem, ID) dos rastreamentos por inundacao ja repassados
+        self.state_path = state_path # Arquivo de estado para reinicio a quente (gravado periodicamente & no encerramento)
+        self.saved_table_version: int = None # Versao da tabela & periodo da ultima gravacao do arquivo de estado
+        self.saved_period_count = 0
+
+        self.routing_table: typing.Dict[str, Destination] = {}
+        self.forwarding_table: typing.Dict[str, tuple] = {}
+        self.table_lock = RLock() # Serializa escritores da tabela de roteamento (leitores usam snapshots)
+        self.table_version = 0
+        self.table_snapshot = TableSnapshot(0, {}, (), {})
+        self.snapshot_changes: set = set()
+        self.neighbors_state: typing.Dict[str, NeighborState] = {}
+        self.pending_changes: set = set()
+        self.update_period_count = 0
+        self.update_schedule = update_schedule
+        self.full_update_periods = float(FULL_UPDATE_PERIODS) # Updates periodicos entre 02 completos (varia apenas no modo adaptativo)
+        self.period_table_version = 0 # Versao da tabela no ultimo periodo (mudancas desde entao = instabilidade)
+        self.next_period: float = None
+        self.neighbor_updates: list = [] # Min-heap de (prazo, vizinho): Proximo update periodico de cada vizinho
+        self.neighbor_update_deadlines: typing.Dict[str, float] = {}
+        self.update_vector: UpdateVector = None # Vetor do ultimo snapshot anunciado (reaproveitado enquanto a tabela nao muda)
+        self.schedule_random = random.Random(self.flow_hash_seed) # Defasagem & variacao dos updates periodicos (deterministico por roteador)
+        self.last_triggered_update = 0.0
+        self.hold_downs: typing.Dict[str, HoldDown] = {} # Destinos em quarentena (anunciados como inalcancaveis)
+        self.hold_downs_released: typing.Dict[str, float] = {} # Instante em que cada destino saiu da quarentena (amortecimento de oscilacoes)
+        self.route_losses: typing.Dict[str, float] = {} # Instante da ultima perda / piora de cada destino (reconvergencia em andamento)
+        self.pending_replies: typing.Dict[str, set] = {} # Vizinho -> destinos que ele retirou & que ainda alcancamos por outro caminho (resposta)
+        self.route_timers = RouteTimers(pi, MAX_PERIODS + 2)
+        self.hello_interval = hello_interval # Intervalo (segundos) entre hellos a cada vizinho (None: Deteccao apenas pela expiracao das rotas)
+        self.hello_multiplier = hello_multiplier
+        self.hello_sessions: typing.Dict[str, HelloSession] = {} # Vizinhos dos quais ja recebemos hellos (ativos OU inativos)
+        self.hello_msgs: typing.Dict[str, tuple] = {} # Vizinho -> (formato binario?, hello ja serializado)
+        self.next_hello: float = None
+
+        self.clock: typing.Callable = time.monotonic # Relogio usado pela logica de roteamento (substituivel: loop asyncio, relogio virtual de simulacao)
+        self.sock: socket.socket = None
+        self.transport: Transport = transport
+        self.update_timer: asyncio.TimerHandle = None
+        self.update_loop: asyncio.AbstractEventLoop = None
+        self.triggered_update_timer: asyncio.TimerHandle = None
+        self.triggered_update_deadline = 0.0
+        self.update_trigger = Event()
+        self.update_urgent = Event() # Update disparado pendente ignora intervalo minimo (retiradas de rotas, quarentena & respostas)
+        self.update_sender: Thread = None
+        self.update_listener: Thread = None
+        self.update_handler: Thread = None
+        self.recv_queue: collections.deque = collections.deque() # Lotes de datagramas lidos, aguardando processamento
+        self.recv_queued = 0 # Contadores com 01 unico escritor cada (thread de escuta / thread de processamento)
+        self.recv_handled = 0
+        self.recv_ready = Event()
+        self.recv_dropped = 0
+        self.should_stop_threads = False
+        self.stopped = False # Encerramento ja executado (ver 'stop')
+        self.stats = RouterStats()
+        self.stats_servers: list = [] # Endpoints de estatisticas ativos (HTTP local & / OU socket UNIX)
+
+    def __repr__(self) -> str:
+        return '<Router ' + self.address + '>'
+
+    '''
+        Inclui OU atualiza registro de 01 rota na tabela de roteamento.
+    '''
+    def set_route(self, addr_src: str, addr_dest: str, weight: int, is_neighbor: bool, now: float = None) -> bool:
+
+        destination = self.routing_table.get(addr_dest)
+        if (not destination):
+            destination = Destination(False)
+            self.routing_table[addr_dest] = destination
+
+        # Renovacao de rota ja conhecida com mesmo peso (caso dominante nos updates periodicos): Apenas o prazo de expiracao avanca
+        route = destination.routes.get(addr_src)
+        if (route and route.weight == weight and not is_neighbor):
+            route.last_heard = now if now != None else self.clock()
+            if (addr_src != self.address):
+                self.route_timers.schedule(route, addr_dest, route.last_heard + MAX_PERIODS * self.update_period)
+            return False
+
+        is_new_neighbor = is_neighbor and not destination.is_neighbor
+        if (is_neighbor):
+            destination.is_neighbor = True
+
+        old_weight = route.weight if route else None
+
+        has_best_changed = destination.set_route(addr_src, weight)
+        route = destination.routes[addr_src]
+        route.last_heard = now if now != None else self.clock()
+
+        # Rotas para vizinhos mapeadas por este roteador nao expiram
+        if (addr_src != self.address):
+            self.route_timers.schedule(route, addr_dest, route.last_heard + MAX_PERIODS * self.update_period)
+
+        # Mantem tabela de encaminhamento em sincronia com a melhor rota (& com as rotas alternativas, com multicaminho)
+        if (is_new_neighbor):
+            self.rebuild_forwarding_table()
+        if (is_new_neighbor or (is_neighbor and old_weight != weight)):
+            self.mark_table_changed(addr_dest) # Peso do enlace (anunciado ao vizinho) mudou
+        if (has_best_changed):
+            self.notify_best_route_change(addr_dest)
+        elif (old_weight != weight and self.is_multipath_weight(destination, min(weight, old_weight or weight))):
+            self.update_forwarding_entry(addr_dest)
+
+        return has_best_changed
+
+    '''
+        Remove 01 rota (informada por 01 vizinho especifico) da tabela de roteamento.
+    '''
+    def withdraw_route(self, addr_src: str, addr_dest: str) -> bool:
+
+        destination = self.routing_table.get(addr_dest)
+        route = destination.routes.get(addr_src) if destination else None
+        if (not route):
+            return False
+
+        self.route_timers.cancel(route)
+        has_best_changed = destination.remove_route(addr_src)
+        if (not destination.routes):
+            self.routing_table.pop(addr_dest)
+
+        if (has_best_changed):
+            self.notify_best_route_change(addr_dest)
+        elif (self.is_multipath_weight(destination, route.weight)):
+            self.update_forwarding_entry(addr_dest)
+        return has_best_changed
+
+    '''
+        Propaga mudanca na melhor rota para 01 destino:
+        - Avalia quarentena do destino (ver 'update_hold_down');
+        - Atualiza tabela de encaminhamento;
+        - Enfileira destino para o proximo update incremental & dispara update (ver 'queue_best_route_change');
+    '''
+    def notify_best_route_change(self, addr_dest: str) -> None:
+
+        # Destino que segue em quarentena ja foi anunciado como inalcancavel & esta fora da tabela de encaminhamento
+        is_urgent = self.update_hold_down(addr_dest)
+        if (not is_urgent and addr_dest in self.hold_downs):
+            return
+
+        # Destino sem rotas que ja nao era anunciado (ex.: quarentena encerrada sem rotas): Nada muda para os vizinhos
+        # Entrada de encaminhamento pode ter sido criada apos o ultimo snapshot publicado: Eh removida mesmo assim
+        destination = self.routing_table.get(addr_dest)
+        if (not (destination and destination.best) and not addr_dest in self.hold_downs and not addr_dest in self.table_snapshot.entries):
+            self.forwarding_table.pop(addr_dest, None)
+            return
+
+        # Multicaminho ponderado: Distancia ate 01 vizinho define quais rotas via ele sao livres de loops
+        if (self.multipath == MULTIPATH_WEIGHTED and destination and destination.is_neighbor):
+            self.rebuild_forwarding_table()
+        else:
+            self.update_forwarding_entry(addr_dest)
+
+        self.queue_best_route_change(addr_dest, is_urgent)
+
+    '''
+        Enfileira destino alterado para o proximo update incremental & dispara update:
+        - Com limitacao de taxa; Retiradas, pioras & quarentena seguem de imediato ('is_urgent');
+        - Mudanca na rota para 01 vizinho altera todo o vetor anunciado a ele: Proximo update para ele sera completo;
+    '''
+    def queue_best_route_change(self, addr_dest: str, is_urgent: bool) -> None:
+
+        self.stats.best_route_changes += 1
+        self.pending_changes.add(addr_dest)
+        self.mark_table_changed(addr_dest)
+
+        state = self.neighbors_state.get(addr_dest)
+        if (state):
+            state.needs_full = True
+
+        self.trigger_update(is_urgent)
+
+    '''
+        Informa se 01 rota eh livre de loops em relacao a 01 peso ja anunciado (condicao de viabilidade):
+        - Rota direta para vizinho sempre eh;
+        - Rota aprendida de 01 vizinho eh quando a distancia dele ate o destino eh menor que o peso (anuncio inclui a distancia entre ele & este roteador);
+    '''
+    def is_route_feasible(self, route: Route, distance: int) -> bool:
+
+        if (not route):
+            return False
+        if (route.addr_src == self.address):
+            return True
+
+        neighbor = self.routing_table.get(route.addr_src)
+        return bool(neighbor and neighbor.is_neighbor and neighbor.best) and route.weight - neighbor.best.weight < distance
+
+    '''
+        Avalia quarentena (hold-down) de 01 destino apos mudanca na sua melhor rota OU nas respostas dos vizinhos:
+        - Entra: Melhor rota caiu OU piorou sem alternativa livre de loops (em relacao ao ultimo peso anunciado) & ha vizinhos ativos a consultar;
+        - Sai: Surge rota livre de loops, todos os vizinhos responderam (exceto apos oscilacao) OU o prazo vence;
+        Retorna se a mudanca deve ser anunciada de imediato (retirada, piora, entrada OU saida de quarentena & melhoras logo apos perdas / pioras).
+    '''
+    def update_hold_down(self, addr_dest: str) -> bool:
+
+        destination = self.routing_table.get(addr_dest)
+        best = destination.best if destination else None
+        now = self.clock()
+
+        hold_down = self.hold_downs.get(addr_dest)
+        if (hold_down):
+            is_released = hold_down.deadline <= now or (not hold_down.waiting and not hold_down.is_damped) or self.is_route_feasible(best, hold_down.distance)
+            if (is_released):
+                self.hold_downs.pop(addr_dest)
+                self.hold_downs_released[addr_dest] = now
+            return is_released
+
+        # Rota nova OU melhor: Urgente apenas logo apos perda / piora (reconvergencia nao espera o intervalo minimo a cada salto)
+        entry = self.table_snapshot.entries.get(addr_dest)
+        if (not entry or (best and best.weight <= entry[1])):
+            return addr_dest in self.route_losses
+
+        self.route_losses[addr_dest] = now
+        if (self.is_route_feasible(best, entry[1])):
+            return True
+
+        # Vizinhos ativos devem confirmar (OU retirar) suas rotas antes que 01 rota possivelmente em loop seja aceita
+        timeout = MAX_PERIODS * self.update_period
+        waiting = set(
+            addr for addr, state in self.neighbors_state.items()
+            if state.last_heard != None and state.last_heard + timeout > now and addr in self.routing_table and self.routing_table[addr].is_neighbor
+        )
+
+        released_at = self.hold_downs_released.get(addr_dest)
+        is_damped = released_at != None and released_at + HOLD_DOWN_PERIODS * self.update_period > now
+        if (waiting or is_damped):
+            self.hold_downs[addr_dest] = HoldDown(now + HOLD_DOWN_PERIODS * self.update_period, entry[1], waiting, is_damped)
+            log_debug('Holding down route to %s until neighbors confirm it', addr_dest)
+
+        return True
+
+    '''
+        Registra respostas de 01 vizinho (destinos citados num update) para destinos em quarentena: Avalia saida dos que nao aguardam mais ninguem.
+    '''
+    def handle_hold_down_replies(self, addr_src: str, changes: dict) -> None:
+        for addr_dest in [addr for addr, hold_down in self.hold_downs.items() if addr_src in hold_down.waiting and addr in changes]:
+            hold_down = self.hold_downs[addr_dest]
+            hold_down.waiting.discard(addr_src)
+            if (not hold_down.waiting):
+                self.notify_best_route_change(addr_dest)
+
+    '''
+        Encerra quarentenas com prazo vencido ate 'now' & retorna o prazo da proxima a vencer (None quando nao ha quarentenas).
+    '''
+    def release_expired_hold_downs(self, now: float) -> typing.Union[float, None]:
+
+        with self.table_lock:
+
+            for addr_dest in [addr for addr, hold_down in self.hold_downs.items() if hold_down.deadline <= now]:
+                self.notify_best_route_change(addr_dest)
+
+            # Saidas & perdas antigas nao indicam mais oscilacao / reconvergencia
+            window = HOLD_DOWN_PERIODS * self.update_period
+            for events in [self.hold_downs_released, self.route_losses]:
+                for addr_dest in [addr for addr, instant in events.items() if instant + window <= now]:
+                    events.pop(addr_dest)
+
+            return min([hold_down.deadline for hold_down in self.hold_downs.values()], default=None)
+
+    '''
+        Identifica & rota para 01 determinado destino atraves do vizinho que informou o melhor caminho.
+        - A melhor rota de cada destino eh mantida em cache pela tabela (consulta em O(1));
+    '''
+    def get_best_route(self, addr_dest: str) -> typing.Union[Route, None]:
+        destination = self.routing_table.get(addr_dest)
+        if (destination):
+            return destination.best
+
+    '''
+        Calcula entrada da tabela de encaminhamento (FIB) para 01 destino:
+        - Mapeia destino -> (vizinho de proximo salto, endereco de socket pronto para envio);
+        - Com multicaminho & mais de 01 proximo salto: (melhor vizinho, endereco de socket, limites de hash, proximos saltos) (ver 'select_next_hop');
+        - Destinos sem rota, em quarentena OU cujo proximo salto nao eh vizinho ficam fora da tabela (retorna None);
+    '''
+    def get_forwarding_entry(self, addr_dest: str) -> typing.Union[tuple, None]:
+
+        best_route = self.get_best_route(addr_dest)
+        if (not best_route or addr_dest in self.hold_downs):
+            return None
+
+        next_hop = addr_dest if best_route.addr_src == self.address else best_route.addr_src
+        neighbor = self.routing_table.get(next_hop)
+
+        if (not neighbor or not neighbor.is_neighbor):
+            return None
+
+        new_entry = (next_hop, (next_hop, PORT))
+        destination = self.routing_table[addr_dest]
+        if (self.multipath != MULTIPATH_OFF and len(destination.routes) > 1):
+            new_entry = self.get_multipath_entry(addr_dest, destination) or new_entry
+
+        entry = self.forwarding_table.get(addr_dest)
+        if (entry == new_entry):
+            return entry
+        return new_entry
+
+    '''
+        Retorna peso maximo das rotas usadas para encaminhamento multicaminho de 01 destino (a partir do peso da melhor rota).
+    '''
+    def get_multipath_max_weight(self, best_weight: int) -> float:
+        return best_weight if self.multipath == MULTIPATH_ECMP else best_weight * self.multipath_variance
+
+    '''
+        Informa se 01 rota (nao melhor) com 01 dado peso participa (OU participava) do encaminhamento multicaminho de 01 destino.
+        - Alteracoes em rotas mais caras que o limite nao mudam a entrada da tabela de encaminhamento: Nao ha o que recalcular;
+    '''
+    def is_multipath_weight(self, destination: Destination, weight: int) -> bool:
+        return self.multipath != MULTIPATH_OFF and destination.best != None and weight <= self.get_multipath_max_weight(destination.best.weight)
+
+    '''
+        Calcula entrada multicaminho da tabela de encaminhamento para 01 destino (None se houver 01 unico proximo salto):
+        - ECMP: Rotas empatadas com a melhor, com parcelas iguais do trafego;
+        - Ponderado: Rotas com peso ate 'multipath_variance' x o da melhor, com parcelas inversamente proporcionais ao peso;
+        - Rotas alternativas apenas via vizinhos mais proximos do destino que este roteador (condicao de viabilidade: Nao formam loops);
+        - Proximos saltos ficam ordenados por endereco: Fluxos nao mudam de caminho quando a entrada eh recalculada sem alteracoes;
+    '''
+    def get_multipath_entry(self, addr_dest: str, destination: Destination) -> typing.Union[tuple, None]:
+
+        best = destination.best
+        max_weight = self.get_multipath_max_weight(best.weight)
+        weights: typing.Dict[str, int] = {}
+
+        for route in destination.routes.values():
+
+            if (route.weight > max_weight):
+                continue
+
+            next_hop = addr_dest if route.addr_src == self.address else route.addr_src
+            neighbor = self.routing_table.get(next_hop)
+            if (not neighbor or not neighbor.is_neighbor):
+                continue
+
+            # Distancia do vizinho ate o destino deve ser menor que a nossa (anuncio inclui a distancia entre ele & este roteador)
+            if (route is not best and route.addr_src != self.address and route.weight - neighbor.best.weight >= best.weight):
+                continue
+
+            if (weights.get(next_hop, route.weight + 1) > route.weight):
+                weights[next_hop] = route.weight
+
+        if (len(weights) < 2):
+            return None
+
+        next_hops = sorted(sorted(weights, key=weights.get)[:MAX_PATHS])
+        shares = [1 / weights[next_hop] for next_hop in next_hops]
+        total = sum(shares)
+
+        thresholds = []
+        cumulative = 0.0
+        for share in shares:
+            cumulative += share
+            thresholds.append(int(FLOW_HASH_SPACE * cumulative / total))
+        thresholds[-1] = FLOW_HASH_SPACE
+
+        best_hop = addr_dest if best.addr_src == self.address else best.addr_src
+        return (best_hop, (best_hop, PORT), tuple(thresholds), tuple((next_hop, (next_hop, PORT)) for next_hop in next_hops))
+
+    '''
+        Recalcula entrada da tabela de encaminhamento (FIB) para 01 destino.
+    '''
+    def update_forwarding_entry(self, addr_dest: str) -> None:
+
+        entry = self.get_forwarding_entry(addr_dest)
+        if (not entry):
+            self.forwarding_table.pop(addr_dest, None)
+        elif (self.forwarding_table.get(addr_dest) is not entry):
+            self.forwarding_table[addr_dest] = entry
+
+    '''
+        Recompila toda a tabela de encaminhamento (FIB) a partir da tabela de roteamento.
+        - Necessario apenas quando o conjunto de vizinhos muda;
+        - Nova tabela eh montada a parte & publicada de uma vez (envios concorrentes nunca veem tabela incompleta);
+    '''
+    def rebuild_forwarding_table(self) -> None:
+
+        new_table = {}
+        for addr_dest in list(self.routing_table.keys()):
+            entry = self.get_forwarding_entry(addr_dest)
+            if (entry):
+                new_table[addr_dest] = entry
+
+        self.forwarding_table = new_table
+
+    '''
+        Registra alteracao na tabela de roteamento: Proxima leitura de snapshot publicara nova versao.
+        - Deve ser chamada apenas por escritores (com 'table_lock' adquirido);
+        - Modo adaptativo: Intervalo entre updates completos volta ao padrao (ver 'reset_update_period');
+    '''
+    def mark_table_changed(self, addr_dest: str) -> None:
+        self.snapshot_changes.add(addr_dest)
+        self.table_version += 1
+        self.reset_update_period()
+
+    '''
+        Publica nova versao da tabela de roteamento (copy-on-write):
+        - Copia a versao anterior & aplica apenas destinos alterados desde entao;
+        - Destinos em quarentena ficam fora da versao publicada (anunciados como inalcancaveis);
+        - Versao publicada nunca eh alterada: Leitores a percorrem sem adquirir lock;
+    '''
+    def publish_table_snapshot(self) -> TableSnapshot:
+
+        with self.table_lock:
+
+            if (self.table_snapshot.version == self.table_version):
+                return self.table_snapshot
+
+            entries = dict(self.table_snapshot.entries)
+            is_neighbor_changed = False
+
+            for addr_dest in self.snapshot_changes:
+                destination = self.routing_table.get(addr_dest)
+                best = destination.best if destination else None
+                is_neighbor_changed = is_neighbor_changed or addr_dest in self.table_snapshot.neighbors or (destination != None and destination.is_neighbor)
+
+                if (best and not addr_dest in self.hold_downs):
+                    entries[addr_dest] = (best.addr_src, best.weight)
+                else:
+                    entries.pop(addr_dest, None)
+
+            neighbors = self.table_snapshot.neighbors
+            links = self.table_snapshot.links
+            if (is_neighbor_changed):
+                neighbors = tuple(addr for addr, destination in self.routing_table.items() if destination.is_neighbor)
+                links = {addr: self.routing_table[addr].routes[self.address].weight for addr in neighbors if self.address in self.routing_table[addr].routes}
+
+            self.snapshot_changes.clear()
+            self.table_snapshot = TableSnapshot(self.table_version, entries, neighbors, links)
+            return self.table_snapshot
+
+    '''
+        Retorna versao atual (imutavel) da tabela de roteamento: Publica nova versao apenas se houver alteracoes.
+    '''
+    def get_table_snapshot(self) -> TableSnapshot:
+        snapshot = self.table_snapshot
+        if (snapshot.version == self.table_version):
+            return snapshot
+        return self.publish_table_snapshot()
+
+    '''
+        Remove rotas desatualizadas:
+        - Rotas informadas por algum vizinho que nao tenham sido atualizadas por mais tempo que o limite expiram pela roda de expiracao;
+        - Rotas de vizinhos que seguem enviando updates sequenciados (mesmo que vazios) sao mantidas: Perda de 01 update completo nao as derruba;
+        - Remove da tabela de roteamento destinos para os quais nao restam nenhuma rota;
+    '''
+    def clear_outdated_routes(self) -> None:
+
+        now = self.clock()
+        timeout = MAX_PERIODS * self.update_period
+
+        for addr_dest, route in self.route_timers.pop_expired(now):
+
+            destination = self.routing_table.get(addr_dest)
+            if (not destination or destination.routes.get(route.addr_src) is not route):
+                continue
+
+            # Vizinho com updates sequenciados segue ativo & confirmou a rota desde seu ultimo update completo: Rota continua valida
+            state = self.neighbors_state.get(route.addr_src)
+            is_route_alive = (
+                state and state.seq_in != None and state.last_heard != None
+                and state.last_heard + timeout > now
+                and route.last_heard >= state.full_round_start
+            )
+            if (is_route_alive):
+                self.route_timers.schedule(route, addr_dest, state.last_heard + timeout)
+                continue
+
+            self.stats.expired_routes += 1
+            has_best_changed = destination.remove_route(route.addr_src)
+            if (not destination.routes):
+                log_debug('Forgeting route %s. We haven''t heard of it for too long :(', addr_dest)
+                self.routing_table.pop(addr_dest)
+
+            if (has_best_changed):
+                self.notify_best_route_change(addr_dest)
+            elif (self.is_multipath_weight(destination, route.weight)):
+                self.update_forwarding_entry(addr_dest)
+
+    '''
+        Inclui (OU atualiza peso de) 01 vizinho na rede.
+    '''
+    def add_neighbor(self, addr: str, weight: int) -> None:
+        with self.table_lock:
+            self.hello_sessions.pop(addr, None) # Sessao de hellos recomeca (vizinho inativo volta a ser usado com o novo peso)
+            self.set_route(self.address, addr, weight, True)
+        log_info('Address %s successfully added to routing table...', addr)
+
+    '''
+        Inclui (OU atualiza peso de) varios vizinhos de uma vez: Lista de (endereco, peso).
+        - Tabela de encaminhamento eh recompilada 01 unica vez (& nao 01 vez por vizinho novo);
+        - Registra 01 unica linha de log para todo o lote;
+    '''
+    def add_neighbors(self, neighbors: list) -> None:
+
+        if (not neighbors):
+            return
+
+        with self.table_lock:
+
+            # Destinos ja marcados como vizinhos: 'set_route' nao recompila a tabela de encaminhamento a cada inclusao
+            for addr, _ in neighbors:
+                destination = self.routing_table.get(addr)
+                if (not destination):
+                    destination = Destination(True)
+                    self.routing_table[addr] = destination
+                destination.is_neighbor = True
+
+            for addr, weight in neighbors:
+                self.hello_sessions.pop(addr, None)
+                self.set_route(self.address, addr, weight, True)
+                self.mark_table_changed(addr)
+
+            self.rebuild_forwarding_table()
+
+        log_info('%s addresses successfully added to routing table...', len(neighbors))
+
+    '''
+        Remove 01 vizinho da rede.
+    '''
+    def del_neighbor(self, addr: str) -> None:
+        with self.table_lock:
+            self.del_neighbor_locked(addr)
+
+    '''
+        Remove 01 vizinho da rede (com 'table_lock' adquirido).
+        - Vizinho inativo (sem hellos) ja esta fora da tabela: Apenas deixa de receber hellos;
+    '''
+    def del_neighbor_locked(self, addr: str) -> None:
+
+        self.hello_msgs.pop(addr, None)
+        session = self.hello_sessions.pop(addr, None)
+        if (session and session.is_down):
+            return log_info('Address %s successfully removed from routing table...', addr)
+
+        destination = self.routing_table.get(addr)
+        if (not destination):
+            return log_warn('Address %s does not exist in routing table...', addr)
+
+        if (not destination.is_neighbor):
+            return log_warn('Address %s is not a neighbor one...', addr)
+
+        self.drop_neighbor(addr)
+        log_info('Address %s successfully removed from routing table...', addr)
+
+    '''
+        Retira 01 vizinho da tabela (com 'table_lock' adquirido: Comando del OU vizinho inativo):
+        - Remove a rota direta & todas as rotas aprendidas dele (rotas alternativas para ele, via outros vizinhos, seguem validas);
+        - Destinos que perderam a melhor rota sao anunciados de imediato (retirada OU quarentena), sem aguardar a expiracao das rotas;
+    '''
+    def drop_neighbor(self, addr: str) -> None:
+
+        destination = self.routing_table[addr]
+        destination.is_neighbor = False
+        self.neighbors_state.pop(addr, None)
+        self.pending_replies.pop(addr, None)
+        changed = []
+
+        for addr_dest, destination in list(self.routing_table.items()):
+
+            routes = [route for route in (destination.routes.get(addr), destination.routes.get(self.address) if addr_dest == addr else None) if route]
+            if (not routes):
+                continue
+
+            is_best_removed = destination.best in routes
+            for route in routes:
+                self.route_timers.cancel(route)
+                destination.remove_route(route.addr_src)
+
+            if (not destination.routes):
+                self.routing_table.pop(addr_dest)
+            if (is_best_removed):
+                changed.append(addr_dest)
+
+        # Vizinho removido nao respondera a quarentenas em andamento
+        for addr_dest, hold_down in self.hold_downs.items():
+            hold_down.waiting.discard(addr)
+            if (not hold_down.waiting and not addr_dest in changed):
+                changed.append(addr_dest)
+
+        for addr_dest in changed:
+            self.update_hold_down(addr_dest)
+
+        self.rebuild_forwarding_table()
+        self.mark_table_changed(addr)
+        for addr_dest in changed:
+            self.queue_best_route_change(addr_dest, True)
+
+        self.trigger_update(True)
+
+    '''
+        Retira da tabela 01 vizinho que parou de enviar hellos (peso do enlace fica guardado na sessao para quando ele voltar).
+        - Prazo eh reavaliado sob 'table_lock': Hello recebido nesse meio tempo mantem o vizinho;
+    '''
+    def fail_neighbor(self, addr: str, session: HelloSession, now: float) -> None:
+
+        with self.table_lock:
+            if (session.is_down or session.last_heard + session.detect_time > now or self.hello_sessions.get(addr) is not session):
+                return
+
+            destination = self.routing_table.get(addr)
+            route = destination.routes.get(self.address) if destination and destination.is_neighbor else None
+            if (not route):
+                self.hello_sessions.pop(addr)
+                return
+
+            session.is_down = True
+            session.weight = route.weight
+            self.drop_neighbor(addr)
+
+        log_warn('Neighbor %s is down: No hello for %s ms', addr, round((now - session.last_heard) * 1000))
+
+    '''
+        Devolve a tabela 01 vizinho inativo que voltou a enviar hellos (com o peso que o enlace tinha).
+    '''
+    def restore_neighbor(self, addr: str, session: HelloSession) -> None:
+
+        with self.table_lock:
+            if (not session.is_down or self.hello_sessions.get(addr) is not session):
+                return
+            session.is_down = False
+            self.set_route(self.address, addr, session.weight, True)
+            self.trigger_update(True)
+
+        log_info('Neighbor %s is up again...', addr)
+
+    '''
+        Grava estado atual do roteador (vizinhos + rotas aprendidas, com suas idades) no arquivo de estado.
+        - Coleta eh feita sob 'table_lock'; Serializacao & gravacao, fora dele;
+        - Falha de gravacao nao interrompe o roteador (apenas registrada);
+    '''
+    def save_state(self) -> None:
+
+        if (not self.state_path):
+            return
+
+        with self.table_lock:
+            now = self.clock()
+            table_version = self.table_version
+            neighbors = [(addr, session.weight) for addr, session in self.hello_sessions.items() if session.is_down] # Vizinhos inativos seguem configurados
+            routes = []
+            for addr_dest, destination in self.routing_table.items():
+                for addr_src, route in destination.routes.items():
+                    if (addr_src == self.address):
+                        neighbors.append((addr_dest, route.weight))
+                        continue
+
+                    # Rota confirmada por vizinho ativo (updates sequenciados) eh tao recente quanto seu ultimo update
+                    last_heard = route.last_heard
+                    state = self.neighbors_state.get(addr_src)
+                    if (state and state.last_heard != None and last_heard >= state.full_round_start):
+                        last_heard = max(last_heard, state.last_heard)
+                    routes.append((addr_dest, addr_src, route.weight, max(0, now - last_heard)))
+
+        try:
+            write_file_atomic(self.state_path, encode_state(self.address, neighbors, routes, time.time()))
+            self.saved_table_version = table_version
+            self.saved_period_count = self.update_period_count
+        except OSError as error:
+            log_warn('Failure as saving state file "%s": %s', self.state_path, error)
+
+    '''
+        Restaura estado do roteador a partir do arquivo de estado (reinicio a quente):
+        - Vizinhos sao incluidos de uma vez; Rotas aprendidas, apenas se informadas por 01 vizinho restaurado;
+        - Idade de cada rota = idade gravada + tempo desde a gravacao: Rotas que ja teriam expirado sao descartadas;
+        - Arquivo invalido OU de outro roteador eh ignorado;
+        Retorna True se algum estado foi restaurado.
+    '''
+    def load_state(self, path: str = None) -> bool:
+
+        path = path or self.state_path
+        try:
+            with open(path, 'rb') as file:
+                addr, saved_at, neighbors, routes = decode_state(file.read())
+        except (IOError, OSError) as error:
+            log_warn('Ignoring state file "%s": %s', path, error)
+            return False
+
+        if (addr != self.address):
+            log_warn('Ignoring state file "%s": It belongs to router %s', path, addr)
+            return False
+
+        self.add_neighbors(neighbors)
+
+        downtime = max(0, time.time() - saved_at)
+        timeout = MAX_PERIODS * self.update_period
+        neighbors_addr = set(addr for addr, _ in neighbors)
+        restored = 0
+
+        with self.table_lock:
+            now = self.clock()
+            for addr_dest, addr_src, weight, age in routes:
+                if (not addr_src in neighbors_addr or addr_dest == self.address or age + downtime >= timeout):
+                    continue
+                self.set_route(addr_src, addr_dest, weight, False, now - age - downtime)
+                self.mark_table_changed(addr_dest)
+                restored += 1
+
+        log_info('State restored from "%s": %s neighbors, %s of %s routes', path, len(neighbors), restored, len(routes))
+        return True
+
+    '''
+        Rastreia 01 roteador na rede a partir deste roteador:
+        - Modo direcionado: 01 unica msg segue a melhor rota ate o alvo, salto a salto (como msgs de dados);
+        - Modo inundacao: Msg com ID segue por todos os enlaces (cada roteador a repassa 01 unica vez);
+        - Sem modo informado, usa o modo configurado no roteador;
+    '''
+    def trace(self, addr_target: str, is_flood: bool = None) -> None:
+
+        msg = {
+            'type': MSG_TYPE_TRACE,
+            'source': self.address,
+            'destination': addr_target,
+            'hops': [self.address],
+            'ttl': TRACE_TTL,
+        }
+
+        if (is_flood if is_flood != None else self.trace_mode == TRACE_MODE_FLOOD):
+            msg['id'] = random.getrandbits(31)
+            self.is_trace_seen(msg)
+
+        if (self.forward_msg_trace(msg)):
+            log_info('Trace request successfully sent')
+
+    '''
+        Informa se 01 rastreamento por inundacao ja passou por este roteador (& o registra, caso contrario).
+        - Registro limitado a TRACE_SEEN_CACHE_SIZE rastreamentos (os mais antigos sao esquecidos primeiro);
+    '''
+    def is_trace_seen(self, msg: dict) -> bool:
+
+        key = (msg.get('source'), msg.get('id'))
+        if (key in self.traces_seen):
+            return True
+
+        self.traces_seen[key] = True
+        if (len(self.traces_seen) > TRACE_SEEN_CACHE_SIZE):
+            self.traces_seen.popitem(last=False)
+        return False
+
+    '''
+        Envia 01 msg de rastreamento ao(s) proximo(s) salto(s):
+        - Direcionado: Vizinho da melhor rota ate o alvo (tabela de encaminhamento);
+        - Inundacao: Todos os vizinhos que ainda nao constam entre os saltos percorridos;
+        Retorna se alguma msg foi enviada.
+    '''
+    def forward_msg_trace(self, msg: dict) -> bool:
+
+        if (msg.get('id') == None):
+            return self.send_msg(msg)
+
+        neighbors = [addr for addr in self.get_table_snapshot().neighbors if not addr in msg['hops']]
+        if (not neighbors):
+            log_warn('No neighbors to send trace request')
+            return False
+
+        for addr_neighbor in neighbors:
+            self.send_msg_to(msg, (addr_neighbor, PORT), addr_neighbor)
+        return True
+
+    '''
+        Encapsula procedimento de envio de quaisquer mensagens:
+        - Proximo salto eh obtido da tabela de encaminhamento (FIB);
+        - Com multicaminho, msgs de 01 mesmo fluxo (origem, destino) seguem sempre pelo mesmo proximo salto;
+        Retorna se a msg foi enviada.
+    '''
+    def send_msg(self, msg: dict) -> bool:
+
+        # Define vizinho para o qual essa msg sera enviada
+        addr_target = msg['destination']
+        entry = self.forwarding_table.get(addr_target)
+
+        if (not entry):
+            self.stats.no_route_drops += 1
+            if (not self.get_best_route(addr_target)):
+                log_error('No route known for destination %s', addr_target)
+            else:
+                log_warn('Message to %s won\'t be sent as its next hop is not a neighbor... :(', addr_target)
+            return False
+
+        # Multicaminho: Proximo salto do fluxo (origem, destino) entre os de custo equivalente
+        if (len(entry) > 2):
+            entry = select_next_hop(entry, msg['source'] + '>' + addr_target, self.flow_hash_seed)
+
+        # Envia msg para vizinho que possui a melhor rota para o destino solicitado
+        self.send_msg_to(msg, entry[1], entry[0])
+        return True
+
+    '''
+        Informa se msgs para 01 vizinho devem ser enviadas no formato binario (negociado via updates).
+    '''
+    def is_binary_neighbor(self, addr_neighbor: str) -> bool:
+        if (self.wire_format != WIRE_FORMAT_BINARY):
+            return False
+        state = self.neighbors_state.get(addr_neighbor)
+        return state != None and state.binary
+
+    '''
+        Serializa 01 msg no formato negociado com o vizinho de destino (JSON por padrao).
+    '''
+    def encode_msg(self, msg: dict, addr_neighbor: str = None) -> bytes:
+        if (addr_neighbor and msg['type'] in BIN_TYPE_CODES and self.is_binary_neighbor(addr_neighbor)):
+            try:
+                return encode_msg_binary(msg)
+            except (OSError, ValueError, TypeError):
+                pass
+        return json.dumps(msg).encode()
+
+    '''
+        Encapsula procedimento de envio de quaisquer mensagens diretamente para 01 endereco de socket.
+        - Envio ocorre pelo mesmo socket (ja vinculado a address:PORT) usado para escuta;
+        - Cada sendto de datagrama eh 01 unica chamada de sistema, logo o socket pode ser compartilhado entre as threads;
+    '''
+    def send_msg_to(self, msg: dict, sock_addr: tuple, addr_neighbor: str = None) -> None:
+        try:
+            self.send_raw_msg_to(self.encode_msg(msg, addr_neighbor), sock_addr, msg['type'])
+
+        except socket.error as error:
+            log_error('Failure as sending %s message', msg.get('type'))
+            if (is_log_level_valid(LOG_LEVEL_DEBUG)):
+                raise error
+
+        except Exception as error:
+            log_error(error)
+
+    '''
+        Envia 01 mensagem ja serializada para 01 endereco de socket (contabilizada nas estatisticas pelo seu tipo).
+    '''
+    def send_raw_msg_to(self, raw_msg: bytes, sock_addr: tuple, msg_type: str) -> None:
+        self.transport.sendto(raw_msg, sock_addr)
+        if (self.stats.detailed):
+            self.stats.count_out(msg_type, sock_addr[0], len(raw_msg))
+
+    '''
+        Encapsula procedimento de envio de mensagens: Dados.
+    '''
+    def send_msg_data(self, addr_src: str, add_dest: str, payload) -> None:
+        self.send_msg({
+            'type': MSG_TYPE_DATA,
+            'source': addr_src,
+            'destination': add_dest,
+            'payload': payload,
+        })
+
+    '''
+        Envia 01 msg de dados a partir deste roteador.
+    '''
+    def send_data(self, addr_dest: str, payload) -> None:
+        self.send_msg_data(self.address, addr_dest, payload)
+
+    '''
+        Retorna estado de troca de updates com 01 vizinho (criando-o se necessario).
+        - Criacao ocorre com 'table_lock' adquirido (como a remocao, em 'drop_neighbor'): Estado de vizinho ja removido nao eh recriado;
+        - Para quem nao eh (mais) vizinho, retorna estado avulso (nao registrado);
+    '''
+    def get_neighbor_state(self, addr_neighbor: str) -> NeighborState:
+
+        state = self.neighbors_state.get(addr_neighbor)
+        if (state):
+            return state
+
+        with self.table_lock:
+            state = self.neighbors_state.get(addr_neighbor)
+            if (not state):
+                state = NeighborState()
+                destination = self.routing_table.get(addr_neighbor)
+                if (destination and destination.is_neighbor):
+                    self.neighbors_state[addr_neighbor] = state
+            return state
+
+    '''
+        Encapsula procedimento de envio de mensagens: Update:
+        - Inclui peso para chegar a mim (peso do enlace direto, ver 'UpdateVector.get_fragments');
+        - Update completo: Anuncia todo o vetor de distancias (derivado do vetor calculado para a rodada);
+        - Update incremental: Anuncia apenas destinos alterados (em 'distances') OU retirados (em 'withdrawn');
+        - Poison reverse: Destinos cuja melhor rota foi aprendida do proprio vizinho seguem em 'withdrawn' (peso infinito) tambem nos updates completos;
+        - Vetores que nao cabem na MTU sao divididos em varios datagramas autocontidos;
+        - Cada datagrama leva 01 numero de sequencia por vizinho para que perdas possam ser detectadas;
+        - Em rodadas periodicas ('is_keepalive'), update incremental vazio tambem eh enviado (vizinho sabe que seguimos ativos);
+    '''
+    def send_msg_update(self, addr_dest: str, vector: 'UpdateVector', changes: list = None, is_keepalive: bool = False) -> None:
+
+        link_weight = vector.snapshot.links.get(addr_dest)
+        if (link_weight == None):
+            return log_warn('[update: send] Something wrong isn''t right! No link found for neighbor %s', addr_dest)
+
+        build_start = time.perf_counter()
+        state = self.get_neighbor_state(addr_dest)
+        is_full = changes == None or state.needs_full
+        is_binary = self.is_binary_neighbor(addr_dest)
+        budget = self.mtu - (UPDATE_HEADER_RESERVED_BIN if is_binary else UPDATE_HEADER_RESERVED_JSON)
+        serialize_entry = serialize_entry_bin if is_binary else serialize_entry_json
+
+        if (is_full):
+            fragments = vector.get_fragments(addr_dest, link_weight, budget, is_binary)
+            withdrawn = vector.get_poisoned(addr_dest)
+        else:
+            distances, withdrawn = vector.get_delta(addr_dest, link_weight, changes)
+            if (not distances and not withdrawn and not is_keepalive):
+                return
+            fragments = split_in_fragments([(budget + 1, None, list(distances.items()), 0)], budget, serialize_entry) if distances else []
+
+        state.needs_full = False
+        state.last_sent = self.clock()
+
+        # Destinos retirados completam o datagrama do ultimo fragmento de distancias; O restante segue em datagramas proprios
+        msgs = [(fragment, []) for fragment in fragments]
+        if (withdrawn):
+            withdrawn_fragments = split_withdrawn_in_fragments(withdrawn, budget, is_binary, get_fragment_size(fragments[-1], is_binary) if fragments else 0)
+            if (msgs):
+                msgs[-1] = (fragments[-1], withdrawn_fragments.pop(0))
+            msgs.extend([([], fragment) for fragment in withdrawn_fragments])
+
+        if (not msgs):
+            msgs = [([], [])] # Keepalive: Update vazio apenas confirma que nada mudou
+
+        for distances_fragment, withdrawn_fragment in msgs:
+
+            header = {
+                'type': MSG_TYPE_UPDATE,
+                'source': self.address,
+                'destination': addr_dest,
+                'seq': state.seq_out,
+                'full': is_full,
+            }
+            if (withdrawn_fragment):
+                header['withdrawn'] = withdrawn_fragment
+            if (self.wire_format == WIRE_FORMAT_BINARY):
+                header['binary'] = True # Anuncia suporte ao formato binario
+
+            state.seq_out += 1
+
+            # Updates sao enviados diretamente ao vizinho (nunca roteados)
+            try:
+                if (is_binary):
+                    raw_msg = encode_msg_binary(header, (b''.join([chunk[0] for chunk in distances_fragment]), b''.join([chunk[1] for chunk in distances_fragment])))
+                else:
+                    raw_msg = (json.dumps(header)[:-1] + ', "distances": {' + ', '.join(distances_fragment) + '}}').encode()
+                self.send_raw_msg_to(raw_msg, (addr_dest, PORT), MSG_TYPE_UPDATE)
+            except socket.error as error:
+                log_error('Failure as sending %s message', MSG_TYPE_UPDATE)
+                if (is_log_level_valid(LOG_LEVEL_DEBUG)):
+                    raise error
+
+        if (self.stats.detailed):
+            elapsed = time.perf_counter() - build_start
+            self.stats.update_build_time.observe(elapsed)
+            if (self.stats.timed):
+                self.stats.add_time(HOT_PATH_SEND_UPDATE, elapsed)
+
+    '''
+        Encapsula procedimento de envio de mensagens: Pedido de ressincronizacao (update completo).
+    '''
+    def send_msg_resync(self, addr_dest: str) -> None:
+        self.send_msg_to({
+            'type': MSG_TYPE_RESYNC,
+            'source': self.address,
+            'destination': addr_dest,
+        }, (addr_dest, PORT))
+
+    '''
+        Encapsula procedimento de envio de mensagens: Hello, a todos os vizinhos (inclusive inativos, que voltam assim que responderem).
+        - Anuncia o intervalo entre hellos (ms) & o multiplicador: Com eles, o vizinho calcula o prazo para nos dar como inativos;
+        - Hello de cada vizinho eh serializado 01 unica vez (& de novo apenas se o formato negociado com ele mudar);
+    '''
+    def send_hellos(self, neighbors: tuple) -> None:
+
+        addrs = list(neighbors) + [addr for addr, session in list(self.hello_sessions.items()) if session.is_down]
+
+        for addr_dest in addrs:
+
+            is_binary = self.is_binary_neighbor(addr_dest)
+            cached = self.hello_msgs.get(addr_dest)
+            if (not cached or cached[0] != is_binary):
+                msg = {
+                    'type': MSG_TYPE_HELLO,
+                    'source': self.address,
+                    'destination': addr_dest,
+                    'interval': max(1, round(self.hello_interval * 1000)),
+                    'multiplier': self.hello_multiplier,
+                }
+                cached = self.hello_msgs[addr_dest] = (is_binary, self.encode_msg(msg, addr_dest))
+
+            try:
+                self.send_raw_msg_to(cached[1], (addr_dest, PORT), MSG_TYPE_HELLO)
+            except socket.error as error:
+                log_error('Failure as sending %s message', MSG_TYPE_HELLO)
+                if (is_log_level_valid(LOG_LEVEL_DEBUG)):
+                    raise error
+
+    '''
+        Envia updates para todos os vizinhos:
+        - Completos (quando solicitado) OU apenas com destinos alterados desde o ultimo envio (+ respostas pendentes a cada vizinho);
+    '''
+    def send_updates(self, full: bool) -> None:
+
+        self.update_trigger.clear()
+        self.update_urgent.clear()
+
+        # Alteracoes pendentes & versao da tabela sao capturadas juntas: Envio ocorre sem lock sobre 01 snapshot consistente
+        with self.table_lock:
+            changes = list(self.pending_changes)
+            self.pending_changes.clear()
+            replies, self.pending_replies = self.pending_replies, {}
+            snapshot = self.publish_table_snapshot()
+
+        if (not snapshot.neighbors):
+            return
+
+        # Vetor de distancias eh calculado 01 unica vez para todos os vizinhos (respostas seguem apenas para quem retirou a rota)
+        vector = self.get_update_vector(snapshot)
+        for addr_dest in snapshot.neighbors:
+            neighbor_changes = list(replies[addr_dest].union(changes)) if addr_dest in replies else changes
+            self.send_msg_update(addr_dest, vector, None if full else neighbor_changes)
+
+    '''
+        Retorna vetor de distancias de 01 snapshot: Reaproveitado (com suas serializacoes) enquanto a tabela nao muda.
+    '''
+    def get_update_vector(self, snapshot: TableSnapshot) -> UpdateVector:
+        vector = self.update_vector
+        if (not vector or vector.snapshot is not snapshot):
+            vector = self.update_vector = UpdateVector(snapshot, self.address)
+        return vector
+
+    '''
+        Sorteia intervalo ate o proximo update periodico a 01 vizinho: Periodo com variacao aleatoria (nunca maior que pi).
+    '''
+    def get_neighbor_update_interval(self) -> float:
+        return self.update_period * self.schedule_random.uniform(1 - UPDATE_JITTER, 1)
+
+    '''
+        Sincroniza agenda de updates periodicos com o conjunto atual de vizinhos:
+        - Vizinho novo recebe defasagem aleatoria dentro do periodo (updates aos vizinhos ficam espalhados pelo periodo);
+        - Vizinho removido sai da agenda (entradas antigas no heap sao descartadas ao vencer);
+    '''
+    def sync_neighbor_updates(self, neighbors: tuple, now: float) -> None:
+
+        deadlines = self.neighbor_update_deadlines
+        if (len(deadlines) == len(neighbors) and all(addr in deadlines for addr in neighbors)):
+            return
+
+        for addr in set(deadlines) - set(neighbors):
+            deadlines.pop(addr)
+
+        for addr in neighbors:
+            if (not addr in deadlines):
+                deadline = now + self.schedule_random.uniform(0, self.update_period)
+                deadlines[addr] = deadline
+                heapq.heappush(self.neighbor_updates, (deadline, addr))
+
+    '''
+        Modo adaptativo: Ajusta intervalo entre updates completos de acordo com as mudancas na tabela no ultimo periodo.
+        - Tabela estavel: Intervalo alonga gradualmente (ate ADAPTIVE_FULL_PERIODS_MAX updates periodicos);
+        - Tabela mudando: Intervalo cai pela metade (ate ADAPTIVE_FULL_PERIODS_MIN: Todo update periodico eh completo);
+    '''
+    def adapt_update_period(self) -> None:
+
+        is_stable = self.table_version == self.period_table_version
+        self.period_table_version = self.table_version
+        if (self.update_schedule != UPDATE_SCHEDULE_ADAPTIVE):
+            return
+
+        if (is_stable):
+            self.full_update_periods = min(ADAPTIVE_FULL_PERIODS_MAX, self.full_update_periods * ADAPTIVE_FULL_PERIODS_STEP)
+        else:
+            self.full_update_periods = max(ADAPTIVE_FULL_PERIODS_MIN, self.full_update_periods / 2)
+
+    '''
+        Modo adaptativo: Qualquer mudanca na tabela (ver 'mark_table_changed') volta na hora o intervalo entre updates completos ao padrao.
+        - Intervalo alongado por 01 longo periodo estavel nao atrasa a ressincronizacao dos vizinhos (mudancas seguintes seguem reduzindo o intervalo);
+        - Vale para todo roteador que percebe a mudanca (nao apenas os vizinhos do enlace que caiu);
+    '''
+    def reset_update_period(self) -> None:
+        if (self.update_schedule == UPDATE_SCHEDULE_ADAPTIVE and self.full_update_periods > FULL_UPDATE_PERIODS):
+            self.full_update_periods = float(FULL_UPDATE_PERIODS)
+
+    '''
+        Envia hellos (a cada intervalo, com variacao aleatoria) & detecta vizinhos inativos. Retorna o prazo da proxima acao.
+        - Vizinho sem hellos por mais que o intervalo dele x multiplicador dele eh retirado da tabela (ver 'fail_neighbor');
+    '''
+    def run_hello_schedule(self, now: float, neighbors: tuple) -> float:
+
+        if (self.next_hello == None or now >= self.next_hello):
+            self.send_hellos(neighbors)
+            self.next_hello = now + self.hello_interval * self.schedule_random.uniform(1 - HELLO_JITTER, 1)
+
+        next_deadline = self.next_hello
+        for addr, session in list(self.hello_sessions.items()):
+            if (session.is_down):
+                continue
+            deadline = session.last_heard + session.detect_time
+            if (deadline <= now):
+                self.fail_neighbor(addr, session, now)
+            else:
+                next_deadline = min(next_deadline, deadline)
+
+        return next_deadline
+
+    '''
+        Executa acoes periodicas vencidas ate 'now' & retorna o prazo da proxima:
+        - Periodo de atualizacao da tabela (a cada pi): Expiracao de rotas, ajuste do periodo de updates & gravacao de estado;
+        - Update periodico de cada vizinho no seu proprio prazo (completo a cada 'full_update_periods' envios; entre eles, keepalive);
+        - Encerramento de quarentenas com prazo vencido;
+        - Hellos a cada vizinho & deteccao de vizinhos inativos (quando habilitados: 'hello_interval');
+        - Mudancas na tabela seguem por updates disparados (a todos os vizinhos), independentes desta agenda;
+    '''
+    def run_update_schedule(self, now: float) -> float:
+
+        if (self.next_period == None):
+            self.next_period = now + self.update_period
+        if (now >= self.next_period):
+            self.update_table()
+            self.next_period = max(self.next_period + self.update_period, now)
+
+        snapshot = self.get_table_snapshot()
+        self.sync_neighbor_updates(snapshot.neighbors, now)
+
+        queue = self.neighbor_updates
+        deadlines = self.neighbor_update_deadlines
+        while (queue and queue[0][0] <= now):
+
+            deadline, addr = heapq.heappop(queue)
+            if (deadlines.get(addr) != deadline):
+                continue
+
+            interval = self.get_neighbor_update_interval()
+            state = self.get_neighbor_state(addr)
+            is_full = state.periodic_count == 0 or state.periodic_count >= self.full_update_periods
+            state.periodic_count = 1 if is_full else state.periodic_count + 1
+
+            # Keepalive eh dispensado se o vizinho recebeu algum update (disparado) ha pouco
+            if (is_full or state.last_sent == None or state.last_sent < now - interval / 2):
+                self.send_msg_update(addr, self.get_update_vector(snapshot), None if is_full else [], True)
+
+            deadline = max(deadline + interval, now)
+            deadlines[addr] = deadline
+            heapq.heappush(queue, (deadline, addr))
+
+        next_deadline = min(self.next_period, queue[0][0]) if queue else self.next_period
+
+        # Quarentenas vencidas sao encerradas mesmo sem respostas de todos os vizinhos
+        if (self.hold_downs or self.hold_downs_released or self.route_losses):
+            hold_down_deadline = self.release_expired_hold_downs(now)
+            if (hold_down_deadline != None):
+                next_deadline = min(next_deadline, hold_down_deadline)
+
+        if (self.hello_interval):
+            next_deadline = min(next_deadline, self.run_hello_schedule(now, snapshot.neighbors))
+
+        return next_deadline
+
+    '''
+        Envia updates disparados por mudancas nas melhores rotas (fora do ciclo periodico).
+    '''
+    def send_triggered_updates(self) -> None:
+        self.last_triggered_update = self.clock()
+        self.send_updates(False)
+
+    '''
+        Sinaliza necessidade de updates disparados por mudancas:
+        - Envio ocorre na thread / loop de updates, respeitando intervalo minimo entre disparos;
+        - Updates urgentes (retiradas, quarentena & respostas) ignoram o intervalo minimo: Saem assim que a thread / loop de updates os atende;
+    '''
+    def trigger_update(self, is_urgent: bool = False) -> None:
+
+        if (is_urgent):
+            self.update_urgent.set()
+
+        if (not self.update_loop):
+            self.update_trigger.set()
+            return
+
+        now = self.clock()
+        if (self.triggered_update_timer):
+            if (not is_urgent or self.triggered_update_deadline <= now):
+                return
+            self.triggered_update_timer.cancel()
+
+        def on_trigger() -> None:
+            self.triggered_update_timer = None
+            self.send_triggered_updates()
+
+        delay = 0 if self.update_urgent.is_set() else max(0, self.last_triggered_update + TRIGGERED_UPDATE_MIN_INTERVAL - now)
+        self.triggered_update_deadline = now + delay
+        self.triggered_update_timer = self.update_loop.call_later(delay, on_trigger)
+
+    '''
+        Handler para avaliacao de mensgens: Dados.
+    '''
+    def handle_msg_data(self, msg: dict) -> None:
+        if (msg.get('destination') != self.address):
+            self.send_msg_data(msg.get('source'), msg.get('destination'), msg.get('payload'))
+        else:
+            log_info('%s says: %s', msg.get('source'), msg.get('payload'))
+
+    '''
+        Handler para avaliacao de mensgens: Trace.
+    '''
+    def handle_msg_trace(self, msg: dict) -> None:
+
+        # Inundacao: Copias que chegam por outros caminhos sao descartadas
+        if (msg.get('id') != None and self.is_trace_seen(msg)):
+            return log_debug('Discarding duplicate trace from %s', msg.get('source'))
+
+        hops = msg.get('hops') + [self.address]
+
+        # Responde msg de rastreamento (quando alvo for este roteador)
+        if (msg.get('destination') == self.address):
+            reply = { 'type': MSG_TYPE_TRACE, 'source': msg.get('source'), 'destination': self.address, 'hops': hops }
+            return self.send_msg_data(self.address, msg.get('source'), reply)
+
+        # Propaga msg de rastreamento (quando alvo for outro roteador): Sem TTL (roteadores antigos), limite eh a qtd de saltos
+        ttl = (msg.get('ttl') if msg.get('ttl') != None else TRACE_TTL - len(msg.get('hops'))) - 1
+        if (ttl <= 0):
+            return log_warn('Trace from %s to %s dropped: Hop limit exceeded', msg.get('source'), msg.get('destination'))
+
+        msg['hops'] = hops
+        msg['ttl'] = ttl
+        self.forward_msg_trace(msg)
+
+    '''
+        Controle de troca de updates com o vizinho que enviou 01 update (formato, sequencia & atividade).
+        Retorna se o update deve ser aplicado (updates obsoletos OU de quem nao eh vizinho sao descartados).
+    '''
+    def accept_msg_update(self, msg: dict, now: float) -> bool:
+
+        addr_src = msg.get('source')
+        seq = msg.get('seq')
+
+        # Updates de quem nao eh vizinho (ex.: ainda em transito apos 'del') criariam rotas mantidas ate expirarem
+        neighbor = self.routing_table.get(addr_src)
+        if (not neighbor or not neighbor.is_neighbor):
+            log_debug('Discarding update from non neighbor %s', addr_src)
+            return False
+
+        # Negociacao de formato: Vizinho anuncia suporte a msgs binarias em todo update
+        state = self.get_neighbor_state(addr_src)
+        state.binary = msg.get('binary') == True
+
+        # Controle de sequencia (apenas para vizinhos que enviam updates incrementais)
+        if (seq != None):
+            is_full = bool(msg.get('full'))
+
+            if (not is_full and state.seq_in != None and seq <= state.seq_in):
+                log_debug('Discarding stale update from %s', addr_src)
+                return False
+            if (not is_full and (state.seq_in == None or seq != state.seq_in + 1)):
+                log_debug('Missed update(s) from %s. Requesting full resync...', addr_src)
+                self.send_msg_resync(addr_src)
+
+            # Fragmentos de 01 mesmo update completo tem numeros de sequencia consecutivos
+            if (is_full and state.last_full_seq != seq - 1):
+                state.full_round_start = now
+            if (is_full):
+                state.last_full_seq = seq
+
+            state.seq_in = seq
+
+        state.last_heard = now
+        return True
+
+    '''
+        Aplica alteracoes recebidas em updates, agrupadas por vizinho (01 unica aquisicao do lock por lote).
+        - Alteracoes de cada vizinho mapeiam destino -> peso (None OU peso infinito para destino retirado);
+        - Destinos citados contam como resposta do vizinho para destinos em quarentena;
+    '''
+    def apply_updates(self, updates: typing.Dict[str, dict], now: float) -> None:
+        timed = self.stats.timed
+        with self.table_lock:
+
+            for addr_src, changes in updates.items():
+                for addr_dest, weight in changes.items():
+
+                    if (weight != None and weight < ROUTE_INFINITY):
+                        if (addr_dest == self.address):
+                            continue
+                        if (timed):
+                            start = time.perf_counter()
+                            self.set_route(addr_src, addr_dest, weight, False, now)
+                            self.stats.add_time(HOT_PATH_SET_ROUTE, time.perf_counter() - start)
+                        else:
+                            self.set_route(addr_src, addr_dest, weight, False, now)
+                        continue
+
+                    # Vizinho retirou rota que usavamos & seguimos alcancando o destino por outro caminho: Responde a ele (pode estar em quarentena)
+                    destination = self.routing_table.get(addr_dest)
+                    if (destination and addr_src in destination.routes and not self.withdraw_route(addr_src, addr_dest) and destination.best):
+                        self.pending_replies.setdefault(addr_src, set()).add(addr_dest)
+
+                if (self.hold_downs):
+                    self.handle_hold_down_replies(addr_src, changes)
+
+            if (self.pending_replies):
+                self.trigger_update(True)
+
+    '''
+        Handler para avaliacao de mensgens: Pedido de ressincronizacao.
+    '''
+    def handle_msg_resync(self, msg: dict) -> None:
+        self.get_neighbor_state(msg.get('source')).needs_full = True
+        self.trigger_update()
+
+    '''
+        Handler para avaliacao de mensgens: Hello.
+        - Primeiro hello de 01 vizinho inicia a sessao (hellos de quem nao eh vizinho sao ignorados);
+        - Hello de vizinho inativo o devolve a tabela;
+    '''
+    def handle_msg_hello(self, msg: dict, now: float) -> None:
+
+        if (not self.hello_interval):
+            return
+
+        addr_src = msg.get('source')
+        detect_time = msg.get('interval') / 1000 * msg.get('multiplier')
+        session = self.hello_sessions.get(addr_src)
+
+        # Criacao sob 'table_lock' (como a remocao, em 'del_neighbor'): Vizinho removido nesse meio tempo nao ganha sessao
+        if (not session):
+            with self.table_lock:
+                session = self.hello_sessions.get(addr_src)
+                if (not session):
+                    neighbor = self.routing_table.get(addr_src)
+                    if (not neighbor or not neighbor.is_neighbor):
+                        return log_debug('Discarding hello from non neighbor %s', addr_src)
+                    self.hello_sessions[addr_src] = HelloSession(now, detect_time)
+                    return
+
+        session.last_heard = now
+        session.detect_time = detect_time
+        if (session.is_down):
+            self.restore_neighbor(addr_src, session)
+
+    '''
+        Handler generico para avaliacao de mensgens recebidas.
+    '''
+    def handle_msg(self, raw_msg: bytes) -> None:
+        self.handle_msgs([raw_msg])
+
+    '''
+        Handler para avaliacao de 01 lote de mensagens recebidas:
+        - Updates de 01 mesmo vizinho sao agrupados: Apenas o valor mais recente de cada destino eh aplicado;
+        - Demais mensagens sao tratadas na ordem de chegada (updates agrupados ate entao sao aplicados antes delas);
+    '''
+    def handle_msgs(self, raw_msgs: list) -> None:
+
+        stats = self.stats
+        detailed = stats.detailed
+        handle_start = time.perf_counter() if detailed else 0
+        updates: typing.Dict[str, dict] = {}
+        now = self.clock()
+
+        for raw_msg in raw_msgs:
+
+            msg: dict = None
+
+            try:
+                msg = decode_msg(raw_msg)
+                msg_type = msg.get('type')
+                if (detailed):
+                    stats.count_in(msg_type, msg.get('source'), len(raw_msg))
+
+                if (msg_type == MSG_TYPE_UPDATE):
+                    if (self.accept_msg_update(msg, now)):
+                        coalesce_update(updates.setdefault(msg.get('source'), {}), msg)
+                    continue
+
+                # Hellos nao dependem da ordem em relacao aos updates: Nao interrompem o agrupamento
+                if (msg_type == MSG_TYPE_HELLO):
+                    self.handle_msg_hello(msg, now)
+                    continue
+
+                if (updates):
+                    pending_updates, updates = updates, {}
+                    self.apply_updates(pending_updates, now)
+
+                if (msg_type == MSG_TYPE_TRACE):
+                    self.handle_msg_trace(msg)
+                elif (msg_type == MSG_TYPE_DATA):
+                    self.handle_msg_data(msg)
+                elif (msg_type == MSG_TYPE_RESYNC):
+                    self.handle_msg_resync(msg)
+
+            except IOError as error:
+                stats.invalid_msgs += 1
+                log_warn('Falha ao receber mensagem de: %s', msg.get('source') if msg else '?')
+                log_warn(error)
+                log_debug(msg)
+
+            except Exception as error:
+                # JSON malformado (ValueError) tambem eh falha de validacao
+                if (isinstance(error, ValueError)):
+                    stats.invalid_msgs += 1
+                else:
+                    stats.handle_errors += 1
+                log_error(error)
+                log_debug(raw_msg)
+
+        try:
+            if (updates):
+                self.apply_updates(updates, now)
+        except Exception as error:
+            stats.handle_errors += 1
+            log_error(error)
+
+        if (detailed):
+            elapsed = time.perf_counter() - handle_start
+            stats.handle_latency.observe(elapsed)
+            if (stats.timed):
+                stats.add_time(HOT_PATH_HANDLE_MSGS, elapsed)
+
+    '''
+        Executa 01 periodo de atualizacao da tabela de roteamento:
+        - Remove da tabela rotas desatualizadas (apenas as que venceram neste periodo sao visitadas);
+        - Envia a todos os vizinhos mudancas ainda pendentes (sem aguardar o proximo update disparado);
+        - Ajusta intervalo entre updates completos (modo adaptativo) & grava arquivo de estado;
+        - Updates periodicos aos vizinhos seguem agenda propria de cada vizinho ('run_update_schedule');
+    '''
+    def update_table(self) -> None:
+
+        sweep_start = time.perf_counter()
+        with self.table_lock:
+            self.clear_outdated_routes()
+
+        if (self.stats.timed):
+            self.stats.add_time(HOT_PATH_EXPIRY_SWEEP, time.perf_counter() - sweep_start)
+            log_debug('Period %s cost: %s', self.update_period_count, format_hot_path_costs(self.stats.close_period()))
+
+        # Mudancas ainda pendentes (aguardando intervalo minimo entre disparos) seguem junto com o periodo
+        if (self.pending_changes):
+            self.send_updates(False)
+
+        self.adapt_update_period()
+        self.update_period_count += 1
+
+        # Tabela alterada desde a ultima gravacao: Grava ao fim do periodo; Sem alteracoes, apenas renova idades das rotas a cada STATE_SAVE_PERIODS
+        if (self.table_version != self.saved_table_version or self.update_period_count - self.saved_period_count >= STATE_SAVE_PERIODS):
+            self.save_state()
+
+    '''
+        Thread para atualizacao periodica da tabela de roteamento:
+        - Executa periodos de atualizacao & updates periodicos de cada vizinho nos seus prazos;
+        - Entre eles, envia updates disparados por mudancas (respeitando intervalo minimo entre disparos);
+    '''
+    def thread_update_table(self) -> None:
+
+        log_info('Ready to send update messages from: %s:%s...', self.address, PORT)
+        next_update = self.run_update_schedule(self.clock())
+
+        while not self.should_stop_threads:
+
+            now = self.clock()
+            deadline = next_update
+            is_triggered = self.update_trigger.is_set()
+
+            if (is_triggered):
+                deadline = min(deadline, now if self.update_urgent.is_set() else self.last_triggered_update + TRIGGERED_UPDATE_MIN_INTERVAL)
+
+            # Com update disparado aguardando intervalo minimo, apenas 01 update urgente antecipa o envio
+            if (deadline > now):
+                if (is_triggered):
+                    self.update_urgent.wait(deadline - now)
+                else:
+                    self.update_trigger.wait(deadline - now)
+                continue
+
+            if (self.should_stop_threads):
+                break
+
+            if (now >= next_update):
+                next_update = self.run_update_schedule(now)
+            else:
+                self.update_trigger.clear()
+                self.send_triggered_updates()
+
+    '''
+        Thread para recebimento de mensagens de roteadores vizinhos:
+        - Apenas drena o socket em lotes & os enfileira: Processamento lento (rajadas de updates) nao estoura o buffer do socket;
+        - Fila limitada a RECV_QUEUE_SIZE datagramas: Excedentes sao descartados (como faria o socket);
+    '''
+    def thread_listen_msgs(self) -> None:
+        try:
+            log_info('Listening for update messages at: %s:%s...', self.address, PORT)
+
+            while not self.should_stop_threads:
+                raw_msgs = self.transport.recv_batch(self.buf_size, RECV_BATCH_SIZE)
+                if (self.should_stop_threads):
+                    break
+
+                if (self.recv_queued - self.recv_handled + len(raw_msgs) > RECV_QUEUE_SIZE):
+                    self.recv_dropped += len(raw_msgs)
+                    log_debug('Receive queue is full: %s message(s) dropped', len(raw_msgs))
+                    continue
+
+                self.recv_queued += len(raw_msgs)
+                self.recv_queue.append(raw_msgs)
+                self.recv_ready.set()
+
+        except socket.error as error:
+            if (self.should_stop_threads):
+                return
+            log_error('Update message listener failed')
+            if (is_log_level_valid(LOG_LEVEL_DEBUG)):
+                raise error
+
+    '''
+        Thread para processamento de mensagens recebidas:
+        - Processa de uma vez tudo o que foi enfileirado desde a ultima rodada (updates de 01 mesmo vizinho sao agrupados);
+    '''
+    def thread_handle_msgs(self) -> None:
+
+        while not self.should_stop_threads:
+
+            self.recv_ready.wait()
+            self.recv_ready.clear()
+
+            raw_msgs: list = []
+            while (self.recv_queue):
+                batch = self.recv_queue.popleft()
+                raw_msgs.extend(batch)
+            self.recv_handled += len(raw_msgs)
+
+            if (raw_msgs and not self.should_stop_threads):
+                self.handle_msgs(raw_msgs)
+
+    '''
+        Retorna estatisticas do roteador em formato texto (Prometheus): Contadores, histogramas & tamanho atual das tabelas.
+        - Leitura sem lock: Tabelas sao copiadas (operacao atomica) antes de percorridas;
+    '''
+    def get_stats_text(self) -> str:
+
+        stats = self.stats
+        labels = { 'router': self.address }
+        destinations = list(self.routing_table.values())
+        lines: list = []
+
+        for name, help_text, counters, index in [
+            ('router_msgs_in_total', 'Messages received, by type and source', stats.traffic_in, 0),
+            ('router_bytes_in_total', 'Bytes received, by message type and source', stats.traffic_in, 1),
+            ('router_msgs_out_total', 'Messages sent, by type and neighbor', stats.traffic_out, 0),
+            ('router_bytes_out_total', 'Bytes sent, by message type and neighbor', stats.traffic_out, 1),
+        ]:
+            samples = [(dict(labels, type=msg_type, peer=addr), counter[index]) for (msg_type, addr), counter in sorted(list(counters.items()))]
+            append_stats_metric(lines, name, 'counter', help_text, samples)
+
+        for name, metric_type, help_text, value in [
+            ('router_invalid_msgs_total', 'counter', 'Received messages that failed decoding or validation', stats.invalid_msgs),
+            ('router_handle_errors_total', 'counter', 'Unexpected failures while handling received messages', stats.handle_errors),
+            ('router_no_route_drops_total', 'counter', 'Data and trace messages dropped for lack of a route', stats.no_route_drops),
+            ('router_recv_queue_drops_total', 'counter', 'Datagrams dropped because the receive queue was full', self.recv_dropped),
+            ('router_log_drops_total', 'counter', 'Log records dropped because the log queue was full', sum(log_dropped.values())),
+            ('router_best_route_changes_total', 'counter', 'Best route changes announced to neighbors (churn)', stats.best_route_changes),
+            ('router_expired_routes_total', 'counter', 'Routes removed for not being refreshed in time', stats.expired_routes),
+            ('router_table_changes_total', 'counter', 'Routing table changes (table version)', self.table_version),
+            ('router_destinations', 'gauge', 'Destinations in the routing table', len(destinations)),
+            ('router_routes', 'gauge', 'Routes in the routing table, alternates included', sum([len(destination.routes) for destination in destinations])),
+            ('router_neighbors', 'gauge', 'Neighbors in the routing table', len(self.get_table_snapshot().neighbors)),
+            ('router_forwarding_entries', 'gauge', 'Destinations in the forwarding table', len(self.forwarding_table)),
+            ('router_hold_downs', 'gauge', 'Destinations held down', len(self.hold_downs)),
+            ('router_recv_queue_depth', 'gauge', 'Datagrams waiting to be handled', self.recv_queued - self.recv_handled),
+        ]:
+            append_stats_metric(lines, name, metric_type, help_text, [(labels, value)])
+
+        append_stats_histogram(lines, 'router_handle_msgs_seconds', 'Time to handle one batch of received messages', labels, stats.handle_latency)
+        append_stats_histogram(lines, 'router_update_build_seconds', 'Time to build and send one update to one neighbor', labels, stats.update_build_time)
+
+        # Temporizadores de caminhos criticos: Apenas com profiler ativo
+        for name, metric_type, help_text, costs, index in [
+            ('router_hot_path_calls_total', 'counter', 'Timed calls, by hot path', stats.hot_paths, 0),
+            ('router_hot_path_seconds_total', 'counter', 'Time spent, by hot path', stats.hot_paths, 1),
+            ('router_hot_path_last_period_seconds', 'gauge', 'Time spent in the last update period, by hot path', stats.last_period_costs, 1),
+        ]:
+            if (costs):
+                samples = [(dict(labels, path=hot_path), round(cost[index], 6)) for hot_path, cost in sorted(list(costs.items()))]
+                append_stats_metric(lines, name, metric_type, help_text, samples)
+
+        return '\n'.join(lines) + '\n'
+
+    '''
+        Ativa temporizadores de caminhos criticos ('handle_msgs', 'send_msg_update', 'set_route' & varredura de expiracao):
+        - Custo de cada caminho eh acumulado por periodo de atualizacao & registrado (debug) ao fim de cada periodo;
+    '''
+    def enable_hot_path_timers(self) -> None:
+        self.stats.detailed = True
+        self.stats.timed = True
+
+    '''
+        Retorna relatorio dos temporizadores de caminhos criticos: Total desde o inicio & custo no ultimo periodo de atualizacao.
+    '''
+    def get_hot_path_report(self) -> str:
+
+        stats = self.stats
+        lines = ['Hot paths (router ' + self.address + ', ' + str(self.update_period_count) + ' update periods):']
+        lines.append('  %-16s %10s %12s %12s %16s' % ('path', 'calls', 'total ms', 'mean us', 'last period ms'))
+        for hot_path in [HOT_PATH_HANDLE_MSGS, HOT_PATH_SEND_UPDATE, HOT_PATH_SET_ROUTE, HOT_PATH_EXPIRY_SWEEP]:
+            calls, total = stats.hot_paths.get(hot_path, [0, 0.0])
+            last_period = stats.last_period_costs.get(hot_path, [0, 0.0])[1]
+            lines.append('  %-16s %10d %12.3f %12.2f %16.3f' % (hot_path, calls, total * 1000, total * 1e6 / calls if calls else 0, last_period * 1000))
+
+        return '\n'.join(lines) + '\n'
+
+    '''
+        Inicia endpoints de estatisticas (cada 01 com thread propria): HTTP em localhost:'port' & / OU socket UNIX em 'path'.
+        - Sem endpoints (padrao), estatisticas seguem disponiveis pelo comando 'stats' (sem threads extras);
+    '''
+    def start_stats_servers(self, port: int = None, path: str = None) -> None:
+
+        servers = []
+        try:
+            if (port):
+                servers.append((http.server.ThreadingHTTPServer((STATS_HTTP_HOST, port), StatsHTTPHandler), 'http://' + STATS_HTTP_HOST + ':' + str(port) + '/metrics'))
+
+            if (path):
+                if (not hasattr(socketserver, 'ThreadingUnixStreamServer')):
+                    raise IOError('UNIX sockets are not supported on this platform')
+                if (os.path.exists(path) and stat.S_ISSOCK(os.stat(path).st_mode)):
+                    os.unlink(path) # Socket deixado por execucao anterior
+                servers.append((socketserver.ThreadingUnixStreamServer(path, StatsUnixHandler), path))
+
+        except OSError as error:
+            for server, _ in servers:
+                server.server_close()
+            raise IOError('Failure as opening stats endpoint: ' + str(error))
+
+        self.stats.detailed = True
+        for server, endpoint in servers:
+            server.router = self
+            server.daemon_threads = True
+            Thread(target=server.serve_forever, name='stats-server', daemon=True).start()
+            self.stats_servers.append(server)
+            log_info('Serving stats at: %s', endpoint)
+
+    '''
+        Encerra endpoints de estatisticas (removendo o socket UNIX, quando houver).
+    '''
+    def stop_stats_servers(self) -> None:
+
+        for server in self.stats_servers:
+            server.shutdown()
+            server.server_close()
+            if (server.address_family == getattr(socket, 'AF_UNIX', None)):
+                try:
+                    os.unlink(server.server_address)
+                except OSError:
+                    pass
+
+        self.stats_servers = []
+
+    '''
+        Abre o socket UDP do roteador:
+        - Socket unico & de longa duracao, vinculado a address:PORT;
+        - Usado tanto para escuta quanto para envio (porta de origem estavel para os vizinhos);
+    '''
+    def open_socket(self) -> socket.socket:
+        try:
+            sock = socket.socket(self.address_family, socket.SOCK_DGRAM)
+            if (self.socket_buffer):
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.socket_buffer)
+                log_debug('Socket receive buffer: %s bytes', sock.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF))
+            sock.bind((self.address, PORT))
+            return sock
+        except socket.error as error:
+            log_error('Failure as opening router socket at %s:%s', self.address, PORT)
+            raise error
+
+    '''
+        Loop de eventos: Agenda a proxima acao periodica (periodo de atualizacao da tabela OU update periodico de algum vizinho).
+        - Prazos sao absolutos (deadline anterior + intervalo) para que os periodos nao acumulem atrasos;
+    '''
+    def schedule_update_table(self, deadline: float) -> None:
+
+        def on_timer() -> None:
+            self.schedule_update_table(self.run_update_schedule(self.clock()))
+
+        self.update_timer = self.update_loop.call_at(deadline, on_timer)
+
+    '''
+        Inicia o roteador com threads:
+        - Abre o socket UDP do roteador (quando nenhum transporte foi informado);
+        - 01 thread para updates periodicos + 01 thread para escuta + 01 thread para processamento das msgs recebidas;
+    '''
+    def start(self) -> None:
+
+        if (not self.transport):
+            self.sock = self.open_socket()
+            self.transport = SocketTransport(self.sock)
+
+        self.should_stop_threads = False
+        self.stopped = False
+
+        # Thread: Acoes de atualizacao da tabela de roteamento
+        self.update_sender = Thread(target=self.thread_update_table, name='updater')
+        self.update_sender.start()
+
+        # Thread: ESCUTAR msgs de update
+        self.update_listener = Thread(target=self.thread_listen_msgs, name='listener')
+        self.update_listener.start()
+
+        # Thread: PROCESSAR msgs recebidas
+        self.update_handler = Thread(target=self.thread_handle_msgs, name='handler')
+        self.update_handler.start()
+
+    '''
+        Inicia o roteador no loop de eventos asyncio em execucao.
+        - Recebimento & updates periodicos compartilham o loop (sem concorrencia sobre a tabela);
+    '''
+    async def start_asyncio(self) -> None:
+
+        loop = asyncio.get_running_loop()
+        if (not self.sock):
+            self.sock = self.open_socket()
+
+        self.transport, _ = await loop.create_datagram_endpoint(lambda: RouterProtocol(self), sock=self.sock)
+        log_info('Listening for update messages at: %s:%s...', self.address, PORT)
+
+        self.attach_loop(loop)
+        log_info('Ready to send update messages from: %s:%s...', self.address, PORT)
+
+    '''
+        Acopla o roteador a 01 loop de eventos (asyncio OU compativel: call_at, call_later & time):
+        - Relogio do roteador passa a ser o do loop;
+        - Updates periodicos & disparados passam a ser agendados no loop (primeiro periodo em 'deadline');
+    '''
+    def attach_loop(self, loop: asyncio.AbstractEventLoop, deadline: float = None) -> None:
+        self.update_loop = loop
+        self.clock = loop.time
+        self.next_period = deadline if deadline != None else loop.time() + self.update_period
+        self.schedule_update_table(self.next_period)
+
+    '''
+        Encerra o roteador:
+        - Envia 01 datagrama vazio para o proprio socket para desbloquear a thread de escuta & aguarda as threads;
+        - Cancela updates agendados no loop de eventos & fecha o transporte;
+        - Chamadas seguintes nao tem efeito (engine asyncio encerra o roteador tanto no proprio loop quanto em 'main');
+    '''
+    def stop(self) -> None:
+
+        if (self.stopped):
+            return
+
+        self.stopped = True
+        self.should_stop_threads = True
+        self.update_trigger.set()
+        self.update_urgent.set()
+        self.recv_ready.set()
+
+        if (self.update_listener and self.update_listener.is_alive() and self.sock):
+            try:
+                self.sock.sendto(b'', (self.address, PORT))
+            except socket.error:
+                pass
+
+        for thread in [self.update_sender, self.update_listener, self.update_handler]:
+            if (thread and thread.is_alive()):
+                thread.join()
+
+        if (self.update_timer):
+            self.update_timer.cancel()
+        if (self.triggered_update_timer):
+            self.triggered_update_timer.cancel()
+
+        if (self.transport):
+            self.transport.close()
+        if (self.sock):
+            self.sock.close()
+
+        self.stop_stats_servers()
+        self.save_state()
+
+'''
+=================================================================
+-- CLI & engines de execucao ------------------------------------
+=================================================================
+'''
+
+'''
+    Executa comando: Exibir instrucoes.
+'''
+def execute_command_help(command_type: str) -> None:
+    return print_instructions(command_type)
+
+def execute_command_debug_table(router: Router) -> None:
+    print('Routing Table:\n\t', router.get_table_snapshot())
+
+    multipath = {addr_dest: [next_hop for next_hop, _ in entry[3]] for addr_dest, entry in list(router.forwarding_table.items()) if len(entry) > 2}
+    if (multipath):
+        print('Multipath next hops:\n\t', multipath)
+
+    hold_downs = list(router.hold_downs)
+    if (hold_downs):
+        print('Held down (advertised as unreachable):\n\t', hold_downs)
+
+    neighbors_down = [addr for addr, session in list(router.hello_sessions.items()) if session.is_down]
+    if (neighbors_down):
+        print('Neighbors down (no hellos):\n\t', neighbors_down)
+    print(INPUT_CLI_MSG)
+
+'''
+    Executa comando: Exibir estatisticas do roteador (mesmo formato texto do endpoint de estatisticas).
+'''
+def execute_command_stats(router: Router) -> None:
+    print(router.get_stats_text())
+    if (not router.stats.detailed):
+        router.stats.detailed = True
+        print('Per-message counters and latency histograms start now')
+    print(INPUT_CLI_MSG)
+
+'''
+    Avalia & executa 01 linha de comando da CLI sobre 01 roteador.
+    Retorna False quando for solicitado o encerramento do programa.
+'''
+def execute_command(router: Router, command_line: str) -> bool:
+
+    if (not command_line.strip()):
+        return True
+
+    command_data = get_command_data(command_line)
+    if (not command_data):
+        return True
+
+    if (command_data.command == COMMAND_QUIT):
+        return False
+
+    if (command_data.command == COMMAND_HELP):
+        execute_command_help(command_data.help_command)
+    elif (command_data.command == COMMAND_DEBUG_TABLE):
+        execute_command_debug_table(router)
+    elif (command_data.command == COMMAND_STATS):
+        execute_command_stats(router)
+    elif (command_data.command == COMMAND_ADD):
+        router.add_neighbor(command_data.addr, command_data.weight)
+    elif (command_data.command == COMMAND_DEL):
+        router.del_neighbor(command_data.addr)
+    elif (command_data.command == COMMAND_TRACE):
+        router.trace(command_data.target)
+
+    return True
+
+'''
+    Executa comandos do arquivo de inicializacao (mesmo formato da CLI: 01 comando por linha).
+    - Comandos 'add' consecutivos sao aplicados em lote (01 unica aquisicao de lock, recompilacao de tabela & linha de log);
+    Retorna False quando for solicitado o encerramento do programa.
+'''
+def execute_startup_commands(router: Router, path: str) -> bool:
+
+    with open(path, 'r') as file:
+        command_lines = file.read().splitlines()
+
+    neighbors = []
+    for command_line in command_lines:
+
+        command_args = command_line.split()
+        if (not command_args):
+            continue
+        if (len(command_args) == 3 and command_args[0] == COMMAND_ADD):
+            command_data = get_command_data(command_line)
+            if (command_data):
+                neighbors.append((command_data.addr, command_data.weight))
+            continue
+
+        router.add_neighbors(neighbors)
+        neighbors = []
+        if (not execute_command(router, command_line)):
+            return False
+
+    router.add_neighbors(neighbors)
+    return True
+
+'''
+    Engine de execucao: Threads.
+    - 01 thread para updates periodicos + 01 thread para escuta + CLI bloqueante na thread principal;
+'''
+def run_engine_threads(router: Router, startup_path: str = None) -> None:
+    global have_main_loop_started
+
+    router.start()
+    if (startup_path and not execute_startup_commands(router, startup_path)):
+        return
 
     time.sleep(1)
     have_main_loop_started = True
     print(INPUT_CLI_MSG)
 
+    # Le & executa comandos via CLI
+    while (execute_command(router, input())):
+        pass
+
+'''
+    Engine de execucao asyncio: Protocolo de recebimento de datagramas.
+'''
+class RouterProtocol(asyncio.DatagramProtocol):
+
+    def __init__(self, router: Router) -> None:
+        self.router = router
+
+    def datagram_received(self, data: bytes, addr: tuple) -> None:
+        self.router.handle_msg(data)
+
+    def error_received(self, exc: Exception) -> None:
+        log_warn('Router socket error: %s', exc)
+
+'''
+    Engine de execucao asyncio: Le linhas da entrada padrao sem bloquear o loop de eventos.
+'''
+async def read_cli_commands(router: Router, loop: asyncio.AbstractEventLoop) -> None:
+
+    reader = asyncio.StreamReader()
+    read_line = reader.readline
+
+    try:
+        await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+    except ValueError:
+        # Entrada padrao redirecionada de arquivo regular: Nao suporta leitura assincrona
+        read_line = lambda: loop.run_in_executor(None, sys.stdin.buffer.readline)
+
     while (True):
-        
-        # Le comando via CLI
-        command_line = input()
-        command_data = get_command_data(command_line)
-        
-        if (not command_data):
-            continue
+        command_line = await read_line()
+        if (not command_line or not execute_command(router, command_line.decode())):
+            return
 
-        # Executa comando solicitado
-        if (command_data.command == COMMAND_QUIT):
-            break
+'''
+    Engine de execucao: asyncio.
+    - Recebimento, updates periodicos & CLI compartilham 01 unico loop de eventos (sem concorrencia sobre a tabela);
+'''
+async def run_engine_asyncio(router: Router, startup_path: str = None) -> None:
+    global have_main_loop_started
 
-        if (command_data.command == COMMAND_HELP):
-            execute_command_help(command_data.help_command)
-        elif (command_data.command == COMMAND_DEBUG_TABLE):
-            execute_command_debug_table()
-        elif (command_data.command == COMMAND_ADD):
-            execute_command_add(address, command_data.addr, command_data.weight)
-        elif (command_data.command == COMMAND_DEL):
-            execute_command_del(command_data.addr)
-        elif (command_data.command == COMMAND_TRACE):
-            execute_command_trace(address, command_data.target)
-
-    log_info("\n-- THE END --\n")
-
-except Exception as error:
-    
-    log_error("\n--------- FAILURE ---------")
-    log_error(error)
-    
-    if (cli_arguments == None):
-        print_instructions_init()
-    if (is_log_level_valid(LOG_LEVEL_DEBUG)):
-        raise error
+    await router.start_asyncio()
+
+    try:
+        if (startup_path and not execute_startup_commands(router, startup_path)):
+            return
+
+        have_main_loop_started = True
+        print(INPUT_CLI_MSG)
+        await read_cli_commands(router, asyncio.get_running_loop())
+    finally:
+        router.stop()
+
+'''
+=================================================================
+-- Loop principal -----------------------------------------------
+=================================================================
+'''
+
+'''
+    Executa roteador a partir da linha de comando ('argv' no formato de sys.argv: Permite execucao por harnesses externos).
+'''
+def main(argv: list = None) -> None:
+
+    print('\nRunning...\n')
+    log_hint('Type "' + COMMAND_HELP + ' (' + '|'.join([COMMAND_ADD, COMMAND_DEL, COMMAND_TRACE]) + ')?" for instructions;')
+    log_hint('Type "' + COMMAND_QUIT + '" to quit;')
+
+    cli_arguments = None
+    router: Router = None
+
+    try:
+
+        cli_arguments = get_cli_params(argv)
+        configure_logging(cli_arguments.log_level, cli_arguments.log_path)
+
+        router = Router(
+            cli_arguments.addr, cli_arguments.pi, cli_arguments.wire_format, cli_arguments.mtu, cli_arguments.recv_buffer,
+            socket_buffer=cli_arguments.socket_buffer, multipath=cli_arguments.multipath, variance=cli_arguments.variance,
+            trace_mode=cli_arguments.trace_mode, state_path=cli_arguments.state_path,
+            update_schedule=cli_arguments.update_schedule, hello_interval=cli_arguments.hello_interval,
+            hello_multiplier=cli_arguments.hello_multiplier
+        )
+
+        if (cli_arguments.stats_port or cli_arguments.stats_path):
+            router.start_stats_servers(cli_arguments.stats_port, cli_arguments.stats_path)
+
+        if (cli_arguments.profile_path):
+            start_profiling(cli_arguments.profile_path)
+            router.enable_hot_path_timers()
+            # Relatorio parcial sob demanda (ex.: 'kill -USR1 <pid>'): Sinais sao tratados na thread principal
+            if (hasattr(signal, 'SIGUSR1') and current_thread() is main_thread()):
+                signal.signal(signal.SIGUSR1, lambda signum, frame: write_profile([router]))
+
+        # Reinicio a quente: Tabela restaurada antes do primeiro update
+        if (cli_arguments.state_path and os.path.isfile(cli_arguments.state_path)):
+            router.load_state()
+
+        if (cli_arguments.engine == ENGINE_ASYNCIO):
+            asyncio.run(run_engine_asyncio(router, cli_arguments.startup_path))
+        else:
+            run_engine_threads(router, cli_arguments.startup_path)
+
+        log_info("\n-- THE END --\n")
+
+    except Exception as error:
+
+        log_error("\n--------- FAILURE ---------")
+        log_error(error)
+
+        if (cli_arguments == None):
+            print_instructions_init()
+        if (is_log_level_valid(LOG_LEVEL_DEBUG)):
+            raise error
+
+    finally:
+        if (router):
+            router.stop()
+        stop_profiling([router] if router else [])
+        flush_logs()
 
-finally:
-    threads_finish_em_all()
+if (__name__ == "__main__"):
+    main()
     sys.exit()
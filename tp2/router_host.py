@@ -0,0 +1,325 @@
+import sys
+import time
+import heapq
+import random
+import socket
+import typing
+import itertools
+import selectors
+import functools
+
+import router
+import simulator
+
+'''
+    Hospedeiro de roteadores: Varios roteadores virtuais num unico processo & num unico loop de eventos.
+    - Cada roteador eh 01 instancia de router.Router com socket proprio (vinculado a seu endereco), tabelas proprias & estado proprio;
+    - Sockets de todos os roteadores sao multiplexados por 01 unico seletor (epoll, quando disponivel) & lidos em lotes para 01 unico buffer;
+    - Updates periodicos & disparados de todos os roteadores compartilham 01 unica fila de timers;
+    - Arquivo de topologia: Mesmo formato do simulador (atraso & perda sao ignorados: Enlaces sao reais);
+    - CLI: "<addr> <comando>" executa 01 comando do roteador (add, del, trace, table, help) no roteador hospedado em <addr>;
+'''
+
+'''
+=================================================================
+-- Declarar constantes ------------------------------------------
+=================================================================
+'''
+
+ARG_NAME_TOPOLOGY = '--topology'
+ARG_NAME_SEED = '--seed'
+
+USAGE = (
+    'Usage: python3 router_host.py --topology <file> [--update-period 1] [--seed 0]'
+    + ' [--wire-format json|binary] [--mtu 1024] [--recv-buffer 65536] [--socket-buffer <bytes>]'
+)
+
+'''
+=================================================================
+-- Declarar estruturas de dados ---------------------------------
+=================================================================
+'''
+
+'''
+    Timer agendado no loop do hospedeiro (mesma interface de cancelamento do asyncio.TimerHandle).
+'''
+class HostTimer:
+
+    __slots__ = ('when', 'callback', 'args', 'cancelled')
+
+    def __init__(self, when: float, callback: typing.Callable, args: tuple) -> None:
+        self.when = when
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self) -> None:
+        self.cancelled = True
+
+'''
+    Loop de eventos do hospedeiro:
+    - Implementa o subconjunto da interface do loop asyncio usado pelo roteador (time / call_at / call_later);
+    - 01 fila de timers (min-heap) compartilhada por todos os roteadores + 01 seletor para todos os sockets;
+    - Leitores sao callbacks registrados por objeto de arquivo (executados quando ha dados para leitura);
+'''
+class HostLoop:
+
+    __slots__ = ('selector', 'queue', 'counter', 'is_running')
+
+    def __init__(self) -> None:
+        self.selector = selectors.DefaultSelector()
+        self.queue: list = []
+        self.counter = itertools.count()
+        self.is_running = False
+
+    def time(self) -> float:
+        return time.monotonic()
+
+    def call_at(self, when: float, callback: typing.Callable, *args) -> HostTimer:
+        timer = HostTimer(when, callback, args)
+        heapq.heappush(self.queue, (when, next(self.counter), timer))
+        return timer
+
+    def call_later(self, delay: float, callback: typing.Callable, *args) -> HostTimer:
+        return self.call_at(self.time() + delay, callback, *args)
+
+    def add_reader(self, fileobj: typing.Any, callback: typing.Callable) -> None:
+        self.selector.register(fileobj, selectors.EVENT_READ, callback)
+
+    def remove_reader(self, fileobj: typing.Any) -> None:
+        try:
+            self.selector.unregister(fileobj)
+        except (KeyError, ValueError):
+            pass
+
+    def stop(self) -> None:
+        self.is_running = False
+
+    '''
+        Executa timers vencidos ate o instante atual (timers agendados durante a execucao ficam para a proxima volta).
+    '''
+    def run_timers(self) -> None:
+
+        queue = self.queue
+        now = self.time()
+
+        # Vencidos sao retirados antes de executar: Timer que se reagenda ja vencido nao prende o loop (sockets seguem sendo lidos)
+        ready = []
+        while (queue and queue[0][0] <= now):
+            ready.append(heapq.heappop(queue)[2])
+
+        for timer in ready:
+            if (not timer.cancelled):
+                timer.callback(*timer.args)
+
+    '''
+        Executa o loop ate 'stop' ser chamado:
+        - Espera por dados em qualquer socket ate o prazo do proximo timer;
+    '''
+    def run_forever(self) -> None:
+
+        self.is_running = True
+        queue = self.queue
+
+        while (self.is_running):
+
+            # Descarta timers cancelados do topo: Nao devem encurtar a espera
+            while (queue and queue[0][2].cancelled):
+                heapq.heappop(queue)
+
+            timeout = max(0, queue[0][0] - self.time()) if queue else None
+            for key, _ in self.selector.select(timeout):
+                key.data()
+                if (not self.is_running):
+                    return
+
+            self.run_timers()
+
+'''
+    Hospedeiro de roteadores: Roteadores virtuais + seus sockets + loop de eventos compartilhado.
+'''
+class RouterHost:
+
+    def __init__(self, pi: float, wire_format: str = router.WIRE_FORMAT_JSON, mtu: int = router.MTU, buf_size: int = router.BUF_SIZE, seed: int = None, socket_buffer: int = None) -> None:
+        self.pi = pi
+        self.wire_format = wire_format
+        self.mtu = mtu
+        self.buf_size = buf_size
+        self.socket_buffer = socket_buffer
+        self.buffer = memoryview(bytearray(buf_size)) # Buffer de recebimento compartilhado (loop unico: 01 leitura por vez)
+        self.loop = HostLoop()
+        self.random = random.Random(seed)
+        self.routers: typing.Dict[str, router.Router] = {}
+
+    '''
+        Cria 01 roteador virtual:
+        - Abre seu socket (nao bloqueante) & o registra no seletor compartilhado;
+        - Periodo de atualizacao eh defasado aleatoriamente (roteadores nao enviam updates todos ao mesmo tempo);
+    '''
+    def add_router(self, addr: str) -> router.Router:
+
+        if (not router.validate_ip(addr)):
+            raise IOError('Invalid address: ' + addr)
+
+        node = router.Router(addr, self.pi, self.wire_format, self.mtu, self.buf_size, socket_buffer=self.socket_buffer)
+        node.sock = node.open_socket()
+        node.sock.setblocking(False)
+        node.transport = router.SocketTransport(node.sock)
+
+        self.loop.add_reader(node.sock, functools.partial(self.read_msgs, node))
+        node.attach_loop(self.loop, self.loop.time() + self.random.uniform(0, self.pi))
+
+        self.routers[addr] = node
+        return node
+
+    '''
+        Cria enlace entre 02 roteadores virtuais (criados sob demanda): Cada um inclui o outro como vizinho.
+    '''
+    def add_link(self, addr_a: str, addr_b: str, weight: int) -> None:
+
+        for addr in [addr_a, addr_b]:
+            if (not addr in self.routers):
+                self.add_router(addr)
+
+        self.routers[addr_a].add_neighbor(addr_b, weight)
+        self.routers[addr_b].add_neighbor(addr_a, weight)
+
+    '''
+        Le & trata em lote os datagramas pendentes no socket de 01 roteador (ate RECV_BATCH_SIZE por evento).
+    '''
+    def read_msgs(self, node: router.Router) -> None:
+
+        try:
+            raw_msgs = router.recv_batch(node.sock, self.buffer, router.RECV_BATCH_SIZE, False)
+        except socket.error as error:
+            return router.log_warn('Router socket error at %s: %s', node.address, error)
+
+        if (raw_msgs):
+            node.handle_msgs(raw_msgs)
+
+    '''
+        Avalia & executa 01 linha de comando da CLI do hospedeiro ("<addr> <comando>").
+        Retorna False quando for solicitado o encerramento do programa.
+    '''
+    def execute_command(self, command_line: str) -> bool:
+
+        command_args = command_line.split(None, 1)
+        if (not command_args):
+            return True
+        if (command_args[0] == router.COMMAND_QUIT):
+            return False
+
+        node = self.routers.get(command_args[0])
+        if (not node or len(command_args) < 2):
+            print('Command format: <addr> <command> (hosted routers: ' + str(len(self.routers)) + ')')
+            return True
+
+        return router.execute_command(node, command_args[1])
+
+    '''
+        Le 01 linha da entrada padrao (chamado pelo seletor) & a executa.
+    '''
+    def read_cli_command(self) -> None:
+
+        command_line = sys.stdin.readline()
+        if (not command_line):
+            # Fim da entrada: Hospedeiro segue executando sem CLI
+            self.loop.remove_reader(sys.stdin)
+            return
+
+        if (not self.execute_command(command_line)):
+            self.loop.stop()
+
+    '''
+        Executa o hospedeiro ate 'quit' (OU interrupcao).
+    '''
+    def run(self) -> None:
+
+        try:
+            self.loop.add_reader(sys.stdin, self.read_cli_command)
+        except (ValueError, OSError):
+            router.log_warn('Standard input does not support polling: CLI disabled')
+
+        try:
+            self.loop.run_forever()
+        except KeyboardInterrupt:
+            pass
+
+    '''
+        Encerra todos os roteadores virtuais (timers & sockets).
+    '''
+    def stop(self) -> None:
+        for node in self.routers.values():
+            self.loop.remove_reader(node.sock)
+            node.stop()
+
+'''
+=================================================================
+-- Declarar funcoes ---------------------------------------------
+=================================================================
+'''
+
+'''
+    Extrai argumentos de linha de comando do hospedeiro.
+'''
+def get_cli_params() -> object:
+
+    class parsed_args: pass
+    argv = list(sys.argv)
+
+    parsed_args.topology = router.pop_cli_option(argv, ARG_NAME_TOPOLOGY, '')
+    if (not parsed_args.topology):
+        raise IOError('Argument ' + ARG_NAME_TOPOLOGY + ' is required')
+
+    try:
+        parsed_args.pi = float(router.pop_cli_option(argv, router.ARG_NAME_PI, str(simulator.DEFAULT_PI)))
+        parsed_args.seed = int(router.pop_cli_option(argv, ARG_NAME_SEED, '0'))
+        parsed_args.mtu = int(router.pop_cli_option(argv, router.ARG_NAME_MTU, str(router.MTU)))
+        parsed_args.recv_buffer = int(router.pop_cli_option(argv, router.ARG_NAME_RECV_BUFFER, str(router.BUF_SIZE)))
+        parsed_args.socket_buffer = int(router.pop_cli_option(argv, router.ARG_NAME_SOCKET_BUFFER, '0')) or None
+    except ValueError:
+        raise IOError('Invalid numeric argument')
+
+    parsed_args.wire_format = router.pop_cli_option(argv, router.ARG_NAME_WIRE_FORMAT, router.WIRE_FORMAT_JSON)
+    if (not parsed_args.wire_format in router.WIRE_FORMAT_LIST):
+        raise IOError('Invalid wire format "' + parsed_args.wire_format + '"')
+
+    if (len(argv) > 1):
+        raise IOError('Invalid argument: ' + argv[1])
+    if (parsed_args.pi <= 0):
+        raise IOError('Argument ' + router.ARG_NAME_PI + ' must be positive')
+    if (parsed_args.mtu < router.MIN_MTU or parsed_args.mtu > router.MAX_MTU):
+        raise IOError('Argument ' + router.ARG_NAME_MTU + ' must be between ' + str(router.MIN_MTU) + ' and ' + str(router.MAX_MTU))
+    if (parsed_args.recv_buffer < router.MIN_MTU or parsed_args.recv_buffer > router.MAX_BUF_SIZE):
+        raise IOError('Argument ' + router.ARG_NAME_RECV_BUFFER + ' must be between ' + str(router.MIN_MTU) + ' and ' + str(router.MAX_BUF_SIZE))
+
+    return parsed_args
+
+'''
+    Executa hospedeiro a partir da linha de comando.
+'''
+def main() -> None:
+
+    try:
+        args = get_cli_params()
+        links = simulator.read_topology(args.topology)
+    except IOError as error:
+        print(error, file=sys.stderr)
+        print(USAGE, file=sys.stderr)
+        sys.exit(1)
+
+    host = RouterHost(args.pi, args.wire_format, args.mtu, args.recv_buffer, args.seed, args.socket_buffer)
+
+    try:
+        for addr_a, addr_b, weight, _, _ in links:
+            host.add_link(addr_a, addr_b, weight)
+
+        router.log_info('Hosting %s routers (%s links)...', len(host.routers), len(links))
+        router.log_hint('Type "<addr> <command>" to run a router command, "' + router.COMMAND_QUIT + '" to quit;')
+        host.run()
+
+    finally:
+        host.stop()
+
+if (__name__ == "__main__"):
+    main()
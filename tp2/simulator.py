@@ -0,0 +1,502 @@
+import sys
+import json
+import time
+import heapq
+import random
+import typing
+import itertools
+import collections
+
+import router
+
+'''
+    Simulador de redes de roteadores em 01 unico processo:
+    - Cada roteador eh 01 instancia de router.Router (estado isolado por roteador);
+    - Mensagens trafegam por 01 transporte em memoria com atraso, perda & falhas de enlace configuraveis;
+    - Tempo eh virtual: Periodos de atualizacao & atrasos de enlace nao consomem tempo real;
+    - Arquivo de topologia: 01 enlace por linha, no formato "<addr_a> <addr_b> <peso> [<atraso> [<perda>]]" ('#' inicia comentario);
+    - Falhas sao aplicadas em ordem, cada uma apos a rede convergir. Resultado eh impresso como JSON na saida padrao;
+    - Com hellos ('--hello-interval'), falhas sao silenciosas: Os proprios roteadores detectam a queda dos vizinhos;
+'''
+
+'''
+=================================================================
+-- Declarar constantes ------------------------------------------
+=================================================================
+'''
+
+ARG_NAME_TOPOLOGY = '--topology'
+ARG_NAME_PI = '--pi'
+ARG_NAME_DELAY = '--delay'
+ARG_NAME_LOSS = '--loss'
+ARG_NAME_SEED = '--seed'
+ARG_NAME_MAX_TIME = '--max-time'
+ARG_NAME_FAIL_LINK = '--fail-link'
+ARG_NAME_FAIL_NODE = '--fail-node'
+
+DEFAULT_PI = 1.0
+DEFAULT_DELAY = .01
+DEFAULT_MAX_TIME = 600.0
+BURST_WINDOW = .02 # Janela (segundos virtuais) para contagem de rajadas: Maior qtd de datagramas entregues a 01 roteador dentro dela
+
+USAGE = (
+    'Usage: python3 simulator.py ' + '--topology <file> [--pi 1] [--delay 0.01] [--loss 0] [--seed 0]'
+    + ' [--wire-format json|binary] [--mtu 1024] [--multipath ecmp|weighted|off] [--update-schedule fixed|adaptive] [--hello-interval 0] [--max-time 600] [--fail-link <addr_a>,<addr_b>]* [--fail-node <addr>]*'
+)
+
+'''
+=================================================================
+-- Declarar estruturas de dados ---------------------------------
+=================================================================
+'''
+
+'''
+    Timer agendado no relogio virtual (mesma interface de cancelamento do asyncio.TimerHandle).
+'''
+class VirtualTimer:
+
+    __slots__ = ('when', 'callback', 'args', 'cancelled')
+
+    def __init__(self, when: float, callback: typing.Callable, args: tuple) -> None:
+        self.when = when
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self) -> None:
+        self.cancelled = True
+
+'''
+    Relogio virtual + fila de eventos:
+    - Implementa o subconjunto da interface do loop asyncio usado pelo roteador (time / call_at / call_later);
+    - Eventos sao executados em ordem de prazo (empates na ordem de agendamento);
+'''
+class VirtualClock:
+
+    __slots__ = ('now', 'queue', 'counter')
+
+    def __init__(self) -> None:
+        self.now = 0.0
+        self.queue: list = []
+        self.counter = itertools.count()
+
+    def time(self) -> float:
+        return self.now
+
+    def call_at(self, when: float, callback: typing.Callable, *args) -> VirtualTimer:
+        timer = VirtualTimer(max(when, self.now), callback, args)
+        heapq.heappush(self.queue, (timer.when, next(self.counter), timer))
+        return timer
+
+    def call_later(self, delay: float, callback: typing.Callable, *args) -> VirtualTimer:
+        return self.call_at(self.now + delay, callback, *args)
+
+    '''
+        Executa eventos com prazo ate 'deadline' & avanca o relogio ate ele.
+    '''
+    def run_until(self, deadline: float) -> None:
+
+        queue = self.queue
+        while (queue and queue[0][0] <= deadline):
+            when, _, timer = heapq.heappop(queue)
+            if (timer.cancelled):
+                continue
+            self.now = when
+            timer.callback(*timer.args)
+
+        self.now = max(self.now, deadline)
+
+'''
+    Enlace (unidirecional) entre 02 roteadores simulados.
+'''
+class Link:
+
+    __slots__ = ('weight', 'delay', 'loss', 'is_up')
+
+    def __init__(self, weight: int, delay: float, loss: float) -> None:
+        self.weight = weight
+        self.delay = delay
+        self.loss = loss
+        self.is_up = True
+
+'''
+    Transporte em memoria de 01 roteador simulado: Entrega datagramas pela rede simulada (sem sockets).
+'''
+class MemoryTransport(router.Transport):
+
+    __slots__ = ('network', 'addr')
+
+    def __init__(self, network: 'Network', addr: str) -> None:
+        self.network = network
+        self.addr = addr
+
+    def sendto(self, raw_msg: bytes, sock_addr: tuple) -> None:
+        self.network.send(self.addr, sock_addr[0], raw_msg)
+
+    def recv(self, size: int) -> bytes:
+        raise IOError('Memory transport delivers messages through the simulated network (no blocking receive)')
+
+'''
+    Rede simulada: Roteadores + enlaces + relogio virtual + contadores de trafego.
+'''
+class Network:
+
+    def __init__(
+        self, pi: float = DEFAULT_PI, seed: int = 0, wire_format: str = router.WIRE_FORMAT_JSON, mtu: int = router.MTU, multipath: str = router.MULTIPATH_ECMP,
+        update_schedule: str = router.UPDATE_SCHEDULE_FIXED, hello_interval: float = None
+    ) -> None:
+        self.pi = pi
+        self.wire_format = wire_format
+        self.mtu = mtu
+        self.multipath = multipath
+        self.update_schedule = update_schedule
+        self.hello_interval = hello_interval
+        self.clock = VirtualClock()
+        self.random = random.Random(seed)
+        self.routers: typing.Dict[str, router.Router] = {}
+        self.links: typing.Dict[str, typing.Dict[str, Link]] = {}
+        self.failed_routers: set = set()
+        self.msgs = 0
+        self.bytes = 0
+        self.dropped = 0
+        self.recent_deliveries: typing.Dict[str, collections.deque] = {} # Instantes de entrega a cada roteador dentro da janela de rajada
+        self.max_burst = 0
+        self.last_change = 0.0
+        self.saved_log_level = router.LOG_LEVEL
+        router.LOG_LEVEL = router.LOG_LEVEL_OFF # Silencia logs dos roteadores (nivel anterior eh restaurado por 'close')
+
+    '''
+        Encerra a simulacao: Restaura o nivel de log anterior a criacao da rede (demais usuarios do modulo router voltam a registrar logs).
+    '''
+    def close(self) -> None:
+        router.LOG_LEVEL = self.saved_log_level
+
+    '''
+        Cria 01 roteador simulado (com periodo de atualizacao defasado aleatoriamente, como roteadores reais).
+    '''
+    def add_router(self, addr: str) -> router.Router:
+
+        if (not router.validate_ip(addr)):
+            raise IOError('Invalid address: ' + addr)
+
+        node = router.Router(
+            addr, self.pi, self.wire_format, self.mtu, transport=MemoryTransport(self, addr), multipath=self.multipath, update_schedule=self.update_schedule,
+            hello_interval=self.hello_interval
+        )
+
+        # Registra instante da ultima alteracao de tabela (deteccao de convergencia)
+        mark_table_changed = node.mark_table_changed
+        def on_table_changed(addr_dest: str) -> None:
+            self.last_change = self.clock.now
+            mark_table_changed(addr_dest)
+        node.mark_table_changed = on_table_changed
+
+        node.attach_loop(self.clock, self.clock.now + self.random.uniform(0, self.pi))
+        self.routers[addr] = node
+        self.links[addr] = {}
+        return node
+
+    '''
+        Cria enlace bidirecional entre 02 roteadores (criados sob demanda) & o configura em ambas as pontas.
+    '''
+    def add_link(self, addr_a: str, addr_b: str, weight: int, delay: float = DEFAULT_DELAY, loss: float = 0) -> None:
+
+        for addr in [addr_a, addr_b]:
+            if (not addr in self.routers):
+                self.add_router(addr)
+
+        self.links[addr_a][addr_b] = Link(weight, delay, loss)
+        self.links[addr_b][addr_a] = Link(weight, delay, loss)
+
+        self.routers[addr_a].add_neighbor(addr_b, weight)
+        self.routers[addr_b].add_neighbor(addr_a, weight)
+
+    '''
+        Derruba enlace bidirecional: Mensagens passam a ser descartadas.
+        - Com 'detect', as pontas detectam a queda (como perda de portadora) & removem o vizinho (comando del);
+        - Sem 'detect', a queda eh silenciosa: Apenas rotas aprendidas pelo enlace expiram;
+    '''
+    def fail_link(self, addr_a: str, addr_b: str, detect: bool = True) -> None:
+
+        if (not addr_b in self.links.get(addr_a, {})):
+            raise IOError('No link between ' + addr_a + ' and ' + addr_b)
+
+        for addr, addr_neighbor in [(addr_a, addr_b), (addr_b, addr_a)]:
+            self.links[addr][addr_neighbor].is_up = False
+            if (detect and not addr in self.failed_routers):
+                self.routers[addr].del_neighbor(addr_neighbor)
+
+    '''
+        Derruba 01 roteador: Deixa de enviar & receber mensagens.
+        - Com 'detect', seus vizinhos detectam a queda dos enlaces & o removem (comando del);
+    '''
+    def fail_router(self, addr: str, detect: bool = True) -> None:
+
+        node = self.routers.get(addr)
+        if (not node):
+            raise IOError('No router ' + addr)
+
+        for addr_neighbor, link in self.links[addr].items():
+            if (link.is_up):
+                self.fail_link(addr, addr_neighbor, detect)
+
+        self.failed_routers.add(addr)
+        node.stop()
+
+    '''
+        Envia 01 datagrama pelo enlace entre 02 roteadores (sujeito a falhas, perda & atraso).
+    '''
+    def send(self, addr_src: str, addr_dest: str, raw_msg: bytes) -> None:
+
+        self.msgs += 1
+        self.bytes += len(raw_msg)
+
+        link = self.links[addr_src].get(addr_dest)
+        is_lost = (
+            not link or not link.is_up
+            or addr_src in self.failed_routers
+            or (link.loss and self.random.random() < link.loss)
+        )
+        if (is_lost):
+            self.dropped += 1
+            return
+
+        self.clock.call_later(link.delay, self.deliver, addr_dest, raw_msg)
+
+    '''
+        Entrega 01 datagrama ao roteador de destino (& contabiliza a maior rajada recebida por 01 roteador).
+    '''
+    def deliver(self, addr_dest: str, raw_msg: bytes) -> None:
+
+        if (addr_dest in self.failed_routers):
+            return
+
+        deliveries = self.recent_deliveries.get(addr_dest)
+        if (deliveries == None):
+            deliveries = self.recent_deliveries[addr_dest] = collections.deque()
+        deliveries.append(self.clock.now)
+        while (deliveries[0] < self.clock.now - BURST_WINDOW):
+            deliveries.popleft()
+        self.max_burst = max(self.max_burst, len(deliveries))
+
+        self.routers[addr_dest].handle_msg(raw_msg)
+
+    '''
+        Executa a simulacao ate as tabelas pararem de mudar (por 'quiet' segundos virtuais) OU ate 'max_time'.
+        Retorna se a rede convergiu.
+    '''
+    def run_until_converged(self, max_time: float, quiet: float = None) -> bool:
+
+        if (quiet == None):
+            quiet = (router.MAX_PERIODS + 2) * self.pi
+
+        start = self.clock.now
+        deadline = start + max_time
+
+        while (self.clock.now < deadline):
+            self.clock.run_until(min(self.clock.now + self.pi, deadline))
+            if (self.clock.now - max(self.last_change, start) >= quiet):
+                return True
+
+        return False
+
+    '''
+        Calcula menores distancias esperadas (Dijkstra sobre enlaces ativos) a partir de 01 roteador.
+    '''
+    def get_expected_distances(self, addr_src: str) -> typing.Dict[str, int]:
+
+        distances = {addr_src: 0}
+        heap = [(0, addr_src)]
+
+        while (heap):
+            weight, addr = heapq.heappop(heap)
+            if (weight > distances[addr]):
+                continue
+            for addr_next, link in self.links[addr].items():
+                if (not link.is_up or addr_next in self.failed_routers):
+                    continue
+                next_weight = weight + link.weight
+                if (next_weight < distances.get(addr_next, next_weight + 1)):
+                    distances[addr_next] = next_weight
+                    heapq.heappush(heap, (next_weight, addr_next))
+
+        distances.pop(addr_src)
+        return distances
+
+    '''
+        Compara tabelas de todos os roteadores ativos com as menores distancias esperadas.
+        Retorna quantidade de roteadores com tabela divergente.
+    '''
+    def count_wrong_tables(self) -> int:
+
+        wrong = 0
+        for addr, node in self.routers.items():
+            if (addr in self.failed_routers):
+                continue
+            entries = node.get_table_snapshot().entries
+            actual = {addr_dest: weight for addr_dest, (addr_src, weight) in entries.items()}
+            if (actual != self.get_expected_distances(addr)):
+                wrong += 1
+
+        return wrong
+
+'''
+=================================================================
+-- Declarar funcoes ---------------------------------------------
+=================================================================
+'''
+
+'''
+    Le arquivo de topologia: Retorna enlaces (addr_a, addr_b, peso, atraso, perda).
+    - Atraso & perda nao informados na linha assumem os valores padrao recebidos;
+'''
+def read_topology(path: str, delay: float = DEFAULT_DELAY, loss: float = 0) -> list:
+
+    links = []
+    with open(path) as topology_file:
+        for line_number, line in enumerate(topology_file, 1):
+
+            fields = line.split('#')[0].split()
+            if (not fields):
+                continue
+
+            if (len(fields) < 3 or len(fields) > 5):
+                raise IOError('Invalid topology line ' + str(line_number) + ': ' + line.strip())
+
+            try:
+                weight = int(fields[2])
+                link_delay = float(fields[3]) if len(fields) > 3 else delay
+                link_loss = float(fields[4]) if len(fields) > 4 else loss
+            except ValueError:
+                raise IOError('Invalid topology line ' + str(line_number) + ': ' + line.strip())
+
+            links.append((fields[0], fields[1], weight, link_delay, link_loss))
+
+    return links
+
+'''
+    Le arquivo de topologia & monta a rede simulada.
+'''
+def load_topology(network: Network, path: str, delay: float, loss: float) -> None:
+    for addr_a, addr_b, weight, link_delay, link_loss in read_topology(path, delay, loss):
+        network.add_link(addr_a, addr_b, weight, link_delay, link_loss)
+
+'''
+    Executa 01 fase da simulacao (ate convergir) & retorna suas estatisticas.
+'''
+def run_phase(network: Network, name: str, max_time: float) -> dict:
+
+    start = network.clock.now
+    msgs, bytes_count = network.msgs, network.bytes
+    network.max_burst = 0
+    wall_start = time.perf_counter()
+
+    cpu_start = time.process_time()
+
+    # Fase inicia 'sem alteracoes': Tempo de convergencia conta a partir de seu inicio
+    network.last_change = start
+    converged = network.run_until_converged(max_time)
+
+    wall_time = time.perf_counter() - wall_start
+    cpu_time = time.process_time() - cpu_start
+
+    return {
+        'phase': name,
+        'converged': converged,
+        'convergence_time': round(network.last_change - start, 6),
+        'duration': round(network.clock.now - start, 6),
+        'msgs': network.msgs - msgs,
+        'bytes': network.bytes - bytes_count,
+        'max_burst': network.max_burst,
+        'wrong_tables': network.count_wrong_tables(),
+        'wall_time': round(wall_time, 6),
+        'cpu_time': round(cpu_time, 6),
+    }
+
+'''
+    Extrai argumentos de linha de comando da simulacao.
+'''
+def get_cli_params() -> object:
+
+    class parsed_args: pass
+    argv = list(sys.argv)
+
+    parsed_args.topology = router.pop_cli_option(argv, ARG_NAME_TOPOLOGY, '')
+    if (not parsed_args.topology):
+        raise IOError('Argument ' + ARG_NAME_TOPOLOGY + ' is required')
+
+    try:
+        parsed_args.pi = float(router.pop_cli_option(argv, ARG_NAME_PI, str(DEFAULT_PI)))
+        parsed_args.delay = float(router.pop_cli_option(argv, ARG_NAME_DELAY, str(DEFAULT_DELAY)))
+        parsed_args.loss = float(router.pop_cli_option(argv, ARG_NAME_LOSS, '0'))
+        parsed_args.seed = int(router.pop_cli_option(argv, ARG_NAME_SEED, '0'))
+        parsed_args.max_time = float(router.pop_cli_option(argv, ARG_NAME_MAX_TIME, str(DEFAULT_MAX_TIME)))
+        parsed_args.mtu = int(router.pop_cli_option(argv, router.ARG_NAME_MTU, str(router.MTU)))
+        parsed_args.hello_interval = float(router.pop_cli_option(argv, router.ARG_NAME_HELLO_INTERVAL, '0')) or None
+    except ValueError:
+        raise IOError('Invalid numeric argument')
+
+    parsed_args.wire_format = router.pop_cli_option(argv, router.ARG_NAME_WIRE_FORMAT, router.WIRE_FORMAT_JSON)
+    if (not parsed_args.wire_format in router.WIRE_FORMAT_LIST):
+        raise IOError('Invalid wire format "' + parsed_args.wire_format + '"')
+
+    parsed_args.multipath = router.pop_cli_option(argv, router.ARG_NAME_MULTIPATH, router.MULTIPATH_ECMP)
+    if (not parsed_args.multipath in router.MULTIPATH_LIST):
+        raise IOError('Invalid multipath mode "' + parsed_args.multipath + '"')
+
+    parsed_args.update_schedule = router.pop_cli_option(argv, router.ARG_NAME_UPDATE_SCHEDULE, router.UPDATE_SCHEDULE_FIXED)
+    if (not parsed_args.update_schedule in router.UPDATE_SCHEDULE_LIST):
+        raise IOError('Invalid update schedule "' + parsed_args.update_schedule + '"')
+
+    # Falhas podem ser repetidas: Sao aplicadas na ordem em que aparecem
+    parsed_args.failures = []
+    while (len(argv) > 1):
+        if (argv[1] == ARG_NAME_FAIL_LINK and len(argv) > 2):
+            parsed_args.failures.append((ARG_NAME_FAIL_LINK, argv[2].split(',')))
+        elif (argv[1] == ARG_NAME_FAIL_NODE and len(argv) > 2):
+            parsed_args.failures.append((ARG_NAME_FAIL_NODE, [argv[2]]))
+        else:
+            raise IOError('Invalid argument: ' + argv[1])
+        del argv[1:3]
+
+    if (parsed_args.pi <= 0 or parsed_args.delay < 0 or not 0 <= parsed_args.loss < 1):
+        raise IOError('Arguments must satisfy: pi > 0, delay >= 0, 0 <= loss < 1')
+
+    return parsed_args
+
+'''
+    Executa simulacao a partir da linha de comando.
+'''
+def main() -> None:
+
+    try:
+        args = get_cli_params()
+    except IOError as error:
+        print(error, file=sys.stderr)
+        print(USAGE, file=sys.stderr)
+        sys.exit(1)
+
+    network = Network(args.pi, args.seed, args.wire_format, args.mtu, args.multipath, args.update_schedule, args.hello_interval)
+    try:
+        load_topology(network, args.topology, args.delay, args.loss)
+
+        result = {
+            'routers': len(network.routers),
+            'links': sum([len(links) for links in network.links.values()]) // 2,
+            'pi': args.pi,
+            'phases': [run_phase(network, 'startup', args.max_time)],
+        }
+
+        for failure_type, addrs in args.failures:
+            if (failure_type == ARG_NAME_FAIL_LINK):
+                network.fail_link(addrs[0], addrs[1], not args.hello_interval)
+            else:
+                network.fail_router(addrs[0], not args.hello_interval)
+            result['phases'].append(run_phase(network, failure_type[2:] + ' ' + ','.join(addrs), args.max_time))
+    finally:
+        network.close()
+
+    print(json.dumps(result))
+
+if (__name__ == "__main__"):
+    main()
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Modulos do roteador (router, simulator) ficam no diretorio pai
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
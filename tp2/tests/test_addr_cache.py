@@ -0,0 +1,49 @@
+import collections
+
+import pytest
+
+import router
+
+'''
+    Cache de enderecos validos ('validate_ip' / 'validate_ips'):
+    - LRU: Varredura com muitos enderecos novos descarta apenas os menos usados (enderecos recorrentes seguem em cache);
+    - Enderecos invalidos nunca entram no cache;
+'''
+
+SIZE = 8
+
+@pytest.fixture(autouse=True)
+def small_cache(monkeypatch) -> None:
+    monkeypatch.setattr(router, 'VALID_ADDR_CACHE_SIZE', SIZE)
+    monkeypatch.setattr(router, 'valid_addr_cache', collections.OrderedDict())
+
+def test_scan_keeps_recently_used_addresses() -> None:
+
+    hot = ['10.0.0.1', '10.0.0.2']
+    assert router.validate_ips(hot)
+
+    for i in range(1, 5 * SIZE):
+        assert router.validate_ip(hot[i % 2])
+        assert router.validate_ips(['10.9.%d.%d' % (i, j) for j in range(1, 3)])
+
+    assert len(router.valid_addr_cache) == SIZE
+    assert all(addr in router.valid_addr_cache for addr in hot)
+    assert not '10.9.1.1' in router.valid_addr_cache
+
+def test_bulk_hits_refresh_addresses() -> None:
+
+    for i in range(1, SIZE + 1):
+        assert router.validate_ip('10.0.0.%d' % i)
+    assert router.validate_ips(['10.0.0.1'])
+    assert router.validate_ip('10.0.1.1')
+
+    assert '10.0.0.1' in router.valid_addr_cache
+    assert not '10.0.0.2' in router.valid_addr_cache
+
+def test_invalid_addresses_are_not_cached() -> None:
+
+    assert not router.validate_ips(['10.0.0.1', '10.0.0.256'])
+    assert not router.validate_ips(['10.0.0.1', 7])
+    assert not router.validate_ips([['10.0.0.1']])
+    assert not router.validate_ip('fd00::1')
+    assert len(router.valid_addr_cache) == 0
@@ -0,0 +1,75 @@
+import json
+
+import pytest
+
+import benchmark
+import router
+
+'''
+    Modos do benchmark executados no proprio processo:
+    - Roteadores medidos sem rede usam transportes concretos (nenhum envio cai na interface base);
+    - Nivel de log do modulo router eh restaurado ao final, inclusive quando a medicao falha;
+'''
+
+def get_args(*options: str) -> object:
+    return benchmark.get_cli_params(['benchmark.py'] + list(options))
+
+def test_handle_msg_restores_log_level(monkeypatch) -> None:
+
+    monkeypatch.setattr(router, 'LOG_LEVEL', router.LOG_LEVEL_INFO)
+    result = benchmark.run_handle_msg_benchmark(2000, get_args('--seed', '1'))
+
+    assert result['msgs'] == benchmark.HANDLE_MSG_ENTRIES_PER_RUN // 2000
+    assert router.LOG_LEVEL == router.LOG_LEVEL_INFO
+
+def test_update_round_counts_datagrams(monkeypatch) -> None:
+
+    monkeypatch.setattr(router, 'LOG_LEVEL', router.LOG_LEVEL_INFO)
+    result = benchmark.run_update_round_benchmark(3, get_args())
+
+    assert result['msgs'] == 3
+    assert result['bytes'] > 0
+    assert router.LOG_LEVEL == router.LOG_LEVEL_INFO
+
+def test_failed_scenario_restores_log_level(monkeypatch) -> None:
+
+    def fail(*args) -> None:
+        raise RuntimeError('phase failed')
+
+    monkeypatch.setattr(router, 'LOG_LEVEL', router.LOG_LEVEL_INFO)
+    monkeypatch.setattr(benchmark, 'run_phase', fail)
+    with pytest.raises(RuntimeError):
+        benchmark.run_scenario(benchmark.TOPOLOGY_RING, 4, get_args())
+
+    assert router.LOG_LEVEL == router.LOG_LEVEL_INFO
+
+def test_null_transport_discards_datagrams() -> None:
+
+    transport = router.NullTransport()
+    transport.sendto(b'{}', ('10.0.0.1', router.PORT))
+    with pytest.raises(IOError):
+        transport.recv(router.BUF_SIZE)
+
+def get_result(wrong_tables_del: int) -> dict:
+    phase = {'convergence_time': 1.0, 'msgs': 10, 'bytes': 1000, 'cpu_per_period_ms': 1.0, 'max_burst': 2, 'wrong_tables': 0}
+    return {'topology': 'ring', 'size': 10, 'startup': dict(phase), 'del': dict(phase, wrong_tables=wrong_tables_del), 'peak_rss_kb': 1000}
+
+def test_wrong_tables_fail_scenario(capsys) -> None:
+
+    benchmark.print_summary(get_result(0))
+    assert not 'FAILED' in capsys.readouterr().out
+
+    benchmark.print_summary(get_result(5))
+    assert capsys.readouterr().out.strip().endswith('FAILED (wrong tables: del 5)')
+    assert benchmark.get_failure({'topology': 'ring', 'size': 10, 'error': 'exit code 1'}) == 'exit code 1'
+
+def test_compare_flags_wrong_tables(tmp_path, capsys) -> None:
+
+    path_baseline, path_current = str(tmp_path / 'baseline.jsonl'), str(tmp_path / 'current.jsonl')
+    with open(path_baseline, 'w') as baseline_file:
+        baseline_file.write(json.dumps(get_result(0)) + '\n')
+    with open(path_current, 'w') as current_file:
+        current_file.write(json.dumps(get_result(5)) + '\n')
+
+    assert benchmark.compare_results(path_baseline, path_current) == 1
+    assert 'REGRESSION  ring:10 del.wrong_tables: 0 -> 5' in capsys.readouterr().out
@@ -0,0 +1,94 @@
+import json
+
+import pytest
+
+import router
+
+'''
+    Formato binario de msgs ('encode_msg_binary' / 'decode_msg_binary'):
+    - Ida & volta de cada tipo de msg (IPv4 & IPv6) preserva todos os campos;
+    - Entradas truncadas, com bytes sobrando OU com campos invalidos sao rejeitadas com IOError (nunca outra excecao);
+'''
+
+MSGS_IPV4 = [
+    {'type': router.MSG_TYPE_UPDATE, 'source': '10.0.0.1', 'destination': '10.0.0.2', 'seq': 7, 'full': True, 'distances': {'10.1.0.1': 1, '10.1.0.2': 127}, 'withdrawn': []},
+    {'type': router.MSG_TYPE_UPDATE, 'source': '10.0.0.1', 'destination': '10.0.0.2', 'seq': 300, 'full': False, 'distances': {'10.1.0.1': 128, '10.1.0.2': 65534}, 'withdrawn': ['10.2.0.1', '10.2.0.2']},
+    {'type': router.MSG_TYPE_UPDATE, 'source': '10.0.0.1', 'destination': '10.0.0.2', 'seq': 0, 'full': False, 'distances': {}, 'withdrawn': []},
+    {'type': router.MSG_TYPE_TRACE, 'source': '10.0.0.1', 'destination': '10.0.0.3', 'hops': ['10.0.0.1', '10.0.0.2']},
+    {'type': router.MSG_TYPE_TRACE, 'source': '10.0.0.1', 'destination': '10.0.0.3', 'hops': ['10.0.0.1'], 'ttl': 32, 'id': 2 ** 31 - 1},
+    {'type': router.MSG_TYPE_DATA, 'source': '10.0.0.1', 'destination': '10.0.0.3', 'payload': 'hello'},
+    {'type': router.MSG_TYPE_DATA, 'source': '10.0.0.3', 'destination': '10.0.0.1', 'payload': {'type': 'trace', 'hops': ['10.0.0.1', '10.0.0.3']}},
+    {'type': router.MSG_TYPE_HELLO, 'source': '10.0.0.1', 'destination': '10.0.0.2', 'interval': 50, 'multiplier': 3},
+]
+
+'''
+    Versao IPv6 de 01 msg: Todos os enderecos '10.x.y.z' viram 'fd00::x:y:z'.
+'''
+def to_ipv6(msg: dict) -> dict:
+    text = json.dumps(msg)
+    for a in range(3):
+        for b in range(4):
+            text = text.replace('"10.%d.0.%d"' % (a, b), '"fd00::%d:0:%d"' % (a, b))
+    return json.loads(text)
+
+MSGS = MSGS_IPV4 + [to_ipv6(msg) for msg in MSGS_IPV4]
+
+'''
+    Campos esperados apos a ida & volta (updates binarios sao marcados como tal).
+'''
+def get_expected(msg: dict) -> dict:
+    expected = dict(msg)
+    if (msg['type'] == router.MSG_TYPE_UPDATE):
+        expected['binary'] = True
+    return expected
+
+@pytest.mark.parametrize('msg', MSGS)
+def test_round_trip(msg: dict) -> None:
+
+    raw_msg = router.encode_msg_binary(msg)
+
+    assert raw_msg[0] == router.BIN_MAGIC
+    assert bool(raw_msg[2] & router.BIN_FLAG_IPV6) == (':' in msg['source'])
+    assert router.decode_msg_binary(raw_msg) == get_expected(msg)
+    assert router.decode_msg(raw_msg) == get_expected(msg)
+
+def test_small_weights_flag() -> None:
+    assert router.encode_msg_binary(MSGS_IPV4[0])[2] & router.BIN_FLAG_SMALL_WEIGHTS
+    assert not router.encode_msg_binary(MSGS_IPV4[1])[2] & router.BIN_FLAG_SMALL_WEIGHTS
+
+def test_preserialized_distances() -> None:
+
+    msg = MSGS_IPV4[1]
+    distances_bin = (
+        b''.join([router.pack_addr(addr) for addr in msg['distances']]),
+        b''.join([router.encode_varint(weight) for weight in msg['distances'].values()]),
+    )
+    assert router.encode_msg_binary(msg, distances_bin) == router.encode_msg_binary(msg)
+
+@pytest.mark.parametrize('msg', MSGS)
+def test_truncated_input_is_rejected(msg: dict) -> None:
+    raw_msg = router.encode_msg_binary(msg)
+    for size in range(len(raw_msg)):
+        with pytest.raises(IOError):
+            router.decode_msg_binary(raw_msg[:size])
+
+@pytest.mark.parametrize('msg', MSGS)
+def test_trailing_bytes_are_rejected(msg: dict) -> None:
+    with pytest.raises(IOError):
+        router.decode_msg_binary(router.encode_msg_binary(msg) + b'\x00')
+
+@pytest.mark.parametrize('raw_msg', [
+    b'',
+    b'\xd5',
+    bytes((0xD4, 1, 0)) + bytes(8) + b'\x00\x00\x00', # Magic invalido
+    bytes((router.BIN_MAGIC, 99, 0)) + bytes(8), # Tipo desconhecido
+    bytes((router.BIN_MAGIC, 1, router.BIN_FLAG_SMALL_WEIGHTS)) + bytes(8) + b'\x00\x01' + bytes(4) + b'\x00\x00', # Peso zero
+    bytes((router.BIN_MAGIC, 1, router.BIN_FLAG_SMALL_WEIGHTS)) + bytes(8) + b'\x00\x01' + bytes(4) + b'\x80\x00', # Peso "pequeno" com 02 bytes
+    bytes((router.BIN_MAGIC, 1, 0)) + bytes(8) + b'\x00\xff\xff\xff\x0f', # Qtd de distancias muito maior que a msg
+    bytes((router.BIN_MAGIC, 3, 0)) + bytes(8) + b'\x00', # Trace sem saltos
+    bytes((router.BIN_MAGIC, 4, 0)) + bytes(8) + b'\x00\x03', # Hello com intervalo zero
+    bytes((router.BIN_MAGIC, 2, 0)) + bytes(8) + b'{not json', # Payload invalido
+])
+def test_malformed_input_is_rejected(raw_msg: bytes) -> None:
+    with pytest.raises(IOError):
+        router.decode_msg_binary(raw_msg)
@@ -0,0 +1,114 @@
+import json
+import random
+import threading
+
+import router
+
+'''
+    Estresse de escritores & leitores concorrentes sobre 01 roteador (engine de threads):
+    - Escritores: 'apply_updates', 'add_neighbor' & 'del_neighbor';
+    - Leitores: 'get_table_snapshot', 'send_updates', 'run_update_schedule' & 'execute_command_debug_table';
+    - Msgs recebidas de vizinhos instaveis (updates & pedidos de ressincronizacao) tambem criam estado de vizinho;
+    - Nenhuma thread pode falhar & cada snapshot (lido com a tabela de encaminhamento, sob lock) deve concordar com a FIB;
+    - Ao final, so existe estado de troca de updates para vizinhos atuais (vizinho removido nao eh recriado por outra thread);
+'''
+
+ADDRESS = '10.0.0.1'
+STABLE_NEIGHBORS = ['10.0.0.2', '10.0.0.3']
+FLAPPING_NEIGHBORS = ['10.0.0.4', '10.0.0.5']
+DESTINATIONS = ['10.2.0.%d' % i for i in range(1, 101)]
+ITERATIONS = 300
+
+'''
+    Compara 01 snapshot com a tabela de encaminhamento: Destino com proximo salto vizinho tem entrada (para ele) & apenas esses.
+'''
+def assert_snapshot_matches_fib(node: router.Router, snapshot: router.TableSnapshot, forwarding_table: dict) -> None:
+
+    expected = {}
+    for addr_dest, (addr_src, weight) in snapshot.entries.items():
+        next_hop = addr_dest if addr_src == node.address else addr_src
+        if (next_hop in snapshot.neighbors):
+            expected[addr_dest] = next_hop
+
+    assert {addr_dest: entry[0] for addr_dest, entry in forwarding_table.items()} == expected
+
+def test_concurrent_updates_and_reads(monkeypatch, capsys) -> None:
+
+    monkeypatch.setattr(router, 'LOG_LEVEL', router.LOG_LEVEL_OFF)
+    node = router.Router(ADDRESS, 1.0, transport=router.NullTransport(), multipath=router.MULTIPATH_OFF)
+    for addr in STABLE_NEIGHBORS + FLAPPING_NEIGHBORS:
+        node.add_neighbor(addr, 1)
+
+    errors: list = []
+    is_writing = threading.Event()
+    is_writing.set()
+
+    def run(target, *args) -> None:
+        try:
+            target(*args)
+        except Exception as error:
+            errors.append(error)
+            is_writing.clear()
+
+    def write_updates(seed: int) -> None:
+        rng = random.Random(seed)
+        for i in range(ITERATIONS):
+            updates = {}
+            for addr_neighbor in STABLE_NEIGHBORS + FLAPPING_NEIGHBORS:
+                updates[addr_neighbor] = {addr_dest: rng.choice([None, rng.randint(1, 20)]) for addr_dest in rng.sample(DESTINATIONS, 20)}
+            node.apply_updates(updates, node.clock())
+
+    def flap_neighbors(seed: int) -> None:
+        rng = random.Random(seed)
+        for i in range(ITERATIONS):
+            addr = rng.choice(FLAPPING_NEIGHBORS)
+            if (rng.random() < .5):
+                node.del_neighbor(addr)
+            else:
+                node.add_neighbor(addr, rng.randint(1, 5))
+
+    def read_snapshots() -> None:
+        while (is_writing.is_set()):
+            node.get_table_snapshot()
+            with node.table_lock:
+                assert_snapshot_matches_fib(node, node.get_table_snapshot(), node.forwarding_table)
+
+    def read_for_updates() -> None:
+        while (is_writing.is_set()):
+            node.send_updates(False)
+            node.send_updates(True)
+
+    def read_for_schedule() -> None:
+        while (is_writing.is_set()):
+            node.run_update_schedule(node.clock() + 10)
+
+    def receive_msgs(seed: int) -> None:
+        rng = random.Random(seed)
+        seq = 0
+        while (is_writing.is_set()):
+            seq += 1
+            addr = rng.choice(FLAPPING_NEIGHBORS)
+            msg_update = {'type': router.MSG_TYPE_UPDATE, 'source': addr, 'destination': ADDRESS, 'seq': seq, 'distances': {rng.choice(DESTINATIONS): rng.randint(1, 20)}}
+            msg_resync = {'type': router.MSG_TYPE_RESYNC, 'source': addr, 'destination': ADDRESS}
+            node.handle_msgs([json.dumps(msg).encode() for msg in [msg_update, msg_resync]])
+
+    def read_for_display() -> None:
+        while (is_writing.is_set()):
+            router.execute_command_debug_table(node)
+
+    writers = [threading.Thread(target=run, args=(write_updates, seed)) for seed in range(2)] + [threading.Thread(target=run, args=(flap_neighbors, 2))]
+    readers = [threading.Thread(target=run, args=(target,)) for target in [read_snapshots, read_for_updates, read_for_schedule, read_for_display]]
+    readers.append(threading.Thread(target=run, args=(receive_msgs, 3)))
+
+    for thread in readers + writers:
+        thread.start()
+    for thread in writers:
+        thread.join()
+    is_writing.clear()
+    for thread in readers:
+        thread.join()
+
+    capsys.readouterr()
+    assert errors == []
+    assert_snapshot_matches_fib(node, node.get_table_snapshot(), node.forwarding_table)
+    assert set(node.neighbors_state) <= set(node.get_table_snapshot().neighbors)
@@ -0,0 +1,53 @@
+import json
+
+import pytest
+
+import router
+import simulator
+
+'''
+    Tabelas grandes: Updates completos sao fragmentados no MTU & a outra ponta da cadeia aprende todos os destinos.
+    - Destinos sao injetados na 1a ponta por 01 unico update de 01 vizinho real (sem enlace simulado: Nao envia updates periodicos);
+    - Todo datagrama efetivamente enviado na rede simulada cabe no MTU;
+'''
+
+DESTINATIONS = 5000
+MAX_TIME = 30 # Segundos virtuais
+ADDR_INJECTOR = '10.0.0.4'
+
+@pytest.mark.parametrize('wire_format', [router.WIRE_FORMAT_JSON, router.WIRE_FORMAT_BINARY])
+@pytest.mark.parametrize('mtu', [router.MIN_MTU, router.MTU])
+def test_chain_converges_with_5000_destinations(wire_format: str, mtu: int) -> None:
+
+    network = simulator.Network(wire_format=wire_format, mtu=mtu)
+    network.add_link('10.0.0.1', '10.0.0.2', 1)
+    network.add_link('10.0.0.2', '10.0.0.3', 1)
+
+    # Registra todo datagrama enviado (updates de todos os roteadores, em todos os periodos)
+    sent = []
+    send = network.send
+    def send_recorded(addr_src: str, addr_dest: str, raw_msg: bytes) -> None:
+        sent.append((addr_src, addr_dest, len(raw_msg)))
+        send(addr_src, addr_dest, raw_msg)
+    network.send = send_recorded
+
+    first_router = network.routers['10.0.0.1']
+    first_router.add_neighbor(ADDR_INJECTOR, 1)
+    distances = {'10.1.%d.%d' % (i // 256, i % 256): 1 + i % 10 for i in range(DESTINATIONS)}
+    first_router.handle_msg(json.dumps({'type': router.MSG_TYPE_UPDATE, 'source': ADDR_INJECTOR, 'destination': '10.0.0.1', 'distances': distances}).encode())
+
+    far_router = network.routers['10.0.0.3']
+    try:
+        while (len(far_router.routing_table) < DESTINATIONS + 3 and network.clock.now < MAX_TIME):
+            network.clock.run_until(network.clock.now + network.pi)
+    finally:
+        network.close()
+
+    assert len(far_router.routing_table) == DESTINATIONS + 3
+    assert far_router.routing_table['10.1.19.135'].best.weight == 2 + 1 + 4999 % 10 # Pesos anunciados ja incluem o enlace ate o anunciante
+    assert far_router.routing_table['10.0.0.1'].best.weight == 2
+
+    assert max([size for _, _, size in sent]) <= mtu
+
+    # Cada destino ocupa ao menos 04 bytes: Updates do meio para a ponta exigiram no minimo esta qtd de fragmentos
+    assert len([1 for addr_src, addr_dest, _ in sent if (addr_src, addr_dest) == ('10.0.0.2', '10.0.0.3')]) >= DESTINATIONS * 4 // mtu
@@ -0,0 +1,116 @@
+import threading
+
+import pytest
+
+import router
+import simulator
+
+'''
+    Deteccao de vizinhos inativos por hellos ('handle_msg_hello' / 'fail_neighbor' / 'restore_neighbor'):
+    - Vizinho sem hellos por mais que o prazo dele sai da tabela (rotas pelo enlace sao recalculadas);
+    - Vizinho inativo que volta a enviar hellos volta a tabela com o peso que o enlace tinha;
+    - Vizinho removido (del) enquanto inativo deixa de receber hellos & nao volta;
+    - Sessao eh criada sob 'table_lock': Vizinho removido ao mesmo tempo nao fica com sessao;
+'''
+
+ADDRESS = '10.0.0.1'
+ADDR_NEIGHBOR = '10.0.0.2'
+HELLO_INTERVAL = .1
+
+@pytest.fixture(autouse=True)
+def silence_logs(monkeypatch) -> None:
+    monkeypatch.setattr(router, 'LOG_LEVEL', router.LOG_LEVEL_OFF)
+
+'''
+    Anel de 04 roteadores com hellos: Enlace 1-2 eh o mais barato para ir de 1 ate 2.
+'''
+def create_network() -> tuple:
+    network = simulator.Network(hello_interval=HELLO_INTERVAL)
+    addrs = ['10.0.0.%d' % i for i in range(1, 5)]
+    for addr_a, addr_b, weight in [(addrs[0], addrs[1], 1), (addrs[1], addrs[2], 1), (addrs[2], addrs[3], 1), (addrs[3], addrs[0], 5)]:
+        network.add_link(addr_a, addr_b, weight)
+    return network, addrs
+
+def set_link_up(network: simulator.Network, addr_a: str, addr_b: str, is_up: bool) -> None:
+    network.links[addr_a][addr_b].is_up = is_up
+    network.links[addr_b][addr_a].is_up = is_up
+
+def get_hello(addr_src: str) -> dict:
+    return {'type': router.MSG_TYPE_HELLO, 'source': addr_src, 'destination': ADDRESS, 'interval': 100, 'multiplier': 3}
+
+def test_silent_neighbor_is_dropped_and_restored() -> None:
+
+    network, addrs = create_network()
+    node = network.routers[addrs[0]]
+    try:
+        assert network.run_until_converged(30)
+
+        # Queda silenciosa: Apenas os hellos que param de chegar a denunciam
+        set_link_up(network, addrs[0], addrs[1], False)
+        network.clock.run_until(network.clock.now + 1)
+        assert node.hello_sessions[addrs[1]].is_down
+        assert node.hello_sessions[addrs[1]].weight == 1
+        assert not addrs[1] in node.get_table_snapshot().neighbors
+        assert network.run_until_converged(30)
+        assert node.get_table_snapshot().entries[addrs[1]] == (addrs[3], 7)
+
+        set_link_up(network, addrs[0], addrs[1], True)
+        network.clock.run_until(network.clock.now + 1)
+        assert not node.hello_sessions[addrs[1]].is_down
+        assert network.run_until_converged(30)
+        assert node.get_table_snapshot().entries[addrs[1]] == (node.address, 1)
+        assert network.count_wrong_tables() == 0
+    finally:
+        network.close()
+
+def test_neighbor_deleted_while_down_does_not_return() -> None:
+
+    network, addrs = create_network()
+    node = network.routers[addrs[0]]
+    try:
+        assert network.run_until_converged(30)
+        set_link_up(network, addrs[0], addrs[1], False)
+        network.clock.run_until(network.clock.now + 1)
+        assert node.hello_sessions[addrs[1]].is_down
+
+        node.del_neighbor(addrs[1])
+        assert not addrs[1] in node.hello_sessions
+
+        # Outro lado segue enviando hellos (para ele, somos vizinho inativo), mas sao descartados (nao eh mais vizinho)
+        set_link_up(network, addrs[0], addrs[1], True)
+        network.clock.run_until(network.clock.now + 1)
+        assert network.routers[addrs[1]].hello_sessions[addrs[0]].is_down
+        assert not addrs[1] in node.hello_sessions
+        assert not addrs[1] in node.get_table_snapshot().neighbors
+    finally:
+        network.close()
+
+def test_hello_from_non_neighbor_is_ignored() -> None:
+
+    node = router.Router(ADDRESS, 1.0, transport=router.NullTransport(), hello_interval=HELLO_INTERVAL)
+    node.handle_msg_hello(get_hello(ADDR_NEIGHBOR), node.clock())
+    assert not node.hello_sessions
+
+    node.add_neighbor(ADDR_NEIGHBOR, 1)
+    node.handle_msg_hello(get_hello(ADDR_NEIGHBOR), node.clock())
+    assert ADDR_NEIGHBOR in node.hello_sessions
+
+def test_session_is_not_created_for_neighbor_deleted_meanwhile(monkeypatch) -> None:
+
+    node = router.Router(ADDRESS, 1.0, transport=router.NullTransport(), hello_interval=HELLO_INTERVAL)
+    node.add_neighbor(ADDR_NEIGHBOR, 1)
+
+    # del chega (por outra thread) depois de o vizinho ser conferido & antes de a sessao ser registrada
+    deleter = threading.Thread(target=node.del_neighbor, args=(ADDR_NEIGHBOR,))
+    create_session = router.HelloSession
+    def on_create_session(now: float, detect_time: float) -> router.HelloSession:
+        deleter.start()
+        deleter.join(.2)
+        return create_session(now, detect_time)
+    monkeypatch.setattr(router, 'HelloSession', on_create_session)
+
+    node.handle_msg_hello(get_hello(ADDR_NEIGHBOR), node.clock())
+    deleter.join()
+
+    assert not ADDR_NEIGHBOR in node.hello_sessions
+    assert not ADDR_NEIGHBOR in node.get_table_snapshot().neighbors
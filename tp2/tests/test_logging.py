@@ -0,0 +1,99 @@
+import collections
+import json
+import threading
+
+import pytest
+
+import router
+
+'''
+    Logs por fila ('log' / 'write_log_records' / 'flush_logs'):
+    - Nivel eh avaliado antes de tudo: Registros abaixo dele nem entram na fila (argumentos nunca sao formatados);
+    - Fila cheia: Excedentes sao descartados, contados por nivel & informados em 01 alerta na escrita seguinte;
+    - Encerramento escreve tudo o que estava pendente, na ordem (registros seguintes iniciam nova thread de escrita);
+'''
+
+QUEUE_SIZE = 4
+
+class CountedArg:
+
+    def __init__(self) -> None:
+        self.formatted = 0
+
+    def __str__(self) -> str:
+        self.formatted += 1
+        return 'arg'
+
+@pytest.fixture
+def log_path(monkeypatch, tmp_path):
+    path = tmp_path / 'router.log'
+    log_file = open(str(path), 'a')
+    monkeypatch.setattr(router, 'LOG_LEVEL', router.LOG_LEVEL_DEBUG)
+    monkeypatch.setattr(router, 'LOG_QUEUE_SIZE', QUEUE_SIZE)
+    monkeypatch.setattr(router, 'log_queue', collections.deque())
+    monkeypatch.setattr(router, 'log_dropped', {})
+    monkeypatch.setattr(router, 'log_dropped_reported', 0)
+    monkeypatch.setattr(router, 'log_writer', None)
+    monkeypatch.setattr(router, 'log_file', log_file)
+    yield path
+    log_file.close()
+
+def read_records(path) -> list:
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+'''
+    Impede o inicio da thread de escrita (fila so eh esvaziada por 'flush_logs').
+'''
+def hold_writer(monkeypatch) -> None:
+    monkeypatch.setattr(router, 'log_writer', threading.Thread(target=None))
+
+def test_records_below_level_are_not_queued(monkeypatch, log_path) -> None:
+
+    hold_writer(monkeypatch)
+    monkeypatch.setattr(router, 'LOG_LEVEL', router.LOG_LEVEL_INFO)
+    arg = CountedArg()
+    router.log_debug('Hidden %s', arg)
+
+    assert not router.log_queue
+    assert arg.formatted == 0
+
+def test_overflow_is_dropped_and_reported(monkeypatch, log_path, capsys) -> None:
+
+    hold_writer(monkeypatch)
+    for i in range(QUEUE_SIZE + 2):
+        router.log_info('Record %s', i)
+    router.log_warn('Late warning')
+
+    assert len(router.log_queue) == QUEUE_SIZE
+    assert router.log_dropped == {router.LOG_LEVEL_INFO: 2, router.LOG_LEVEL_WARN: 1}
+
+    router.flush_logs()
+    records = read_records(log_path)
+    assert [record['msg'] for record in records] == ['Record 0', 'Record 1', 'Record 2', 'Record 3', '3 log record(s) dropped: Log queue is full']
+    assert records[-1]['level'] == router.LOG_LEVEL_NAMES[router.LOG_LEVEL_WARN]
+
+    # Com arquivo de log, o terminal exibe apenas dicas, alertas & erros
+    assert capsys.readouterr().out == '[' + router.LOG_LEVEL_NAMES[router.LOG_LEVEL_WARN] + '] 3 log record(s) dropped: Log queue is full\n'
+
+    # Descartes ja informados nao sao informados de novo
+    router.log_info('After flush')
+    router.flush_logs()
+    assert [record['msg'] for record in read_records(log_path)][len(records):] == ['After flush']
+
+def test_flush_writes_pending_records_in_order(log_path) -> None:
+
+    for i in range(3):
+        router.log_info('Record %s', i)
+    writer = router.log_writer
+    assert writer and writer.name == 'log-writer'
+
+    router.flush_logs()
+    assert not writer.is_alive()
+    assert router.log_writer == None and not router.log_queue
+    assert [record['msg'] for record in read_records(log_path)] == ['Record 0', 'Record 1', 'Record 2']
+
+    # Registro apos o encerramento inicia nova thread de escrita
+    router.log_info('Record %s', 3)
+    assert router.log_writer and router.log_writer is not writer
+    router.flush_logs()
+    assert [record['msg'] for record in read_records(log_path)][-1] == 'Record 3'
@@ -0,0 +1,74 @@
+import collections
+
+import pytest
+
+import router
+
+'''
+    Encaminhamento multicaminho ('get_forwarding_entry' + 'select_next_hop'):
+    - Ponderado: Cada proximo salto recebe fracao dos fluxos proporcional ao inverso do custo (apenas rotas livres de loops);
+    - ECMP: Apenas rotas empatadas com a melhor, em partes iguais;
+    - Estabilidade: 01 fluxo segue sempre pelo mesmo proximo salto (inclusive apos recompilar a FIB);
+'''
+
+ADDRESS = '10.0.0.1'
+ADDR_A, ADDR_B, ADDR_C = '10.0.0.2', '10.0.0.3', '10.0.0.4'
+ADDR_DEST = '10.1.0.1'
+FLOWS = ['10.2.%d.%d>%s' % (i // 250, i % 250 + 1, ADDR_DEST) for i in range(20000)]
+
+'''
+    Roteador com 03 caminhos ate o destino: Via A (custo 4), via B (custo 6) & via C (custo 7, alem da variancia).
+'''
+def create_router(multipath: str, weight_b: int = 6, link_b: int = 5) -> router.Router:
+
+    node = router.Router(ADDRESS, 1.0, transport=router.NullTransport(), multipath=multipath)
+    node.add_neighbors([(ADDR_A, 3), (ADDR_B, link_b), (ADDR_C, 1)])
+    node.apply_updates({ADDR_A: {ADDR_DEST: 4}, ADDR_B: {ADDR_DEST: weight_b}, ADDR_C: {ADDR_DEST: 7}}, node.clock())
+    return node
+
+def count_next_hops(node: router.Router) -> collections.Counter:
+    entry = node.forwarding_table[ADDR_DEST]
+    return collections.Counter(router.select_next_hop(entry, flow, node.flow_hash_seed)[0] for flow in FLOWS)
+
+@pytest.fixture(autouse=True)
+def silence_logs(monkeypatch) -> None:
+    monkeypatch.setattr(router, 'LOG_LEVEL', router.LOG_LEVEL_OFF)
+
+def test_weighted_shares_follow_inverse_cost() -> None:
+
+    counts = count_next_hops(create_router(router.MULTIPATH_WEIGHTED))
+
+    # Parcelas 1/4 & 1/6: 60% & 40% dos fluxos; C (custo 7 > 1.5 x 4) fica de fora
+    assert set(counts) == {ADDR_A, ADDR_B}
+    assert counts[ADDR_A] / len(FLOWS) == pytest.approx(.6, abs=.02)
+    assert counts[ADDR_B] / len(FLOWS) == pytest.approx(.4, abs=.02)
+
+def test_route_through_farther_neighbor_is_not_used() -> None:
+
+    # Via B segue com custo 6 (dentro da variancia), mas com enlace 1 o proprio B esta a 5 do destino: Mais longe que este roteador (possivel loop)
+    node = create_router(router.MULTIPATH_WEIGHTED, link_b=1)
+    assert node.forwarding_table[ADDR_DEST] == (ADDR_A, (ADDR_A, router.PORT))
+
+def test_ecmp_splits_ties_evenly() -> None:
+
+    node = create_router(router.MULTIPATH_ECMP, 4, 3)
+    counts = count_next_hops(node)
+
+    assert set(counts) == {ADDR_A, ADDR_B}
+    assert counts[ADDR_A] / len(FLOWS) == pytest.approx(.5, abs=.02)
+
+def test_flows_keep_their_next_hop() -> None:
+
+    node = create_router(router.MULTIPATH_WEIGHTED)
+    entry = node.forwarding_table[ADDR_DEST]
+    choices = [router.select_next_hop(entry, flow, node.flow_hash_seed) for flow in FLOWS]
+
+    assert choices == [router.select_next_hop(entry, flow, node.flow_hash_seed) for flow in FLOWS]
+
+    node.rebuild_forwarding_table()
+    entry = node.forwarding_table[ADDR_DEST]
+    assert choices == [router.select_next_hop(entry, flow, node.flow_hash_seed) for flow in FLOWS]
+
+def test_single_path_without_multipath() -> None:
+    node = create_router(router.MULTIPATH_OFF)
+    assert node.forwarding_table[ADDR_DEST] == (ADDR_A, (ADDR_A, router.PORT))
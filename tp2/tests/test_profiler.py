@@ -0,0 +1,112 @@
+import re
+import threading
+
+import pytest
+
+import router
+
+'''
+    Profiler por amostragem ('SamplingProfiler' / 'write_profile'):
+    - Relatorio por thread: Qtd de amostras + funcoes com mais amostras proprias & totais (% das amostras da thread);
+    - Recursao conta 01 unica vez por amostra no total; Pilhas 'folded' trazem a pilha inteira (raiz ... topo);
+    - Thread que amostra nao aparece no relatorio;
+'''
+
+SAMPLES = 20
+
+@pytest.fixture(autouse=True)
+def silence_logs(monkeypatch) -> None:
+    monkeypatch.setattr(router, 'LOG_LEVEL', router.LOG_LEVEL_OFF)
+
+def recurse(depth: int, ready: threading.Event, release: threading.Event) -> None:
+    if (depth > 1):
+        return recurse(depth - 1, ready, release)
+    ready.set()
+    release.wait()
+
+'''
+    Amostra (da thread atual) 01 thread parada em 'recurse' com 03 niveis de recursao.
+'''
+def take_samples(profiler: router.SamplingProfiler) -> None:
+
+    ready = threading.Event()
+    release = threading.Event()
+    thread = threading.Thread(target=recurse, args=(3, ready, release), name='recursing')
+    thread.start()
+    try:
+        ready.wait()
+        for _ in range(SAMPLES):
+            profiler.take_sample()
+    finally:
+        release.set()
+        thread.join()
+
+'''
+    Retorna linhas do relatorio de 01 thread: Cabecalho + secoes ('Top by own' & 'Top by total').
+'''
+def get_thread_lines(report: str, thread_name: str) -> list:
+    return report.split('\nThread ' + thread_name + ':')[1].split('\n\n')[0].splitlines()
+
+def get_section(report: str, thread_name: str, title: str) -> list:
+    lines = get_thread_lines(report, thread_name)
+    start = lines.index('  Top by ' + title + ' samples:') + 1
+    end = lines.index('  Top by total samples:') if title == 'own' else len(lines)
+    return lines[start:end]
+
+def test_report_format() -> None:
+
+    profiler = router.SamplingProfiler(.001)
+    take_samples(profiler)
+    report = profiler.get_report()
+
+    assert re.match(r'^Sampling profile: [0-9.]+ s, 1 sample every 1 ms\n', report)
+    assert 'Thread recursing: ' + str(SAMPLES) + ' samples' in report
+    assert not 'Thread ' + threading.current_thread().name + ':' in report
+
+    own = get_section(report, 'recursing', 'own')
+    assert own and all(re.match(r'^ +[0-9.]+%  \w+ \([\w.]+:[0-9]+\)$', line) for line in own)
+    assert sum(float(line.split('%')[0]) for line in own) == pytest.approx(100, abs=.5)
+
+    # Recursao: 'recurse' aparece em toda amostra (100%), & nao em 300%
+    total = get_section(report, 'recursing', 'total')
+    recurse_line = [line for line in total if ' recurse (test_profiler.py:' in line]
+    assert len(recurse_line) == 1 and recurse_line[0].strip().startswith('100.0%')
+
+def test_report_is_limited_to_top_functions() -> None:
+
+    profiler = router.SamplingProfiler()
+    take_samples(profiler)
+    report = profiler.get_report(top=1)
+
+    lines = get_thread_lines(report, 'recursing')
+    assert len(lines) == 5
+    assert lines[1] == '  Top by own samples:' and lines[3] == '  Top by total samples:'
+
+def test_folded_stacks() -> None:
+
+    profiler = router.SamplingProfiler()
+    take_samples(profiler)
+
+    stacks = [line for line in profiler.get_folded_stacks().splitlines() if line.startswith('recursing;')]
+    assert sum(int(line.rsplit(' ', 1)[1]) for line in stacks) == SAMPLES
+    for line in stacks:
+        functions = [function.split(' (')[0] for function in line.rsplit(' ', 1)[0].split(';')]
+        assert functions.count('recurse') == 3
+        assert functions.index('recurse') < len(functions) - 3 # Raiz primeiro: Espera ('wait') fica acima da recursao
+
+def test_write_profile(monkeypatch, tmp_path) -> None:
+
+    path = tmp_path / 'profile.txt'
+    profiler = router.SamplingProfiler()
+    take_samples(profiler)
+    monkeypatch.setattr(router, 'profiler', profiler)
+    monkeypatch.setattr(router, 'profile_path', str(path))
+
+    node = router.Router('10.0.0.1', 1.0, transport=router.NullTransport())
+    router.write_profile([node])
+
+    report = path.read_text()
+    assert report.startswith('Sampling profile: ')
+    assert 'Thread recursing: ' + str(SAMPLES) + ' samples' in report
+    assert 'Hot paths (router 10.0.0.1, ' in report
+    assert (tmp_path / 'profile.txt.folded').read_text() == profiler.get_folded_stacks()
@@ -0,0 +1,89 @@
+import router
+
+'''
+    Roda de expiracao de rotas ('RouteTimers'):
+    - Rotas vencem exatamente no 1o tick apos o prazo (nunca antes), mesmo com prazo alem de 01 volta da roda;
+    - Renovacao adia o vencimento sem mover a rota na hora (realocada apenas quando sua posicao eh visitada);
+    - Rotas canceladas nunca vencem; Visitas atrasadas (ex.: relogio parado) recuperam os ticks perdidos;
+'''
+
+RESOLUTION = 1.0
+SIZE = 6
+
+def create_route(addr_src: str = '10.0.0.2') -> router.Route:
+    return router.Route(addr_src, 1)
+
+def test_route_expires_at_deadline() -> None:
+
+    timers = router.RouteTimers(RESOLUTION, SIZE)
+    route = create_route()
+    timers.schedule(route, '10.1.0.1', 3.5)
+
+    assert timers.pop_expired(0.0) == []
+    assert timers.pop_expired(3.9) == []
+    assert timers.pop_expired(4.0) == [('10.1.0.1', route)]
+    assert route.tick == None
+    assert timers.pop_expired(10.0) == []
+
+def test_deadline_beyond_one_revolution() -> None:
+
+    timers = router.RouteTimers(RESOLUTION, SIZE)
+    route = create_route()
+    timers.schedule(route, '10.1.0.1', 2 * SIZE + 1)
+
+    for now in range(2 * SIZE + 1):
+        assert timers.pop_expired(float(now)) == []
+    assert timers.pop_expired(2 * SIZE + 1.0) == [('10.1.0.1', route)]
+
+def test_renewed_route_is_refiled_lazily() -> None:
+
+    timers = router.RouteTimers(RESOLUTION, SIZE)
+    route = create_route()
+    timers.schedule(route, '10.1.0.1', 2.0)
+    timers.schedule(route, '10.1.0.1', 5.0)
+
+    # Rota segue na posicao original ate ser visitada
+    assert route.tick == 2 and route.due == 5
+
+    assert timers.pop_expired(2.0) == []
+    assert route.tick == 5
+    assert timers.pop_expired(4.0) == []
+    assert timers.pop_expired(5.0) == [('10.1.0.1', route)]
+
+def test_earlier_deadline_moves_route() -> None:
+
+    timers = router.RouteTimers(RESOLUTION, SIZE)
+    route = create_route()
+    timers.schedule(route, '10.1.0.1', 5.0)
+    timers.schedule(route, '10.1.0.1', 2.0)
+
+    assert route.tick == 2
+    assert timers.pop_expired(2.0) == [('10.1.0.1', route)]
+    assert timers.pop_expired(6.0) == []
+
+def test_cancelled_route_never_expires() -> None:
+
+    timers = router.RouteTimers(RESOLUTION, SIZE)
+    route = create_route()
+    other = create_route('10.0.0.3')
+    timers.schedule(route, '10.1.0.1', 2.0)
+    timers.schedule(other, '10.1.0.1', 2.0)
+    timers.cancel(route)
+    timers.cancel(route)
+
+    assert route.tick == None
+    assert timers.pop_expired(2.0) == [('10.1.0.1', other)]
+    assert timers.pop_expired(20.0) == []
+
+def test_late_visit_collects_all_expired_routes() -> None:
+
+    timers = router.RouteTimers(RESOLUTION, SIZE)
+    timers.pop_expired(0.0)
+    routes = [create_route('10.0.0.%d' % i) for i in range(2, 2 + SIZE)]
+    for i, route in enumerate(routes):
+        timers.schedule(route, '10.1.0.%d' % i, 1.0 + i)
+
+    # Visita atrasada em mais de 01 volta da roda: Todas as posicoes sao percorridas 01 unica vez
+    expired = timers.pop_expired(3.0 * SIZE)
+    assert sorted(expired, key=lambda item: item[0]) == [('10.1.0.%d' % i, route) for i, route in enumerate(routes)]
+    assert all(route.tick == None for route in routes)
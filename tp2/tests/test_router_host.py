@@ -0,0 +1,102 @@
+import socket
+
+import router
+import router_host
+
+'''
+    Hospedeiro de roteadores ('router_host'):
+    - Loop compartilhado: Timers em ordem de prazo, cancelamento, leitores chamados quando ha dados & parada;
+    - CLI: "<addr> <comando>" executa o comando no roteador hospedado (quit encerra; enderecos desconhecidos sao apontados);
+    - Roteadores hospedados trocam updates por sockets reais (loopback) & convergem;
+'''
+
+ADDRS = ['127.0.3.1', '127.0.3.2', '127.0.3.3']
+PI = .1
+
+def test_loop_runs_timers_in_order() -> None:
+
+    loop = router_host.HostLoop()
+    calls = []
+    now = loop.time()
+
+    loop.call_at(now - 1, calls.append, 'second')
+    loop.call_at(now - 2, calls.append, 'first')
+    loop.call_at(now - 1, calls.append, 'cancelled').cancel()
+    loop.call_later(60, calls.append, 'later')
+    loop.run_timers()
+
+    assert calls == ['first', 'second']
+    assert len(loop.queue) == 1
+
+def test_timers_scheduled_while_running_wait_next_pass() -> None:
+
+    loop = router_host.HostLoop()
+    calls = []
+
+    def reschedule() -> None:
+        calls.append(len(calls))
+        loop.call_at(loop.time() - 1, reschedule)
+
+    loop.call_at(loop.time() - 1, reschedule)
+    loop.run_timers()
+    loop.run_timers()
+    assert calls == [0, 1]
+
+def test_loop_dispatches_readers_until_stopped() -> None:
+
+    loop = router_host.HostLoop()
+    sock_a, sock_b = socket.socketpair()
+    received = []
+
+    def read() -> None:
+        received.append(sock_b.recv(64))
+        loop.stop()
+
+    try:
+        loop.add_reader(sock_b, read)
+        loop.call_later(.01, sock_a.send, b'ping')
+        loop.call_later(5, loop.stop) # Salvaguarda: Loop para mesmo se o leitor nunca for chamado
+        loop.run_forever()
+        loop.remove_reader(sock_b)
+        loop.remove_reader(sock_b)
+    finally:
+        sock_a.close()
+        sock_b.close()
+
+    assert received == [b'ping']
+
+def test_execute_command_dispatches_to_hosted_router(monkeypatch, capsys) -> None:
+
+    host = router_host.RouterHost(PI)
+    node = router.Router(ADDRS[0], PI, transport=router.NullTransport())
+    host.routers[ADDRS[0]] = node
+
+    calls = []
+    monkeypatch.setattr(router, 'execute_command', lambda target, command_line: calls.append((target, command_line)) or True)
+
+    assert host.execute_command('') == True
+    assert host.execute_command(router.COMMAND_QUIT) == False
+    assert host.execute_command(ADDRS[0] + ' add 127.0.3.9 5\n') == True
+    assert calls == [(node, 'add 127.0.3.9 5\n')]
+
+    assert host.execute_command(ADDRS[1] + ' table') == True
+    assert host.execute_command(ADDRS[0]) == True
+    assert capsys.readouterr().out.count('Command format') == 2
+    assert len(calls) == 1
+
+def test_hosted_routers_converge(monkeypatch) -> None:
+
+    monkeypatch.setattr(router, 'LOG_LEVEL', router.LOG_LEVEL_OFF)
+    host = router_host.RouterHost(PI, seed=0)
+    try:
+        host.add_link(ADDRS[0], ADDRS[1], 2)
+        host.add_link(ADDRS[1], ADDRS[2], 3)
+        host.loop.call_later(6 * PI, host.loop.stop)
+        host.loop.run_forever()
+
+        routing_tables = {addr: host.routers[addr].routing_table for addr in ADDRS}
+        assert routing_tables[ADDRS[0]][ADDRS[2]].best.weight == 5
+        assert routing_tables[ADDRS[2]][ADDRS[0]].best.weight == 5
+        assert routing_tables[ADDRS[0]][ADDRS[2]].best.addr_src == ADDRS[1]
+    finally:
+        host.stop()
@@ -0,0 +1,126 @@
+import time
+
+import pytest
+
+import router
+
+'''
+    Arquivo de estado (reinicio a quente: 'encode_state' / 'decode_state' / 'save_state' / 'load_state'):
+    - Ida & volta preserva vizinhos & rotas (IPv4 & IPv6);
+    - Arquivo corrompido, truncado OU de outro roteador eh ignorado (nada eh restaurado);
+    - Rotas cuja idade (gravada + tempo parado) atinge MAX_PERIODS periodos sao descartadas;
+    - Arquivo de inicializacao com peso invalido nao interrompe o roteador (linha eh rejeitada, demais sao aplicadas);
+'''
+
+ADDRESS = '10.0.0.1'
+NEIGHBORS = [('10.0.0.2', 3), ('10.0.0.3', 5)]
+ROUTES = [('10.1.0.1', '10.0.0.2', 7, 0.5), ('10.1.0.2', '10.0.0.3', 9, 1.25)]
+PI = 1.0
+
+@pytest.fixture(autouse=True)
+def silence_logs(monkeypatch) -> None:
+    monkeypatch.setattr(router, 'LOG_LEVEL', router.LOG_LEVEL_OFF)
+
+def create_router(state_path: str = None) -> router.Router:
+    return router.Router(ADDRESS, PI, transport=router.NullTransport(), state_path=state_path)
+
+def write_state(path, address: str = ADDRESS, routes: list = ROUTES, saved_at: float = None) -> bytes:
+    raw = router.encode_state(address, NEIGHBORS, routes, time.time() if saved_at == None else saved_at)
+    path.write_bytes(raw)
+    return raw
+
+def test_round_trip() -> None:
+
+    raw = router.encode_state(ADDRESS, NEIGHBORS, ROUTES, 1000.5)
+    assert router.decode_state(raw) == (ADDRESS, 1000.5, NEIGHBORS, ROUTES)
+
+    neighbors_ipv6 = [('fd00::2', 3)]
+    routes_ipv6 = [('fd00::1:1', 'fd00::2', 7, 0.5)]
+    raw = router.encode_state('fd00::1', neighbors_ipv6 + NEIGHBORS, routes_ipv6 + ROUTES, 1000.5)
+    assert router.decode_state(raw) == ('fd00::1', 1000.5, neighbors_ipv6, routes_ipv6)
+
+def test_corrupt_checksum_is_rejected() -> None:
+
+    raw = bytearray(router.encode_state(ADDRESS, NEIGHBORS, ROUTES, 1000.5))
+    raw[router.STATE_HEADER.size + 2] ^= 0xFF
+    with pytest.raises(IOError):
+        router.decode_state(bytes(raw))
+
+def test_truncated_file_is_rejected() -> None:
+    raw = router.encode_state(ADDRESS, NEIGHBORS, ROUTES, 1000.5)
+    for size in range(len(raw)):
+        with pytest.raises(IOError):
+            router.decode_state(raw[:size])
+
+def test_load_restores_neighbors_and_routes(tmp_path) -> None:
+
+    path = tmp_path / 'r1.state'
+    write_state(path)
+    node = create_router(str(path))
+
+    assert node.load_state()
+    assert {addr: node.routing_table[addr].best.weight for addr, _ in NEIGHBORS} == dict(NEIGHBORS)
+    assert node.routing_table['10.1.0.1'].best.addr_src == '10.0.0.2'
+    assert node.routing_table['10.1.0.2'].best.weight == 9
+
+def test_save_then_load(tmp_path) -> None:
+
+    path = str(tmp_path / 'r1.state')
+    node = create_router(path)
+    node.add_neighbors(NEIGHBORS)
+    node.apply_updates({'10.0.0.2': {'10.1.0.1': 7}}, node.clock())
+    node.save_state()
+
+    restored = create_router(path)
+    assert restored.load_state()
+    assert restored.routing_table['10.1.0.1'].best.weight == 7
+    assert restored.routing_table['10.0.0.3'].best.weight == 5
+
+@pytest.mark.parametrize('corrupt', ['checksum', 'truncated', 'other_router', 'missing'])
+def test_invalid_file_is_ignored(tmp_path, corrupt: str) -> None:
+
+    path = tmp_path / 'r1.state'
+    raw = write_state(path, '10.0.0.9' if corrupt == 'other_router' else ADDRESS)
+    if (corrupt == 'checksum'):
+        path.write_bytes(raw[:-1] + bytes([raw[-1] ^ 0xFF]))
+    elif (corrupt == 'truncated'):
+        path.write_bytes(raw[:len(raw) // 2])
+    elif (corrupt == 'missing'):
+        path.unlink()
+
+    node = create_router(str(path))
+    assert not node.load_state()
+    assert not node.routing_table
+
+def test_expired_routes_are_dropped(tmp_path) -> None:
+
+    timeout = router.MAX_PERIODS * PI
+    routes = [
+        ('10.1.0.1', '10.0.0.2', 7, timeout - 1.5), # Ainda valida apos 01 s parado
+        ('10.1.0.2', '10.0.0.2', 7, timeout - .5), # Expiraria durante o tempo parado
+        ('10.1.0.3', '10.0.0.2', 7, timeout), # Ja expirada na gravacao
+        ('10.1.0.4', '10.0.0.9', 7, 0), # Aprendida de quem nao eh vizinho restaurado
+    ]
+    path = tmp_path / 'r1.state'
+    write_state(path, routes=routes, saved_at=time.time() - 1)
+
+    node = create_router(str(path))
+    assert node.load_state()
+    assert '10.1.0.1' in node.routing_table
+    assert not {'10.1.0.2', '10.1.0.3', '10.1.0.4'} & set(node.routing_table)
+
+def test_add_command_rejects_invalid_weight(capsys) -> None:
+
+    assert router.get_command_data('add 10.0.0.2 x') == None
+    assert router.get_command_data('add 10.0.0.2 0') == None
+    assert router.get_command_data('add 10.0.0.2 3').weight == 3
+    assert 'Weight should be a positive int' in capsys.readouterr().out
+
+def test_startup_file_with_invalid_weight(tmp_path, capsys) -> None:
+
+    path = tmp_path / 'startup.txt'
+    path.write_text('add 10.0.0.2 3\nadd 1.2.3.4 x\nadd 10.0.0.3 5\n')
+    node = create_router()
+
+    assert router.execute_startup_commands(node, str(path))
+    assert set(node.routing_table) == {'10.0.0.2', '10.0.0.3'}
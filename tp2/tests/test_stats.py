@@ -0,0 +1,98 @@
+import json
+import re
+
+import pytest
+
+import router
+
+'''
+    Estatisticas em formato texto (Prometheus: 'get_stats_text'):
+    - Cada metrica traz '# HELP' & '# TYPE' 01 unica vez, antes das amostras; Cada amostra eh 'nome{rotulos} valor';
+    - Trafego por (tipo, vizinho) apenas com 'detailed'; Histogramas cumulativos (faixa '+Inf' = contagem);
+    - Temporizadores de caminhos criticos apenas quando ativados;
+'''
+
+ADDRESS = '10.0.0.1'
+ADDR_NEIGHBOR = '10.0.0.2'
+SAMPLE_LINE = re.compile(r'^([a-z_]+)(\{[a-z_]+="[^"]*"(,[a-z_]+="[^"]*")*\})? (-?[0-9.e+-]+)$')
+
+@pytest.fixture(autouse=True)
+def silence_logs(monkeypatch) -> None:
+    monkeypatch.setattr(router, 'LOG_LEVEL', router.LOG_LEVEL_OFF)
+
+def create_router() -> router.Router:
+
+    node = router.Router(ADDRESS, 1.0, transport=router.NullTransport())
+    node.stats.detailed = True
+    node.add_neighbor(ADDR_NEIGHBOR, 2)
+
+    update = {'type': router.MSG_TYPE_UPDATE, 'source': ADDR_NEIGHBOR, 'destination': ADDRESS, 'distances': {'10.1.0.1': 3, '10.1.0.2': 4}}
+    node.handle_msg(json.dumps(update).encode())
+    node.handle_msg(b'not a message')
+    return node
+
+'''
+    Le texto das estatisticas: Retorna tipo de cada metrica & amostras ('nome{rotulos}' -> valor), validando o formato.
+'''
+def parse_stats(text: str) -> tuple:
+
+    assert text.endswith('\n')
+    types: dict = {}
+    samples: dict = {}
+    helped = set()
+
+    for line in text.splitlines():
+        if (line.startswith('# HELP ')):
+            name = line.split(' ')[2]
+            assert not name in helped
+            helped.add(name)
+        elif (line.startswith('# TYPE ')):
+            _, _, name, metric_type = line.split(' ')
+            assert name in helped and not name in types
+            types[name] = metric_type
+        else:
+            match = SAMPLE_LINE.match(line)
+            assert match, line
+            name = match.group(1)
+            family = re.sub('_(bucket|sum|count)$', '', name) if types.get(name) == None else name
+            assert types.get(family) in ['counter', 'gauge', 'histogram'], line
+            samples[line.rsplit(' ', 1)[0]] = float(match.group(4))
+
+    return types, samples
+
+def test_text_format() -> None:
+
+    node = create_router()
+    types, samples = parse_stats(node.get_stats_text())
+
+    labels = 'router="' + ADDRESS + '"'
+    assert types['router_msgs_in_total'] == 'counter'
+    assert samples['router_msgs_in_total{' + labels + ',type="update",peer="' + ADDR_NEIGHBOR + '"}'] == 1
+    assert samples['router_invalid_msgs_total{' + labels + '}'] == 1
+    assert types['router_destinations'] == 'gauge'
+    assert samples['router_destinations{' + labels + '}'] == 3
+    assert samples['router_neighbors{' + labels + '}'] == 1
+
+def test_histograms_are_cumulative() -> None:
+
+    node = create_router()
+    types, samples = parse_stats(node.get_stats_text())
+
+    name = 'router_handle_msgs_seconds'
+    assert types[name] == 'histogram'
+    buckets = [value for key, value in samples.items() if key.startswith(name + '_bucket{')]
+    assert len(buckets) == len(router.STATS_LATENCY_BUCKETS) + 1
+    assert buckets == sorted(buckets)
+    assert samples[name + '_bucket{router="' + ADDRESS + '",le="+Inf"}'] == samples[name + '_count{router="' + ADDRESS + '"}'] == 2
+    assert samples[name + '_sum{router="' + ADDRESS + '"}'] >= 0
+
+def test_hot_path_metrics_only_when_timed() -> None:
+
+    node = create_router()
+    assert not 'router_hot_path' in node.get_stats_text()
+
+    node.enable_hot_path_timers()
+    node.apply_updates({ADDR_NEIGHBOR: {'10.1.0.3': 5}}, node.clock())
+    types, samples = parse_stats(node.get_stats_text())
+    assert types['router_hot_path_calls_total'] == 'counter'
+    assert samples['router_hot_path_calls_total{router="' + ADDRESS + '",path="' + router.HOT_PATH_SET_ROUTE + '"}'] == 1
@@ -0,0 +1,146 @@
+import collections
+
+import pytest
+
+import router
+import simulator
+
+'''
+    Rastreamentos ('trace'):
+    - TTL: Cada salto o decrementa & a msg eh descartada ao esgota-lo (sem TTL, o limite eh a qtd de saltos ja percorridos);
+    - Inundacao: Cada roteador repassa 01 mesmo rastreamento 01 unica vez (copias por outros caminhos sao descartadas);
+    - Alvo responde 01 unica vez, com os saltos percorridos;
+'''
+
+ADDRESS = '10.0.0.1'
+NEIGHBORS = ['10.0.0.2', '10.0.0.3']
+ADDR_TARGET = '10.1.0.1'
+
+class CaptureTransport(router.Transport):
+
+    def __init__(self) -> None:
+        self.sent: list = []
+
+    def sendto(self, raw_msg: bytes, sock_addr: tuple) -> None:
+        self.sent.append((router.decode_msg(raw_msg), sock_addr[0]))
+
+@pytest.fixture(autouse=True)
+def silence_logs(monkeypatch) -> None:
+    monkeypatch.setattr(router, 'LOG_LEVEL', router.LOG_LEVEL_OFF)
+
+'''
+    Roteador com 02 vizinhos & rota ate o alvo via o 1o deles.
+'''
+def create_router() -> tuple:
+    transport = CaptureTransport()
+    node = router.Router(ADDRESS, 1.0, transport=transport, multipath=router.MULTIPATH_OFF)
+    node.add_neighbors([(addr, 1) for addr in NEIGHBORS])
+    node.apply_updates({NEIGHBORS[0]: {ADDR_TARGET: 2}}, node.clock())
+    transport.sent.clear()
+    return node, transport
+
+def get_trace(hops: list, **fields) -> dict:
+    return dict({'type': router.MSG_TYPE_TRACE, 'source': hops[0], 'destination': ADDR_TARGET, 'hops': hops}, **fields)
+
+def test_ttl_is_decremented_per_hop() -> None:
+
+    node, transport = create_router()
+    node.handle_msg_trace(get_trace(['10.0.0.9'], ttl=5))
+
+    assert transport.sent == [(get_trace(['10.0.0.9', ADDRESS], ttl=4), NEIGHBORS[0])]
+
+def test_trace_is_dropped_when_ttl_runs_out() -> None:
+
+    node, transport = create_router()
+    node.handle_msg_trace(get_trace(['10.0.0.9'], ttl=1))
+    assert transport.sent == []
+
+def test_trace_without_ttl_is_limited_by_hops() -> None:
+
+    node, transport = create_router()
+    hops = ['10.0.9.%d' % i for i in range(1, router.TRACE_TTL)]
+
+    node.handle_msg_trace(get_trace(hops[:-1]))
+    assert [msg['ttl'] for msg, _ in transport.sent] == [1]
+
+    transport.sent.clear()
+    node.handle_msg_trace(get_trace(hops))
+    assert transport.sent == []
+
+def test_flood_copies_are_forwarded_once() -> None:
+
+    node, transport = create_router()
+    node.handle_msg_trace(get_trace(['10.0.0.9'], ttl=5, id=7))
+
+    # Repassado a todos os vizinhos que ainda nao constam entre os saltos
+    assert sorted(addr for _, addr in transport.sent) == NEIGHBORS
+
+    transport.sent.clear()
+    node.handle_msg_trace(get_trace(['10.0.0.9', NEIGHBORS[1]], ttl=4, id=7))
+    assert transport.sent == []
+
+    # Outro rastreamento (outro ID) da mesma origem segue normalmente
+    node.handle_msg_trace(get_trace(['10.0.0.9'], ttl=5, id=8))
+    assert len(transport.sent) == 2
+
+def test_flood_cache_is_bounded(monkeypatch) -> None:
+
+    monkeypatch.setattr(router, 'TRACE_SEEN_CACHE_SIZE', 4)
+    node, transport = create_router()
+    for trace_id in range(6):
+        assert not node.is_trace_seen(get_trace(['10.0.0.9'], id=trace_id))
+
+    assert len(node.traces_seen) == 4
+    assert node.is_trace_seen(get_trace(['10.0.0.9'], id=5))
+    assert not node.is_trace_seen(get_trace(['10.0.0.9'], id=0))
+
+@pytest.mark.parametrize('is_flood', [False, True])
+def test_trace_across_grid(is_flood: bool) -> None:
+
+    # Grade 4x4: Rastreamento do canto ate o canto oposto
+    network = simulator.Network()
+    addrs = [['10.0.%d.%d' % (row, col + 1) for col in range(4)] for row in range(4)]
+    links = []
+    for row in range(4):
+        for col in range(4):
+            if (col < 3):
+                links.append((addrs[row][col], addrs[row][col + 1]))
+            if (row < 3):
+                links.append((addrs[row][col], addrs[row + 1][col]))
+
+    counts = collections.Counter()
+    replies = []
+    try:
+        for addr_a, addr_b in links:
+            network.add_link(addr_a, addr_b, 1)
+        assert network.run_until_converged(30)
+
+        send = network.send
+        def on_send(addr_src: str, addr_dest: str, raw_msg: bytes) -> None:
+            counts[router.decode_msg(raw_msg)['type']] += 1
+            send(addr_src, addr_dest, raw_msg)
+        network.send = on_send
+
+        # Respostas entregues a origem
+        node_src = network.routers[addrs[0][0]]
+        handle_msg_data = node_src.handle_msg_data
+        def on_data(msg: dict) -> None:
+            if (msg['destination'] == node_src.address):
+                replies.append(msg)
+            handle_msg_data(msg)
+        node_src.handle_msg_data = on_data
+
+        network.routers[addrs[0][0]].trace(addrs[3][3], is_flood)
+        network.clock.run_until(network.clock.now + .5)
+    finally:
+        network.close()
+
+    # Direcionado: 06 saltos; Inundacao: No maximo 01 copia por sentido de enlace
+    if (is_flood):
+        assert 6 <= counts[router.MSG_TYPE_TRACE] <= 2 * len(links)
+    else:
+        assert counts[router.MSG_TYPE_TRACE] == 6
+
+    assert len(replies) == 1
+    hops = replies[0]['payload']['hops']
+    assert hops[0] == addrs[0][0] and hops[-1] == addrs[3][3] and len(hops) == 7
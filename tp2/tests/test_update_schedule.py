@@ -0,0 +1,72 @@
+import pytest
+
+import router
+import simulator
+
+'''
+    Agenda de updates periodicos no modo adaptativo ('adapt_update_period' / 'reset_update_period'):
+    - Tabela estavel alonga o intervalo entre updates completos (ate ADAPTIVE_FULL_PERIODS_MAX);
+    - Qualquer mudanca na tabela o volta na hora ao padrao, em todo roteador que a percebe;
+    - Rede reconverge apos del (com perda de msgs) mesmo depois de 01 longo periodo estavel;
+'''
+
+ADDRESS = '10.0.0.1'
+RING_SIZE = 12
+STABLE_PERIODS = 30
+
+@pytest.fixture(autouse=True)
+def silence_logs(monkeypatch) -> None:
+    monkeypatch.setattr(router, 'LOG_LEVEL', router.LOG_LEVEL_OFF)
+
+def create_ring(update_schedule: str, seed: int) -> tuple:
+    network = simulator.Network(seed=seed, update_schedule=update_schedule)
+    addrs = ['10.0.0.%d' % (i + 1) for i in range(RING_SIZE)]
+    for i in range(RING_SIZE):
+        network.add_link(addrs[i], addrs[(i + 1) % RING_SIZE], 1, loss=.1)
+    return network, addrs
+
+def test_gap_stretches_while_stable_and_resets_on_change() -> None:
+
+    node = router.Router(ADDRESS, 1.0, transport=router.NullTransport(), update_schedule=router.UPDATE_SCHEDULE_ADAPTIVE)
+    node.add_neighbors([('10.0.0.2', 1)])
+    for _ in range(10):
+        node.adapt_update_period()
+    assert node.full_update_periods == router.ADAPTIVE_FULL_PERIODS_MAX
+
+    node.apply_updates({'10.0.0.2': {'10.1.0.1': 3}}, node.clock())
+    assert node.full_update_periods == router.FULL_UPDATE_PERIODS
+
+    # Mudancas no periodo seguinte reduzem o intervalo pela metade
+    node.adapt_update_period()
+    assert node.full_update_periods == router.FULL_UPDATE_PERIODS / 2
+
+def test_fixed_schedule_ignores_changes() -> None:
+
+    node = router.Router(ADDRESS, 1.0, transport=router.NullTransport())
+    node.add_neighbors([('10.0.0.2', 1)])
+    node.adapt_update_period()
+    node.apply_updates({'10.0.0.2': {'10.1.0.1': 3}}, node.clock())
+    node.adapt_update_period()
+    assert node.full_update_periods == router.FULL_UPDATE_PERIODS
+
+@pytest.mark.parametrize('seed', range(3))
+def test_adaptive_reconverges_after_del(seed: int) -> None:
+
+    network, addrs = create_ring(router.UPDATE_SCHEDULE_ADAPTIVE, seed)
+    try:
+        assert network.run_until_converged(60)
+        network.clock.run_until(network.clock.now + STABLE_PERIODS * network.pi)
+        assert all(node.full_update_periods == router.ADAPTIVE_FULL_PERIODS_MAX for node in network.routers.values())
+
+        # Todo roteador que ja percebeu a falha (nao apenas as pontas do enlace) volta ao intervalo padrao
+        versions = {addr: node.table_version for addr, node in network.routers.items()}
+        network.fail_link(addrs[0], addrs[1])
+        network.clock.run_until(network.clock.now + network.pi)
+        changed = [node for addr, node in network.routers.items() if node.table_version != versions[addr]]
+        assert len(changed) > 2
+        assert all(node.full_update_periods <= router.FULL_UPDATE_PERIODS for node in changed)
+
+        assert network.run_until_converged(60)
+        assert network.count_wrong_tables() == 0
+    finally:
+        network.close()
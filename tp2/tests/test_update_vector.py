@@ -0,0 +1,125 @@
+import random
+
+import pytest
+
+import router
+import simulator
+
+'''
+    Vetor de distancias compartilhado entre vizinhos ('UpdateVector'):
+    - Update completo enviado a cada vizinho (todos os fragmentos, ja decodificados) equivale ao calculo ingenuo por vizinho;
+    - Split horizon: Destinos aprendidos do vizinho (& ele proprio) ficam fora; Poison reverse: Os aprendidos dele seguem como retirados;
+    - Nenhum datagrama enviado excede a MTU;
+    - Peso para chegar a mim eh o do enlace direto: Distancias antigas nao se confirmam mutuamente apos queda de enlace;
+'''
+
+ADDRESS = '10.0.0.1'
+NEIGHBORS = ['10.0.0.%d' % i for i in range(2, 8)]
+DESTINATIONS = ['10.2.%d.%d' % (i // 250, i % 250 + 1) for i in range(300)]
+
+class CaptureTransport(router.Transport):
+
+    def __init__(self) -> None:
+        self.sent: list = []
+
+    def sendto(self, raw_msg: bytes, sock_addr: tuple) -> None:
+        self.sent.append((raw_msg, sock_addr[0]))
+
+'''
+    Cria roteador com vizinhos & destinos aprendidos deles (pesos sorteados).
+'''
+def create_router(wire_format: str, mtu: int, seed: int) -> tuple:
+
+    rng = random.Random(seed)
+    transport = CaptureTransport()
+    node = router.Router(ADDRESS, 1.0, wire_format, mtu, transport=transport, multipath=router.MULTIPATH_OFF)
+
+    for addr in NEIGHBORS:
+        node.add_neighbor(addr, rng.randint(1, 10))
+        node.get_neighbor_state(addr).binary = True # Vizinhos anunciam suporte ao formato binario
+
+    updates = {addr: {addr_dest: rng.randint(1, 30) for addr_dest in rng.sample(DESTINATIONS, 150)} for addr in NEIGHBORS}
+    updates[NEIGHBORS[0]][NEIGHBORS[1]] = 1 # Melhor rota para 01 vizinho aprendida de outro vizinho
+    node.apply_updates(updates, node.clock())
+    return node, transport
+
+'''
+    Calculo ingenuo do update completo a 01 vizinho: Distancias anunciadas + destinos retirados.
+    - Pesos somam o do enlace direto ate o vizinho (mesmo quando a melhor rota ate ele segue por outro vizinho);
+'''
+def get_expected_update(node: router.Router, entries: dict, addr_neighbor: str) -> tuple:
+
+    link_weight = node.routing_table[addr_neighbor].routes[node.address].weight
+    distances = {node.address: link_weight}
+    withdrawn = set()
+
+    for addr_dest, (addr_src, weight) in entries.items():
+        if (addr_src == addr_neighbor):
+            withdrawn.add(addr_dest)
+        elif (addr_dest != addr_neighbor and link_weight + weight < router.ROUTE_INFINITY):
+            distances[addr_dest] = link_weight + weight
+
+    return distances, withdrawn
+
+@pytest.mark.parametrize('wire_format', [router.WIRE_FORMAT_JSON, router.WIRE_FORMAT_BINARY])
+@pytest.mark.parametrize('mtu', [router.MIN_MTU, router.MTU])
+def test_full_updates_match_per_neighbor_computation(monkeypatch, wire_format: str, mtu: int) -> None:
+
+    monkeypatch.setattr(router, 'LOG_LEVEL', router.LOG_LEVEL_OFF)
+    node, transport = create_router(wire_format, mtu, 0)
+    node.send_updates(True)
+    entries = node.get_table_snapshot().entries
+
+    received = {addr: ({}, set()) for addr in NEIGHBORS}
+    for raw_msg, addr in transport.sent:
+        assert len(raw_msg) <= mtu
+        msg = router.decode_msg(raw_msg)
+        assert msg['full'] and msg['destination'] == addr
+        assert (raw_msg[:1] == router.BIN_MAGIC_BYTE) == (wire_format == router.WIRE_FORMAT_BINARY)
+        received[addr][0].update(msg['distances'])
+        received[addr][1].update(msg.get('withdrawn', []))
+
+    for addr in NEIGHBORS:
+        assert received[addr] == get_expected_update(node, entries, addr)
+
+def test_delta_only_carries_changed_destinations(monkeypatch) -> None:
+
+    monkeypatch.setattr(router, 'LOG_LEVEL', router.LOG_LEVEL_OFF)
+    node, transport = create_router(router.WIRE_FORMAT_JSON, router.MTU, 1)
+    node.send_updates(True)
+    transport.sent.clear()
+
+    addr_dest = DESTINATIONS[0]
+    node.apply_updates({NEIGHBORS[2]: {addr_dest: None}, NEIGHBORS[3]: {addr_dest: 1}}, node.clock())
+    node.send_updates(False)
+    entries = node.get_table_snapshot().entries
+
+    assert transport.sent
+    for raw_msg, addr in transport.sent:
+        msg = router.decode_msg(raw_msg)
+        assert not msg['full']
+        assert set(msg['distances']) | set(msg.get('withdrawn', [])) <= {addr_dest}
+        expected_distances, expected_withdrawn = get_expected_update(node, entries, addr)
+        if (addr_dest in expected_distances):
+            assert msg['distances'] == {addr_dest: expected_distances[addr_dest]}
+        else:
+            assert msg.get('withdrawn') == [addr_dest]
+
+@pytest.mark.parametrize('failed', ['1-2', '1-5', '2-3', '2-5', '3-5'])
+def test_tables_are_right_after_link_failure(failed: str) -> None:
+
+    # Anel de 05 roteadores (pesos 1) + 02 atalhos mais caros ate o 5o
+    links = [('1', '2', 1), ('2', '3', 1), ('3', '4', 1), ('4', '5', 1), ('5', '1', 1), ('2', '5', 3), ('3', '5', 2)]
+    network = simulator.Network()
+    try:
+        for addr_a, addr_b, weight in links:
+            network.add_link('127.0.1.' + addr_a, '127.0.1.' + addr_b, weight)
+        assert network.run_until_converged(30)
+        assert network.count_wrong_tables() == 0
+
+        addr_a, addr_b = failed.split('-')
+        network.fail_link('127.0.1.' + addr_a, '127.0.1.' + addr_b)
+        assert network.run_until_converged(30)
+        assert network.count_wrong_tables() == 0
+    finally:
+        network.close()